@@ -6,98 +6,106 @@ import logging
 from typing import Optional, List, Dict, Any
 
 from app.agents.llm_config import GeminiFlashConfig
-from app.rag.hybrid_search import HybridSearch
+from app.rag.hybrid_search import HybridSearch, HybridSearchResponse
 from app.rag.embeddings import EmbeddingsGenerator
+from app.rag.model_registry import model_registry
 
 logger = logging.getLogger(__name__)
 
 
 class AgentManager:
-    \"\"\"Gerencia múltiplos agentes especializados usando Agno.\"\"\"
+    """Gerencia múltiplos agentes especializados usando Agno."""
 
     def __init__(self):
-        \"\"\"Inicializa gerenciador de agentes.\"\"\"
-        logger.info(\"Inicializando AgentManager\")
+        """Inicializa gerenciador de agentes."""
+        logger.info("Inicializando AgentManager")
 
         self.llm_config = GeminiFlashConfig()
         self.hybrid_search = HybridSearch()
-        self.embeddings_gen = EmbeddingsGenerator()
+        self._embeddings_gen: Optional[EmbeddingsGenerator] = None
 
         # Agentes especializados
         self.agents = {
-            \"rag_agent\": self._create_rag_agent(),
-            \"summarizer_agent\": self._create_summarizer_agent(),
-            \"qa_agent\": self._create_qa_agent(),
-            \"extractor_agent\": self._create_extractor_agent(),
+            "rag_agent": self._create_rag_agent(),
+            "summarizer_agent": self._create_summarizer_agent(),
+            "qa_agent": self._create_qa_agent(),
+            "extractor_agent": self._create_extractor_agent(),
         }
 
-        logger.info(f\"AgentManager inicializado com {len(self.agents)} agentes\")
+        logger.info(f"AgentManager inicializado com {len(self.agents)} agentes")
+
+    @property
+    def embeddings_gen(self) -> EmbeddingsGenerator:
+        """Gerador de embeddings compartilhado (carregado sob demanda)."""
+        if self._embeddings_gen is None:
+            self._embeddings_gen = model_registry.get_embeddings_generator()
+        return self._embeddings_gen
 
     def _create_rag_agent(self) -> Dict[str, Any]:
-        \"\"\"Cria agente especializado em RAG.\"\"\"
+        """Cria agente especializado em RAG."""
         return {
-            \"name\": \"RAG Agent\",
-            \"description\": \"Agente especializado em Retrieval-Augmented Generation\",
-            \"role\": \"Buscar documentos relevantes e gerar respostas contextualizadas\",
-            \"system_prompt\": \"\"\"Você é um assistente especializado em Retrieval-Augmented Generation.
+            "name": "RAG Agent",
+            "description": "Agente especializado em Retrieval-Augmented Generation",
+            "role": "Buscar documentos relevantes e gerar respostas contextualizadas",
+            "system_prompt": """Você é um assistente especializado em Retrieval-Augmented Generation.
 Sua tarefa é:
 1. Buscar documentos relevantes
 2. Analisar o contexto
 3. Gerar respostas precisas baseadas nos documentos
-4. Sempre citar as fontes\"\"\",
+4. Sempre citar as fontes""",
         }
 
     def _create_summarizer_agent(self) -> Dict[str, Any]:
-        \"\"\"Cria agente especializado em sumarização.\"\"\"
+        """Cria agente especializado em sumarização."""
         return {
-            \"name\": \"Summarizer Agent\",
-            \"description\": \"Agente especializado em sumarização de documentos\",
-            \"role\": \"Sumarizar documentos longos em pontos-chave\",
-            \"system_prompt\": \"\"\"Você é um especialista em sumarização.
+            "name": "Summarizer Agent",
+            "description": "Agente especializado em sumarização de documentos",
+            "role": "Sumarizar documentos longos em pontos-chave",
+            "system_prompt": """Você é um especialista em sumarização.
 Sua tarefa é:
 1. Identificar informações principais
 2. Remover redundâncias
 3. Manter contexto importante
-4. Gerar sumários concisos e informativos\"\"\",
+4. Gerar sumários concisos e informativos""",
         }
 
     def _create_qa_agent(self) -> Dict[str, Any]:
-        \"\"\"Cria agente especializado em Q&A.\"\"\"
+        """Cria agente especializado em Q&A."""
         return {
-            \"name\": \"QA Agent\",
-            \"description\": \"Agente especializado em responder perguntas\",
-            \"role\": \"Responder perguntas específicas baseado em documentos\",
-            \"system_prompt\": \"\"\"Você é um especialista em responder perguntas.
+            "name": "QA Agent",
+            "description": "Agente especializado em responder perguntas",
+            "role": "Responder perguntas específicas baseado em documentos",
+            "system_prompt": """Você é um especialista em responder perguntas.
 Sua tarefa é:
 1. Entender a pergunta
 2. Buscar informações relevantes
 3. Formular respostas claras e diretas
-4. Indicar incertezas quando apropriado\"\"\",
+4. Indicar incertezas quando apropriado""",
         }
 
     def _create_extractor_agent(self) -> Dict[str, Any]:
-        \"\"\"Cria agente especializado em extração de informações.\"\"\"
+        """Cria agente especializado em extração de informações."""
         return {
-            \"name\": \"Extractor Agent\",
-            \"description\": \"Agente especializado em extração de informações estruturadas\",
-            \"role\": \"Extrair informações estruturadas de documentos\",
-            \"system_prompt\": \"\"\"Você é um especialista em extração de informações.
+            "name": "Extractor Agent",
+            "description": "Agente especializado em extração de informações estruturadas",
+            "role": "Extrair informações estruturadas de documentos",
+            "system_prompt": """Você é um especialista em extração de informações.
 Sua tarefa é:
 1. Identificar entidades relevantes
 2. Extrair informações estruturadas
 3. Validar dados extraídos
-4. Retornar em formato estruturado\"\"\",
+4. Retornar em formato estruturado""",
         }
 
     async def process_query(
         self,
         query: str,
-        agent_type: str = \"rag_agent\",
+        agent_type: str = "rag_agent",
         context: Optional[str] = None,
         vector_store=None,
         keyword_documents: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        \"\"\"
+        """
         Processa query usando agente apropriado.
 
         Args:
@@ -105,79 +113,85 @@ Sua tarefa é:
             agent_type: Tipo de agente
             context: Contexto adicional
             vector_store: Store vetorial
-            keyword_documents: Documentos para busca por palavra-chave
+            keyword_documents: Chunks para a busca por palavra-chave em memória;
+                desnecessário com ``KEYWORD_SEARCH_BACKEND=postgres`` (busca no banco)
+                ou com o índice já alimentado
 
         Returns:
             Resultado processado
-        \"\"\"
+        """
         try:
             if agent_type not in self.agents:
-                raise ValueError(f\"Agente desconhecido: {agent_type}\")
+                raise ValueError(f"Agente desconhecido: {agent_type}")
 
             agent = self.agents[agent_type]
 
-            logger.info(f\"Processando query com {agent['name']}\")
+            logger.info(f"Processando query com {agent['name']}")
 
             # Gerar embedding da query
-            query_embedding = await self.embeddings_gen.generate_embedding(query)
+            query_embedding = await self.embeddings_gen.generate_embedding_array(query)
 
             # Busca híbrida
-            search_results = []
-            if vector_store and keyword_documents:
-                search_results = await self.hybrid_search.search(
+            search = HybridSearchResponse(results=[])
+            if vector_store:
+                search = await self.hybrid_search.search_with_metadata(
                     query=query,
                     query_embedding=query_embedding,
                     vector_store=vector_store,
                     keyword_documents=keyword_documents,
                     top_k=5,
                 )
+            search_results = search.results
 
             # Preparar contexto
-            search_context = \"\\n\".join(
-                [f\"- {result.content[:200]}...\" for result in search_results]
+            search_context = "\n".join(
+                [f"- {result.content[:200]}..." for result in search_results]
             )
 
-            full_context = f\"\"\"{context or \"\"}
+            full_context = f"""{context or ""}
 
 Documentos Relevantes:
-{search_context}\"\"\"
+{search_context}"""
 
             # Gerar resposta
             response = await self.llm_config.answer_question(
-                context=full_context, question=query, system_prompt=agent[\"system_prompt\"]
+                context=full_context, question=query, system_prompt=agent["system_prompt"]
             )
 
             result = {
-                \"agent\": agent[\"name\"],
-                \"query\": query,
-                \"response\": response,
-                \"sources\": [
+                "agent": agent["name"],
+                "query": query,
+                "response": response,
+                "sources": [
                     {
-                        \"chunk_id\": result.chunk_id,
-                        \"document_id\": result.document_id,
-                        \"score\": result.score,
-                        \"content\": result.content[:200],
+                        "chunk_id": result.chunk_id,
+                        "document_id": result.document_id,
+                        "score": result.score,
+                        "content": result.content[:200],
                     }
                     for result in search_results
                 ],
-                \"metadata\": {
-                    \"search_type\": \"hybrid\",
-                    \"num_sources\": len(search_results),
+                "metadata": {
+                    "search_type": "hybrid",
+                    "num_sources": len(search_results),
+                    # Algum ramo da busca estourou o prazo (resultados só do outro)
+                    "partial": search.partial,
+                    "timed_out": search.timed_out,
                 },
             }
 
-            logger.info(f\"Query processada com sucesso\")
+            logger.info(f"Query processada com sucesso")
 
             return result
 
         except Exception as e:
-            logger.error(f\"Erro ao processar query: {e}\")
+            logger.error(f"Erro ao processar query: {e}")
             raise
 
     async def orchestrate_multi_agent(
         self, query: str, agents_sequence: List[str], context: Optional[str] = None
     ) -> Dict[str, Any]:
-        \"\"\"
+        """
         Orquestra múltiplos agentes em sequência.
 
         Args:
@@ -187,15 +201,15 @@ Documentos Relevantes:
 
         Returns:
             Resultado final
-        \"\"\"
+        """
         try:
-            logger.info(f\"Orquestrando {len(agents_sequence)} agentes\")
+            logger.info(f"Orquestrando {len(agents_sequence)} agentes")
 
-            current_context = context or \"\"
+            current_context = context or ""
             results = []
 
             for agent_type in agents_sequence:
-                logger.info(f\"Executando {agent_type}\")
+                logger.info(f"Executando {agent_type}")
 
                 result = await self.process_query(
                     query=query, agent_type=agent_type, context=current_context
@@ -204,29 +218,29 @@ Documentos Relevantes:
                 results.append(result)
 
                 # Usar resposta anterior como contexto
-                current_context = result[\"response\"]
+                current_context = result["response"]
 
             return {
-                \"query\": query,
-                \"agents_executed\": agents_sequence,
-                \"results\": results,
-                \"final_response\": results[-1][\"response\"] if results else \"\",
+                "query": query,
+                "agents_executed": agents_sequence,
+                "results": results,
+                "final_response": results[-1]["response"] if results else "",
             }
 
         except Exception as e:
-            logger.error(f\"Erro ao orquestrar agentes: {e}\")
+            logger.error(f"Erro ao orquestrar agentes: {e}")
             raise
 
     def get_agent_info(self, agent_type: str) -> Dict[str, Any]:
-        \"\"\"Retorna informações sobre um agente.\"\"\"
+        """Retorna informações sobre um agente."""
         if agent_type not in self.agents:
-            raise ValueError(f\"Agente desconhecido: {agent_type}\")
+            raise ValueError(f"Agente desconhecido: {agent_type}")
 
         return self.agents[agent_type]
 
     def list_agents(self) -> List[Dict[str, str]]:
-        \"\"\"Lista todos os agentes disponíveis.\"\"\"
+        """Lista todos os agentes disponíveis."""
         return [
-            {\"name\": agent[\"name\"], \"description\": agent[\"description\"]}
+            {"name": agent["name"], "description": agent["description"]}
             for agent in self.agents.values()
         ]
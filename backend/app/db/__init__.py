@@ -2,4 +2,32 @@
 Módulo de banco de dados: Conexão PostgreSQL e modelos.
 """
 
-__all__ = []
+from app.db.database import PgVectorDatabase, close_database, get_database
+from app.db.exact_store import ExactVectorDatabase
+from app.db.hnsw_store import HNSWVectorDatabase
+from app.db.partitioning import migrate_to_partitioned
+from app.db.pg_copy import copy_chunks
+from app.db.pgvector_codec import (
+    decode_vector,
+    encode_vector,
+    encode_vectors,
+    vector_ops_sql,
+    vector_type_sql,
+)
+from app.db.search_filters import SearchFilters
+
+__all__ = [
+    "PgVectorDatabase",
+    "HNSWVectorDatabase",
+    "ExactVectorDatabase",
+    "get_database",
+    "close_database",
+    "SearchFilters",
+    "copy_chunks",
+    "migrate_to_partitioned",
+    "encode_vector",
+    "encode_vectors",
+    "decode_vector",
+    "vector_type_sql",
+    "vector_ops_sql",
+]
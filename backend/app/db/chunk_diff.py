@@ -0,0 +1,73 @@
+"""
+Diferença entre os chunks armazenados de um documento e uma nova versão.
+
+Cada chunk é identificado pelo SHA-256 do conteúdo (``content_hash``). Na
+re-indexação, chunks com hash já armazenado são reaproveitados (sem novo
+embedding nem reescrita no índice HNSW); apenas chunks novos ou alterados
+são inseridos e apenas os removidos são apagados.
+"""
+
+import hashlib
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 (hex) do conteúdo de um chunk."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ChunkDiff(NamedTuple):
+    """Operações necessárias para sincronizar os chunks de um documento."""
+
+    reused: int
+    delete_ids: List[int]
+    # (id, novo chunk_index, novos metadados) de chunks reaproveitados que mudaram de posição
+    updates: List[Tuple[int, int, dict]]
+    # Chunks a inserir, com ``chunk_index`` e ``content_hash`` preenchidos
+    new_chunks: List[dict]
+
+
+def diff_chunks(existing: Sequence[dict], chunks: Sequence[dict]) -> ChunkDiff:
+    """
+    Compara chunks armazenados com a nova lista de chunks do documento.
+
+    Conteúdos repetidos são pareados como multiconjunto, preferindo o chunk
+    armazenado na mesma posição.
+
+    Args:
+        existing: Chunks armazenados (``id``, ``chunk_index``, ``content_hash``,
+            ``metadata``)
+        chunks: Nova versão (``content`` e ``metadata``), na ordem do documento
+
+    Returns:
+        ChunkDiff com reaproveitados, remoções, reposicionamentos e inserções
+    """
+    by_hash: Dict[str, List[dict]] = {}
+    for row in sorted(existing, key=lambda r: r["chunk_index"]):
+        by_hash.setdefault(row["content_hash"], []).append(row)
+
+    reused = 0
+    updates: List[Tuple[int, int, dict]] = []
+    new_chunks: List[dict] = []
+
+    for chunk_index, chunk in enumerate(chunks):
+        digest = content_hash(chunk["content"])
+        metadata = chunk.get("metadata") or {}
+        candidates = by_hash.get(digest)
+
+        if not candidates:
+            new_chunks.append(
+                {**chunk, "metadata": metadata, "chunk_index": chunk_index, "content_hash": digest}
+            )
+            continue
+
+        position = next(
+            (i for i, row in enumerate(candidates) if row["chunk_index"] == chunk_index), 0
+        )
+        row = candidates.pop(position)
+        reused += 1
+        if row["chunk_index"] != chunk_index or (row.get("metadata") or {}) != metadata:
+            updates.append((row["id"], chunk_index, metadata))
+
+    delete_ids = [row["id"] for rows in by_hash.values() for row in rows]
+    return ChunkDiff(reused, delete_ids, updates, new_chunks)
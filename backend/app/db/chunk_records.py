@@ -0,0 +1,363 @@
+"""
+Armazenamento de registros de chunks para os backends vetoriais em processo.
+
+Os registros (documento, índice, conteúdo e metadados) de um snapshot ficam em
+arrays ``.npy`` e blobs abertos com ``mmap``: a inicialização não lê o
+conteúdo dos chunks, que é decodificado apenas quando um resultado é
+materializado. Chunks adicionados após o snapshot ficam em memória até o
+próximo snapshot.
+
+Contadores (chunks por documento e bytes de conteúdo) são mantidos a cada
+inserção/remoção, para estatísticas O(1); ``reconcile_counters`` os recalcula.
+
+Snapshots são gravados em diretórios versionados; o arquivo ``CURRENT``
+aponta para o snapshot ativo e é trocado de forma atômica.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.db.chunk_diff import content_hash
+from app.db.search_filters import SearchFilters
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkRecordStore:
+    """Registros de chunks com base mapeada em memória e overlay mutável."""
+
+    def __init__(self):
+        """Inicializa store vazio."""
+        self._base_ids = np.empty(0, dtype=np.int64)
+        self._base_document_ids = np.empty(0, dtype=np.int64)
+        self._base_chunk_index = np.empty(0, dtype=np.int32)
+        self._base_content_offsets = np.zeros(1, dtype=np.int64)
+        self._base_content = np.empty(0, dtype=np.uint8)
+        self._base_metadata_offsets = np.zeros(1, dtype=np.int64)
+        self._base_metadata = np.empty(0, dtype=np.uint8)
+        self._base_deleted: Set[int] = set()
+
+        self._overlay: Dict[int, Tuple[int, int, str, dict]] = {}
+        self._overlay_by_document: Dict[int, Set[int]] = {}
+
+        self._document_chunks: Dict[int, int] = {}
+        self._content_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._base_ids) - len(self._base_deleted) + len(self._overlay)
+
+    def _base_row(self, chunk_id: int) -> Optional[int]:
+        """Linha do chunk na base, ou None."""
+        row = int(np.searchsorted(self._base_ids, chunk_id))
+        if row < len(self._base_ids) and self._base_ids[row] == chunk_id:
+            if chunk_id not in self._base_deleted:
+                return row
+        return None
+
+    def _count(self, document_id: int, chunks: int, content_bytes: int) -> None:
+        """Ajusta os contadores de um documento."""
+        remaining = self._document_chunks.get(document_id, 0) + chunks
+        if remaining > 0:
+            self._document_chunks[document_id] = remaining
+        else:
+            self._document_chunks.pop(document_id, None)
+        self._content_bytes += content_bytes
+
+    def _content_size(self, chunk_id: int) -> int:
+        """Bytes UTF-8 do conteúdo de um chunk vivo (sem decodificar a base)."""
+        record = self._overlay.get(chunk_id)
+        if record is not None:
+            return len(record[2].encode("utf-8"))
+        row = self._base_row(chunk_id)
+        offsets = self._base_content_offsets
+        return 0 if row is None else int(offsets[row + 1] - offsets[row])
+
+    def add(
+        self,
+        chunk_id: int,
+        document_id: int,
+        chunk_index: int,
+        content: str,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        """Adiciona (ou substitui) um registro."""
+        self.delete(chunk_id)
+
+        self._overlay[chunk_id] = (document_id, chunk_index, content, metadata or {})
+        self._overlay_by_document.setdefault(document_id, set()).add(chunk_id)
+        self._count(document_id, 1, len(content.encode("utf-8")))
+
+    def get(self, chunk_id: int) -> Optional[dict]:
+        """Retorna registro como dicionário (mesmo formato do PgVector)."""
+        record = self._overlay.get(chunk_id)
+        if record is not None:
+            document_id, chunk_index, content, metadata = record
+            return {
+                "id": chunk_id,
+                "document_id": document_id,
+                "chunk_index": chunk_index,
+                "content": content,
+                "metadata": metadata,
+            }
+
+        row = self._base_row(chunk_id)
+        if row is None:
+            return None
+
+        content = self._slice(self._base_content, self._base_content_offsets, row)
+        metadata = self._slice(self._base_metadata, self._base_metadata_offsets, row)
+        return {
+            "id": chunk_id,
+            "document_id": int(self._base_document_ids[row]),
+            "chunk_index": int(self._base_chunk_index[row]),
+            "content": content,
+            "metadata": json.loads(metadata) if metadata else {},
+        }
+
+    @staticmethod
+    def _slice(blob: np.ndarray, offsets: np.ndarray, row: int) -> str:
+        """Decodifica o texto da linha ``row`` de um blob."""
+        return bytes(blob[offsets[row] : offsets[row + 1]]).decode("utf-8")
+
+    def document_of(self, chunk_id: int) -> Optional[int]:
+        """Documento dono do chunk (sem decodificar o conteúdo)."""
+        record = self._overlay.get(chunk_id)
+        if record is not None:
+            return record[0]
+        row = self._base_row(chunk_id)
+        return None if row is None else int(self._base_document_ids[row])
+
+    def ids_for_document(self, document_id: int) -> List[int]:
+        """IDs dos chunks vivos de um documento."""
+        base_ids = self._base_ids[self._base_document_ids == document_id]
+        ids = [int(i) for i in base_ids if int(i) not in self._base_deleted]
+        ids.extend(self._overlay_by_document.get(document_id, ()))
+        return ids
+
+    def document_records(self, document_id: int, min_index: int = 0) -> List[dict]:
+        """Registros de um documento com ``chunk_index >= min_index``, em ordem."""
+        records = [self.get(chunk_id) for chunk_id in self.ids_for_document(document_id)]
+        records = [record for record in records if record["chunk_index"] >= min_index]
+        return sorted(records, key=lambda record: record["chunk_index"])
+
+    def chunk_hashes(self, document_id: int) -> List[dict]:
+        """Chunks de um documento com hash do conteúdo (para ``diff_chunks``)."""
+        rows = []
+        for chunk_id in self.ids_for_document(document_id):
+            record = self.get(chunk_id)
+            rows.append(
+                {
+                    "id": chunk_id,
+                    "chunk_index": record["chunk_index"],
+                    "content_hash": content_hash(record["content"]),
+                    "metadata": record["metadata"],
+                }
+            )
+        return rows
+
+    def update(self, chunk_id: int, chunk_index: int, metadata: dict) -> None:
+        """Altera posição e metadados de um chunk (o vetor é mantido)."""
+        record = self.get(chunk_id)
+        if record is not None:
+            self.add(chunk_id, record["document_id"], chunk_index, record["content"], metadata)
+
+    def delete(self, chunk_id: int) -> bool:
+        """Remove um registro."""
+        document_id = self.document_of(chunk_id)
+        if document_id is None:
+            return False
+        self._count(document_id, -1, -self._content_size(chunk_id))
+
+        record = self._overlay.pop(chunk_id, None)
+        if record is not None:
+            self._overlay_by_document.get(record[0], set()).discard(chunk_id)
+        else:
+            self._base_deleted.add(chunk_id)
+        return True
+
+    def chunk_count(self, document_id: int) -> int:
+        """Número de chunks vivos de um documento (contador)."""
+        return self._document_chunks.get(document_id, 0)
+
+    def document_count(self) -> int:
+        """Número de documentos com chunks vivos (contador)."""
+        return len(self._document_chunks)
+
+    @property
+    def content_bytes(self) -> int:
+        """Bytes UTF-8 de conteúdo dos chunks vivos (contador)."""
+        return self._content_bytes
+
+    def reconcile_counters(self) -> dict:
+        """
+        Recalcula os contadores a partir dos registros vivos.
+
+        Returns:
+            Diferença encontrada (``documents``, ``content_bytes``)
+        """
+        documents_before, bytes_before = self.document_count(), self._content_bytes
+        live_ids = self.live_ids()
+        documents, counts = np.unique(self.document_ids_for(live_ids), return_counts=True)
+        self._document_chunks = dict(zip(documents.tolist(), counts.tolist()))
+        self._content_bytes = sum(self._content_size(int(i)) for i in live_ids)
+        return {
+            "documents": len(self._document_chunks) - documents_before,
+            "content_bytes": self._content_bytes - bytes_before,
+        }
+
+    def live_ids(self) -> np.ndarray:
+        """IDs de todos os chunks vivos, ordenados."""
+        base = self._base_ids
+        if self._base_deleted:
+            base = base[~np.isin(base, list(self._base_deleted))]
+        overlay = np.fromiter(self._overlay.keys(), dtype=np.int64, count=len(self._overlay))
+        return np.sort(np.concatenate([base, overlay]))
+
+    def document_ids_for(self, chunk_ids: np.ndarray) -> np.ndarray:
+        """Documento de cada chunk (vetorizado sobre a base)."""
+        result = np.full(len(chunk_ids), -1, dtype=np.int64)
+        rows = np.searchsorted(self._base_ids, chunk_ids)
+        rows = np.minimum(rows, max(len(self._base_ids) - 1, 0))
+        if len(self._base_ids):
+            in_base = self._base_ids[rows] == chunk_ids
+            result[in_base] = self._base_document_ids[rows[in_base]]
+        for pos, chunk_id in enumerate(chunk_ids):
+            record = self._overlay.get(int(chunk_id))
+            if record is not None:
+                result[pos] = record[0]
+        return result
+
+    def filter_ids(self, filters: SearchFilters) -> np.ndarray:
+        """
+        IDs dos chunks vivos que satisfazem os filtros, ordenados.
+
+        ``document_ids`` é resolvido pelos arrays de documento; os demais
+        filtros exigem ler os metadados de cada candidato.
+        """
+        if filters.document_ids is not None:
+            candidates = np.array(
+                sorted(
+                    chunk_id
+                    for document_id in set(filters.document_ids)
+                    for chunk_id in self.ids_for_document(document_id)
+                ),
+                dtype=np.int64,
+            )
+        else:
+            candidates = self.live_ids()
+
+        if not filters.needs_record:
+            return candidates
+
+        keep = [filters.matches(self.get(int(chunk_id))) for chunk_id in candidates]
+        return candidates[np.array(keep, dtype=bool)] if len(candidates) else candidates
+
+    def iter_records(self) -> Iterator[dict]:
+        """Itera todos os registros vivos em ordem de ID."""
+        for chunk_id in self.live_ids():
+            yield self.get(int(chunk_id))
+
+    def records_after(self, after_id: int, limit: int) -> List[dict]:
+        """Até ``limit`` registros vivos com ID maior que ``after_id``, em ordem de ID."""
+        ids = self.live_ids()
+        start = int(np.searchsorted(ids, after_id, side="right"))
+        return [self.get(int(chunk_id)) for chunk_id in ids[start : start + limit]]
+
+    def save(self, directory: str) -> None:
+        """
+        Grava registros vivos em ``directory`` (arrays e blobs).
+
+        Args:
+            directory: Diretório de destino (criado se necessário)
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        ids, document_ids, chunk_index = [], [], []
+        contents: List[bytes] = []
+        metadatas: List[bytes] = []
+        for record in self.iter_records():
+            ids.append(record["id"])
+            document_ids.append(record["document_id"])
+            chunk_index.append(record["chunk_index"])
+            contents.append(record["content"].encode("utf-8"))
+            metadatas.append(json.dumps(record["metadata"]).encode("utf-8"))
+
+        def offsets(parts: List[bytes]) -> np.ndarray:
+            lengths = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+            return np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+        np.save(os.path.join(directory, "ids.npy"), np.array(ids, dtype=np.int64))
+        np.save(os.path.join(directory, "document_ids.npy"), np.array(document_ids, dtype=np.int64))
+        np.save(os.path.join(directory, "chunk_index.npy"), np.array(chunk_index, dtype=np.int32))
+        np.save(os.path.join(directory, "content_offsets.npy"), offsets(contents))
+        np.save(os.path.join(directory, "metadata_offsets.npy"), offsets(metadatas))
+        with open(os.path.join(directory, "content.bin"), "wb") as f:
+            f.write(b"".join(contents))
+        with open(os.path.join(directory, "metadata.bin"), "wb") as f:
+            f.write(b"".join(metadatas))
+
+    @classmethod
+    def load(cls, directory: str) -> "ChunkRecordStore":
+        """Abre registros gravados com ``save`` via mmap."""
+        store = cls()
+
+        def array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        def blob(name: str) -> np.ndarray:
+            path = os.path.join(directory, name)
+            if os.path.getsize(path) == 0:
+                return np.empty(0, dtype=np.uint8)
+            return np.memmap(path, dtype=np.uint8, mode="r")
+
+        store._base_ids = array("ids.npy")
+        store._base_document_ids = array("document_ids.npy")
+        store._base_chunk_index = array("chunk_index.npy")
+        store._base_content_offsets = array("content_offsets.npy")
+        store._base_metadata_offsets = array("metadata_offsets.npy")
+        store._base_content = blob("content.bin")
+        store._base_metadata = blob("metadata.bin")
+
+        # Contadores da base: um único passe vetorizado na abertura
+        documents, counts = np.unique(store._base_document_ids, return_counts=True)
+        store._document_chunks = dict(zip(documents.tolist(), counts.tolist()))
+        store._content_bytes = int(store._base_content_offsets[-1])
+        return store
+
+
+def new_snapshot_dir(root: str) -> str:
+    """Cria diretório temporário para um novo snapshot em ``root``."""
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"snapshot-{int(time.time() * 1000)}-", dir=root)
+
+
+def publish_snapshot(root: str, snapshot_dir: str) -> None:
+    """Torna ``snapshot_dir`` o snapshot ativo e remove os anteriores."""
+    pointer_tmp = os.path.join(root, "CURRENT.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(os.path.basename(snapshot_dir))
+    os.replace(pointer_tmp, os.path.join(root, "CURRENT"))
+
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name.startswith("snapshot-") and path != snapshot_dir and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    logger.info(f"Snapshot publicado: {snapshot_dir}")
+
+
+def current_snapshot_dir(root: str) -> Optional[str]:
+    """Diretório do snapshot ativo em ``root``, ou None."""
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            path = os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return path if os.path.isdir(path) else None
@@ -0,0 +1,930 @@
+"""
+Implementação assíncrona (asyncpg) do protocolo de banco usado pelo VectorStore.
+
+- pool de conexões dimensionado pela configuração (nenhuma conexão por chamada);
+- codecs binários de ``vector``/``halfvec`` e ``jsonb`` registrados em cada
+  conexão, de modo que embeddings trafegam como arrays NumPy;
+- statements de busca vetorial reaproveitados pelo cache de statements do
+  asyncpg (``DB_STATEMENT_CACHE_SIZE``), por conexão;
+- ``ef_search`` e iterative scan do HNSW ajustáveis por query (``SET LOCAL``);
+- com ``CHUNK_PARTITIONS``, busca em paralelo nas partições e junção dos top-k;
+- busca em dois estágios opcional sobre cópias quantizadas (``app.db.quantization``).
+"""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import logging
+from typing import List, Optional, Sequence
+
+import asyncpg
+import numpy as np
+
+from app.config import settings
+from app.db.chunk_diff import content_hash
+from app.db.partitioning import build_partition_indexes, partition_names
+from app.db.pg_copy import copy_chunks
+from app.db.quantization import check_mode, quantized_distance_sql, quantized_index_sql
+from app.db.pgvector_codec import (
+    COSINE_DISTANCE_OPERATOR,
+    INNER_PRODUCT_OPERATOR,
+    ITERATIVE_SCAN_MODES,
+    decode_vector,
+    encode_vector,
+    vector_ops_sql,
+)
+from app.db.search_filters import SearchFilters
+from app.db.stats_counters import (
+    APPLY_DOCUMENT_DRIFT_SQL,
+    APPLY_TOTALS_DRIFT_SQL,
+    DELETE_EMPTY_DOCUMENTS_SQL,
+    RECONCILE_DRIFT_SQL,
+    RECONCILE_LOCK_KEY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Configuração de text search da coluna content_tsv (init-db.sql)
+TEXT_SEARCH_CONFIG = "portuguese"
+
+
+class PgVectorDatabase:
+    """Acesso ao PostgreSQL/PgVector com pool de conexões asyncpg."""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ):
+        """
+        Inicializa acesso ao banco (o pool é criado na primeira chamada).
+
+        Args:
+            dsn: URL de conexão (padrão: ``DATABASE_URL``)
+            min_size: Conexões mantidas abertas no pool
+            max_size: Máximo de conexões do pool
+        """
+        self.dsn = dsn or settings.database_url
+        self.min_size = min_size if min_size is not None else settings.db_pool_min_size
+        self.max_size = max_size if max_size is not None else settings.db_pool_max_size
+
+        self.vector_type = "halfvec" if settings.vector_storage_precision == "float16" else "vector"
+
+        # Com vetores normalizados o produto interno (<#>) equivale ao cosseno;
+        # o índice HNSW precisa da classe de operadores do operador usado
+        self.hnsw_ops = vector_ops_sql(
+            settings.vector_storage_precision, settings.normalize_embeddings
+        )
+        if settings.normalize_embeddings:
+            self.distance_operator = INNER_PRODUCT_OPERATOR
+            self.similarity_sql = f"-(c.embedding {INNER_PRODUCT_OPERATOR} $1::{self.vector_type})"
+        else:
+            self.distance_operator = COSINE_DISTANCE_OPERATOR
+            self.similarity_sql = (
+                f"1 - (c.embedding {COSINE_DISTANCE_OPERATOR} $1::{self.vector_type})"
+            )
+
+        self.search_sql = self._build_search_sql()
+
+        # Tabela particionada por hash (app.db.partitioning): busca por partição
+        self.partitions = settings.chunk_partitions
+        self.partition_key = settings.chunk_partition_key if self.partitions else None
+        self.partition_tables = partition_names("document_chunks", self.partitions)
+        # Conexões usadas pela busca nas partições, somando todas as buscas em
+        # curso; o restante do pool fica livre para ingestão e outras queries
+        self._partition_slots = asyncio.Semaphore(
+            max(1, min(settings.partition_search_concurrency, self.max_size - 1))
+        )
+
+        self.pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+
+    def _build_search_sql(
+        self,
+        where: Optional[str] = None,
+        table: str = "document_chunks",
+        quantization: Optional[str] = None,
+    ) -> str:
+        """
+        SQL da busca vetorial (parâmetros: $1 embedding, $2 top_k, $3 limiar).
+
+        Ordenação pela distância no subselect permite uso do índice HNSW; os
+        filtros (``where``) são aplicados no subselect, antes do LIMIT, e o
+        limiar depois, sobre os top-k candidatos. ``table`` pode ser uma
+        partição de ``document_chunks``.
+
+        Com ``quantization``, o subselect interno ordena pela distância na
+        cópia quantizada (índice ``<tabela>_<modo>_hnsw``) e limita a $4
+        candidatos, reordenados pela similaridade em precisão total; os
+        parâmetros dos filtros começam em $5.
+        """
+        where_sql = f"WHERE {where}" if where else ""
+        if quantization:
+            distance = quantized_distance_sql(
+                quantization,
+                settings.vector_storage_dimension,
+                self.vector_type,
+                self.distance_operator,
+            )
+            return f"""
+            SELECT id, document_id, chunk_index, content, metadata, similarity
+            FROM (
+                SELECT c.id, c.document_id, c.chunk_index, c.content, c.metadata,
+                       {self.similarity_sql} AS similarity
+                FROM (
+                    SELECT c.id, c.document_id, c.chunk_index, c.content, c.metadata,
+                           c.embedding
+                    FROM {table} c
+                    {where_sql}
+                    ORDER BY {distance}
+                    LIMIT $4
+                ) AS c
+                ORDER BY similarity DESC
+                LIMIT $2
+            ) AS candidates
+            WHERE similarity >= $3
+            ORDER BY similarity DESC
+        """
+
+        return f"""
+            SELECT id, document_id, chunk_index, content, metadata, similarity
+            FROM (
+                SELECT c.id, c.document_id, c.chunk_index, c.content, c.metadata,
+                       {self.similarity_sql} AS similarity
+                FROM {table} c
+                {where_sql}
+                ORDER BY c.embedding {self.distance_operator} $1::{self.vector_type}
+                LIMIT $2
+            ) AS candidates
+            WHERE similarity >= $3
+            ORDER BY similarity DESC
+        """
+
+    async def connect(self) -> asyncpg.Pool:
+        """Cria o pool de conexões (idempotente)."""
+        if self.pool is not None:
+            return self.pool
+
+        async with self._pool_lock:
+            if self.pool is None:
+                logger.info(
+                    f"Criando pool PostgreSQL (min={self.min_size}, max={self.max_size})"
+                )
+                self.pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    max_inactive_connection_lifetime=settings.db_pool_max_inactive_lifetime,
+                    command_timeout=settings.db_command_timeout,
+                    statement_cache_size=settings.db_statement_cache_size,
+                    server_settings={"hnsw.ef_search": str(settings.hnsw_ef_search)},
+                    init=self._init_connection,
+                )
+
+        return self.pool
+
+    async def check_hnsw_index(self) -> None:
+        """
+        Confere se os índices HNSW de ``embedding`` servem o operador da busca.
+
+        Um índice ``*_ip_ops`` não atende ``<=>`` (``NORMALIZE_EMBEDDINGS=false``)
+        nem ``*_cosine_ops`` atende ``<#>``: toda busca viraria varredura
+        sequencial. Executado na partida da aplicação.
+
+        Raises:
+            RuntimeError: Se algum índice usa outra classe de operadores
+        """
+        pool = await self.connect()
+        rows = await pool.fetch(
+            """
+            SELECT i.relname AS index_name, o.opcname AS opclass
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_class t ON t.oid = x.indrelid
+            JOIN pg_am a ON a.oid = i.relam
+            JOIN pg_opclass o ON o.oid = x.indclass[0]
+            JOIN pg_attribute c ON c.attrelid = t.oid AND c.attnum = x.indkey[0]
+            WHERE a.amname = 'hnsw' AND c.attname = 'embedding'
+              AND t.relname = ANY($1::text[])
+            """,
+            ["document_chunks", *self.partition_tables],
+        )
+        wrong = [
+            f"{row['index_name']} ({row['opclass']})"
+            for row in rows
+            if row["opclass"] != self.hnsw_ops
+        ]
+        if wrong:
+            raise RuntimeError(
+                f"Índices HNSW incompatíveis com a busca por {self.distance_operator} "
+                f"(NORMALIZE_EMBEDDINGS={str(settings.normalize_embeddings).lower()}): "
+                f"{', '.join(wrong)}; reconstrua com PgVectorDatabase.build_hnsw_index"
+            )
+
+    async def close(self) -> None:
+        """Fecha o pool de conexões."""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Pool PostgreSQL fechado")
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        """Registra os codecs binários na conexão."""
+        await conn.set_type_codec(
+            "jsonb",
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog",
+        )
+        await conn.set_type_codec(
+            "vector",
+            encoder=lambda v: encode_vector(np.asarray(v, dtype=np.float32)),
+            decoder=decode_vector,
+            schema="public",
+            format="binary",
+        )
+        if self.vector_type == "halfvec":
+            await conn.set_type_codec(
+                "halfvec",
+                encoder=lambda v: encode_vector(np.asarray(v, dtype=np.float16)),
+                decoder=lambda data: decode_vector(data, half=True),
+                schema="public",
+                format="binary",
+            )
+
+    async def add_chunk(
+        self,
+        document_id: int,
+        chunk_index: int,
+        content: str,
+        embedding: np.ndarray,
+        metadata: Optional[dict] = None,
+    ) -> int:
+        """
+        Insere um chunk.
+
+        Returns:
+            ID do chunk inserido
+        """
+        user_column = user_value = ""
+        if self.partition_key == "user_id":
+            # Particionada por usuário: user_id vem do documento
+            user_column = ", user_id"
+            user_value = ", (SELECT user_id FROM documents WHERE id = $1)"
+
+        pool = await self.connect()
+        return await pool.fetchval(
+            f"""
+            INSERT INTO document_chunks
+                (document_id, chunk_index, content, embedding, metadata, content_hash{user_column})
+            SELECT $1, $2, $3, $4::{self.vector_type}, $5, $6{user_value}
+            RETURNING id
+            """,
+            document_id,
+            chunk_index,
+            content,
+            embedding,
+            metadata or {},
+            content_hash(content),
+        )
+
+    async def add_chunks_bulk(
+        self,
+        document_id: int,
+        chunks: Sequence[dict],
+        embeddings: np.ndarray,
+        start_index: int = 0,
+    ) -> int:
+        """
+        Insere todos os chunks de um documento com COPY binário.
+
+        Returns:
+            Número de chunks inseridos
+        """
+        pool = await self.connect()
+        async with pool.acquire() as conn:
+            user_id = await self._partition_user_id(conn, document_id)
+            return await copy_chunks(
+                conn, document_id, chunks, embeddings, start_index, user_id=user_id
+            )
+
+    async def _partition_user_id(self, conn, document_id: int) -> Optional[int]:
+        """Dono do documento, exigido no COPY quando a partição é por ``user_id``."""
+        if self.partition_key != "user_id":
+            return None
+        return await conn.fetchval("SELECT user_id FROM documents WHERE id = $1", document_id)
+
+    async def get_document_chunks(self, document_id: int, min_index: int = 0) -> List[dict]:
+        """
+        Lista os chunks de um documento (a partir de ``min_index``), em ordem.
+
+        Returns:
+            Lista de ``id``, ``document_id``, ``chunk_index``, ``content`` e ``metadata``
+        """
+        pool = await self.connect()
+        rows = await pool.fetch(
+            """
+            SELECT id, document_id, chunk_index, content, metadata
+            FROM document_chunks
+            WHERE document_id = $1 AND chunk_index >= $2
+            ORDER BY chunk_index
+            """,
+            document_id,
+            min_index,
+        )
+        return [dict(row) for row in rows]
+
+    async def get_chunks_after(self, after_id: int, limit: int) -> List[dict]:
+        """
+        Lista até ``limit`` chunks com ID maior que ``after_id``, em ordem de ID.
+
+        Paginação por chave (``id``), para percorrer todos os chunks em lotes.
+
+        Returns:
+            Lista de ``id``, ``document_id``, ``chunk_index``, ``content`` e ``metadata``
+        """
+        pool = await self.connect()
+        rows = await pool.fetch(
+            """
+            SELECT id, document_id, chunk_index, content, metadata
+            FROM document_chunks
+            WHERE id > $1
+            ORDER BY id
+            LIMIT $2
+            """,
+            after_id,
+            limit,
+        )
+        return [dict(row) for row in rows]
+
+    async def get_chunk_hashes(self, document_id: int) -> List[dict]:
+        """
+        Lista os chunks de um documento com o hash do conteúdo.
+
+        Linhas gravadas antes da coluna ``content_hash`` têm o hash calculado
+        no banco, sem transferir o conteúdo.
+
+        Returns:
+            Lista de ``id``, ``chunk_index``, ``content_hash`` e ``metadata``
+        """
+        pool = await self.connect()
+        rows = await pool.fetch(
+            """
+            SELECT id, chunk_index, metadata,
+                   coalesce(content_hash, encode(sha256(convert_to(content, 'UTF8')), 'hex'))
+                       AS content_hash
+            FROM document_chunks
+            WHERE document_id = $1
+            """,
+            document_id,
+        )
+        return [dict(row) for row in rows]
+
+    async def apply_chunk_changes(
+        self,
+        document_id: int,
+        delete_ids: Sequence[int],
+        updates: Sequence[tuple],
+        new_chunks: Sequence[dict],
+        embeddings: np.ndarray,
+    ) -> None:
+        """
+        Aplica a diferença de chunks de um documento em uma transação.
+
+        Args:
+            document_id: ID do documento
+            delete_ids: IDs dos chunks removidos
+            updates: ``(id, chunk_index, metadata)`` de chunks reaproveitados
+            new_chunks: Chunks novos (com ``chunk_index``)
+            embeddings: Embeddings dos chunks novos
+        """
+        pool = await self.connect()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if delete_ids:
+                    await conn.execute(
+                        "DELETE FROM document_chunks WHERE id = ANY($1::int[])", list(delete_ids)
+                    )
+                if updates:
+                    # Só chunk_index/metadata mudam: nenhum embedding é recalculado e,
+                    # com UPDATE HOT (metadados iguais), o HNSW não é tocado
+                    await conn.execute(
+                        """
+                        UPDATE document_chunks AS c
+                        SET chunk_index = u.chunk_index, metadata = u.metadata
+                        FROM unnest($1::int[], $2::int[], $3::jsonb[])
+                            AS u(id, chunk_index, metadata)
+                        WHERE c.id = u.id AND c.document_id = $4
+                        """,
+                        [u[0] for u in updates],
+                        [u[1] for u in updates],
+                        [u[2] for u in updates],
+                        document_id,
+                    )
+                if new_chunks:
+                    user_id = await self._partition_user_id(conn, document_id)
+                    await copy_chunks(
+                        conn, document_id, new_chunks, embeddings, user_id=user_id
+                    )
+
+    async def search_similar_vectors(
+        self,
+        embedding: np.ndarray,
+        top_k: int = 5,
+        threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
+        quantization: Optional[str] = None,
+        oversample: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Busca chunks mais similares ao embedding.
+
+        Com tabela particionada, as partições são buscadas em paralelo (no
+        máximo ``PARTITION_SEARCH_CONCURRENCY`` conexões do pool, somadas todas
+        as buscas em curso) e os top-k são unidos.
+
+        Args:
+            embedding: Embedding da query
+            top_k: Número de resultados
+            threshold: Limiar de similaridade
+            ef_search: Largura da busca HNSW nesta query (padrão: ``HNSW_EF_SEARCH``)
+            iterative_scan: Modo de iterative scan nesta query (``off``,
+                ``strict_order`` ou ``relaxed_order``); em buscas filtradas o
+                padrão é ``HNSW_FILTERED_ITERATIVE_SCAN``
+            filters: Filtros aplicados dentro da busca (antes do LIMIT)
+            quantization: ``binary`` ou ``int8``: candidatos pela cópia
+                quantizada, reordenados em precisão total
+            oversample: Candidatos por resultado no primeiro estágio (padrão:
+                ``QUANTIZED_SEARCH_OVERSAMPLE``)
+
+        Returns:
+            Lista de chunks com ``similarity``
+        """
+        filtered = filters is not None and not filters.is_empty()
+        if filtered and iterative_scan is None:
+            # Sem iterative scan, o HNSW devolve só ef_search candidatos e o
+            # filtro pode descartar quase todos
+            iterative_scan = settings.hnsw_filtered_iterative_scan or None
+
+        if iterative_scan is not None and iterative_scan not in ITERATIVE_SCAN_MODES:
+            raise ValueError(f"Modo de iterative scan desconhecido: {iterative_scan}")
+
+        where, params = None, []
+        if filtered:
+            where, params = filters.to_sql(
+                first_param=5 if quantization else 4,
+                user_column=self.partition_key == "user_id",
+            )
+
+        if quantization:
+            check_mode(quantization)
+            candidates = top_k * max(oversample or settings.quantized_search_oversample, 1)
+            params = [candidates, *params]
+            # O HNSW da cópia quantizada precisa devolver todos os candidatos
+            ef_search = max(ef_search or settings.hnsw_ef_search, candidates)
+
+        # Filtro por usuário em tabela particionada por user_id: o PostgreSQL
+        # poda as partições e a busca na tabela pai toca uma só
+        pruned = filtered and self.partition_key == "user_id" and filters.user_id is not None
+
+        if self.partitions and not pruned:
+
+            async def search_partition(table: str) -> list:
+                # Uma conexão por partição, limitada pelo semáforo compartilhado
+                async with self._partition_slots:
+                    return await self._fetch_search(
+                        self._build_search_sql(where, table, quantization),
+                        embedding,
+                        top_k,
+                        threshold,
+                        ef_search,
+                        iterative_scan,
+                        params,
+                    )
+
+            batches = await asyncio.gather(
+                *(search_partition(table) for table in self.partition_tables)
+            )
+            rows = heapq.nlargest(
+                top_k, itertools.chain.from_iterable(batches), key=lambda row: row["similarity"]
+            )
+        else:
+            custom = filtered or quantization
+            sql = self._build_search_sql(where, quantization=quantization) if custom else None
+            rows = await self._fetch_search(
+                sql, embedding, top_k, threshold, ef_search, iterative_scan, params
+            )
+
+        return [dict(row) for row in rows]
+
+    async def _fetch_search(
+        self,
+        sql: Optional[str],
+        embedding: np.ndarray,
+        top_k: int,
+        threshold: float,
+        ef_search: Optional[int],
+        iterative_scan: Optional[str],
+        params: Sequence,
+    ) -> list:
+        """
+        Executa uma busca vetorial em uma conexão do pool.
+
+        Args:
+            sql: SQL da busca (``None``: busca padrão, ``self.search_sql``)
+            params: Parâmetros dos filtros (a partir de ``$4``)
+
+        Returns:
+            Linhas retornadas
+        """
+        pool = await self.connect()
+        async with pool.acquire() as conn:
+            # conn.fetch reaproveita o statement preparado pelo cache do asyncpg
+            # (DB_STATEMENT_CACHE_SIZE), inclusive para as variações com filtros
+            fetch = functools.partial(conn.fetch, sql or self.search_sql)
+
+            if ef_search is None and iterative_scan is None:
+                return await fetch(embedding, top_k, threshold, *params)
+
+            # SET LOCAL vale só para esta transação; a conexão volta ao pool limpa
+            async with conn.transaction():
+                if ef_search is not None:
+                    # ef_search menor que o LIMIT truncaria os resultados
+                    await conn.execute(
+                        "SELECT set_config('hnsw.ef_search', $1, true)",
+                        str(max(ef_search, top_k)),
+                    )
+                if iterative_scan is not None:
+                    await conn.execute(
+                        "SELECT set_config('hnsw.iterative_scan', $1, true)", iterative_scan
+                    )
+                return await fetch(embedding, top_k, threshold, *params)
+
+    def _build_keyword_sql(self, where: Optional[str] = None, table: str = "document_chunks") -> str:
+        """
+        SQL da busca por palavra-chave (parâmetros: $1 tsquery, $2 top_k).
+
+        ``content_tsv`` (coluna gerada, configuração ``portuguese``) é
+        filtrada pelo índice GIN; só os chunks que casam são ordenados por
+        ``ts_rank`` (normalização 1: divide por 1 + log do tamanho). Os
+        parâmetros dos filtros começam em $3.
+        """
+        return f"""
+            SELECT c.id, c.document_id, c.chunk_index, c.content, c.metadata,
+                   ts_rank(c.content_tsv, q, 1) AS score
+            FROM {table} c, to_tsquery('{TEXT_SEARCH_CONFIG}', $1) AS q
+            WHERE c.content_tsv @@ q AND {where or "TRUE"}
+            ORDER BY score DESC
+            LIMIT $2
+        """
+
+    async def keyword_search(
+        self, terms: Sequence[str], top_k: int = 10, filters: Optional[SearchFilters] = None
+    ) -> List[dict]:
+        """
+        Busca por palavra-chave no PostgreSQL (full-text, índice GIN).
+
+        Os termos são combinados com OR (qualquer termo casa), como na busca
+        em memória; a configuração ``portuguese`` aplica stemming e remove
+        stopwords.
+
+        Args:
+            terms: Termos da query já tokenizados (apenas caracteres de palavra)
+            top_k: Número de resultados
+            filters: Restrições aplicadas dentro da busca
+
+        Returns:
+            Lista de chunks com ``score`` (``ts_rank``)
+        """
+        if not terms:
+            return []
+
+        where, params = None, []
+        if filters is not None and not filters.is_empty():
+            where, params = filters.to_sql(
+                first_param=3, user_column=self.partition_key == "user_id"
+            )
+
+        pool = await self.connect()
+        # A tabela pai cobre as partições (cada uma com seu índice GIN)
+        rows = await pool.fetch(self._build_keyword_sql(where), " | ".join(terms), top_k, *params)
+        return [dict(row) for row in rows]
+
+    async def build_hnsw_index(
+        self, m: Optional[int] = None, ef_construction: Optional[int] = None
+    ) -> None:
+        """
+        (Re)constrói ``idx_embedding_hnsw`` com os parâmetros informados.
+
+        O novo índice é criado com ``CONCURRENTLY`` sob outro nome e só então
+        substitui o atual, sem janela sem índice nem bloqueio de escritas
+        durante a construção.
+
+        Args:
+            m: Vizinhos por nó (padrão: ``HNSW_M``)
+            ef_construction: Largura da busca na construção (padrão: ``HNSW_EF_CONSTRUCTION``)
+        """
+        m = int(m or settings.hnsw_m)
+        ef_construction = int(ef_construction or settings.hnsw_ef_construction)
+
+        if self.partitions:
+            await self._build_partition_hnsw_indexes(m, ef_construction)
+            return
+
+        try:
+            logger.info(f"Construindo índice HNSW (m={m}, ef_construction={ef_construction})")
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_embedding_hnsw_new")
+                await conn.execute(
+                    f"""
+                    CREATE INDEX CONCURRENTLY idx_embedding_hnsw_new
+                    ON document_chunks USING hnsw (embedding {self.hnsw_ops})
+                    WITH (m = {m}, ef_construction = {ef_construction})
+                    """,
+                    timeout=None,
+                )
+                async with conn.transaction():
+                    await conn.execute("DROP INDEX IF EXISTS idx_embedding_hnsw")
+                    await conn.execute(
+                        "ALTER INDEX idx_embedding_hnsw_new RENAME TO idx_embedding_hnsw"
+                    )
+            logger.info("Índice HNSW reconstruído")
+
+        except Exception as e:
+            logger.error(f"Erro ao construir índice HNSW: {e}")
+            raise
+
+    async def build_quantized_index(self, mode: str) -> None:
+        """
+        Cria o índice HNSW da cópia quantizada usada por ``quantization=mode``.
+
+        Em tabela particionada o índice é criado na tabela pai (sem
+        ``CONCURRENTLY``, não suportado nela) e propagado às partições.
+
+        Args:
+            mode: ``binary`` ou ``int8``
+        """
+        check_mode(mode)
+        sql = quantized_index_sql(
+            mode,
+            "document_chunks",
+            settings.vector_storage_dimension,
+            settings.normalize_embeddings,
+            concurrently=not self.partitions,
+        )
+
+        try:
+            logger.info(f"Construindo índice HNSW da cópia {mode}")
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                await conn.execute(sql, timeout=None)
+            logger.info(f"Índice da cópia {mode} construído")
+
+        except Exception as e:
+            logger.error(f"Erro ao construir índice da cópia {mode}: {e}")
+            raise
+
+    async def _build_partition_hnsw_indexes(self, m: int, ef_construction: int) -> None:
+        """
+        Reconstrói em paralelo os índices HNSW de todas as partições.
+
+        Como no índice único, os novos índices são criados com ``CONCURRENTLY``
+        sob outro nome e substituem os atuais em uma transação.
+        """
+        try:
+            logger.info(
+                f"Construindo índices HNSW de {self.partitions} partições "
+                f"(m={m}, ef_construction={ef_construction})"
+            )
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                for table in self.partition_tables:
+                    await conn.execute(
+                        f"DROP INDEX CONCURRENTLY IF EXISTS {table}_embedding_hnsw_new"
+                    )
+            elapsed = await build_partition_indexes(
+                pool,
+                "document_chunks",
+                self.partitions,
+                m,
+                ef_construction,
+                concurrently=True,
+                suffix="_new",
+            )
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    for table in self.partition_tables:
+                        await conn.execute(f"DROP INDEX IF EXISTS {table}_embedding_hnsw")
+                        await conn.execute(
+                            f"ALTER INDEX {table}_embedding_hnsw_new "
+                            f"RENAME TO {table}_embedding_hnsw"
+                        )
+            logger.info(f"Índices HNSW das partições reconstruídos em {elapsed:.1f}s")
+
+        except Exception as e:
+            logger.error(f"Erro ao construir índices HNSW das partições: {e}")
+            raise
+
+    async def delete_chunks(self, document_id: int) -> int:
+        """
+        Remove chunks de um documento.
+
+        Returns:
+            Número de chunks removidos
+        """
+        pool = await self.connect()
+        status = await pool.execute(
+            "DELETE FROM document_chunks WHERE document_id = $1", document_id
+        )
+        return int(status.split()[-1])
+
+    async def get_vector_stats(self) -> dict:
+        """
+        Retorna estatísticas dos vetores armazenados.
+
+        Contagens e bytes vêm de ``vector_store_stats`` (mantida por triggers,
+        soma dos slots); tamanhos de tabela e índice vêm do catálogo. Nenhuma
+        varredura de ``document_chunks``.
+        """
+        pool = await self.connect()
+        tables = self.partition_tables or ["document_chunks"]
+        indexes = (
+            [f"{table}_embedding_hnsw" for table in self.partition_tables]
+            if self.partitions
+            else ["idx_embedding_hnsw"]
+        )
+        try:
+            row = await pool.fetchrow(
+                """
+                SELECT sum(s.total_chunks)::bigint AS total_chunks,
+                       sum(s.total_documents)::bigint AS total_documents,
+                       sum(s.content_bytes)::bigint AS content_bytes,
+                       sum(s.vector_bytes)::bigint AS vector_bytes,
+                       max(s.reconciled_at) AS reconciled_at,
+                       (SELECT coalesce(sum(pg_total_relation_size(t::regclass)), 0)::bigint
+                        FROM unnest($1::text[]) AS t) AS table_bytes,
+                       (SELECT coalesce(sum(pg_relation_size(to_regclass(i))), 0)::bigint
+                        FROM unnest($2::text[]) AS i) AS index_bytes
+                FROM vector_store_stats s
+                """,
+                tables,
+                indexes,
+            )
+        except asyncpg.UndefinedTableError:
+            # Banco sem as tabelas de contadores (init-db.sql anterior)
+            logger.warning("vector_store_stats ausente: estatísticas por contagem completa")
+            row = await pool.fetchrow(
+                """
+                SELECT count(*) AS total_chunks,
+                       count(DISTINCT document_id) AS total_documents,
+                       pg_total_relation_size('document_chunks') AS table_bytes,
+                       coalesce(pg_relation_size(to_regclass('idx_embedding_hnsw')), 0)
+                           AS index_bytes
+                FROM document_chunks
+                """
+            )
+
+        stats = dict(row)
+        if self.partitions:
+            stats["partitions"] = self.partitions
+        return stats
+
+    async def get_document_stats(self, document_id: int) -> dict:
+        """Retorna chunks e bytes de um documento (``document_chunk_stats``)."""
+        pool = await self.connect()
+        row = await pool.fetchrow(
+            """
+            SELECT chunk_count, content_bytes, vector_bytes
+            FROM document_chunk_stats
+            WHERE document_id = $1
+            """,
+            document_id,
+        )
+        counters = dict(row) if row else {"chunk_count": 0, "content_bytes": 0, "vector_bytes": 0}
+        return {"document_id": document_id, **counters}
+
+    async def reconcile_stats(self, min_interval: Optional[float] = None) -> dict:
+        """
+        Corrige os contadores a partir de ``document_chunks`` (job periódico).
+
+        Uma execução por vez entre todos os processos (advisory lock); as
+        demais retornam ``skipped``. O desvio é medido em um snapshot
+        REPEATABLE READ e somado aos contadores em seguida: escritas não são
+        bloqueadas e as feitas durante a contagem, já contadas pelos
+        triggers, são preservadas.
+
+        Args:
+            min_interval: Pular se a última reconciliação tem menos segundos
+                que isto (padrão: metade de ``STATS_RECONCILE_INTERVAL``, para
+                que os workers de todas as réplicas somem ~1 execução por
+                intervalo)
+
+        Returns:
+            Documentos corrigidos e desvio do total de chunks
+        """
+        if min_interval is None:
+            min_interval = settings.stats_reconcile_interval / 2
+
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", RECONCILE_LOCK_KEY):
+                    return {"skipped": True}
+                try:
+                    recent = await conn.fetchval(
+                        """
+                        SELECT reconciled_at > now() - make_interval(secs => $1)
+                        FROM vector_store_stats
+                        WHERE slot = 0
+                        """,
+                        float(min_interval),
+                    )
+                    if recent:
+                        return {"skipped": True}
+
+                    async with conn.transaction(isolation="repeatable_read", readonly=True):
+                        rows = await conn.fetch(RECONCILE_DRIFT_SQL, timeout=None)
+                    documents = [row for row in rows if row["document_id"] is not None]
+                    totals = next(row for row in rows if row["document_id"] is None)
+
+                    async with conn.transaction():
+                        if documents:
+                            ids = [row["document_id"] for row in documents]
+                            await conn.execute(
+                                APPLY_DOCUMENT_DRIFT_SQL,
+                                ids,
+                                [row["chunk_count"] for row in documents],
+                                [row["content_bytes"] for row in documents],
+                                [row["vector_bytes"] for row in documents],
+                            )
+                            await conn.execute(DELETE_EMPTY_DOCUMENTS_SQL, ids)
+                        await conn.execute(
+                            APPLY_TOTALS_DRIFT_SQL,
+                            totals["chunk_count"],
+                            totals["content_bytes"],
+                            totals["vector_bytes"],
+                            totals["documents"],
+                        )
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock($1)", RECONCILE_LOCK_KEY)
+            return {"documents_fixed": len(documents), "chunks_drift": totals["chunk_count"]}
+
+        except Exception as e:
+            logger.error(f"Erro ao reconciliar estatísticas de chunks: {e}")
+            raise
+
+    def get_pool_stats(self) -> dict:
+        """Retorna estado do pool de conexões."""
+        if self.pool is None:
+            return {"connected": False}
+
+        return {
+            "connected": True,
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+        }
+
+
+_database = None
+
+
+def get_database():
+    """
+    Retorna instância de banco compartilhada pelo processo.
+
+    O backend é escolhido por ``VECTOR_BACKEND``: ``pgvector`` (padrão),
+    ``hnsw`` ou ``exact`` (índices em processo, sem PostgreSQL).
+    """
+    global _database
+
+    if _database is None:
+        backend = settings.vector_backend
+        if backend == "pgvector":
+            _database = PgVectorDatabase()
+        elif backend == "hnsw":
+            from app.db.hnsw_store import HNSWVectorDatabase
+
+            _database = HNSWVectorDatabase()
+        elif backend == "exact":
+            from app.db.exact_store import ExactVectorDatabase
+
+            _database = ExactVectorDatabase()
+        else:
+            raise ValueError(f"Backend vetorial desconhecido: {backend}")
+        logger.info(f"Backend vetorial: {backend}")
+
+    return _database
+
+
+async def close_database() -> None:
+    """Fecha o banco compartilhado (pool ou snapshot pendente), se aberto."""
+    if _database is not None:
+        await _database.close()
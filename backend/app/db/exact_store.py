@@ -0,0 +1,597 @@
+"""
+Backend vetorial em processo com busca exata (força bruta) em NumPy.
+
+Até algumas centenas de milhares de chunks, o produto de matrizes sobre um
+bloco float32 contíguo é mais rápido e mais preciso que um índice ANN, e
+serve de ground truth para medir recall.
+
+- vetores normalizados em ``vectors.npy`` e IDs em ``ids.npy``, ambos abertos
+  com ``mmap`` e alterados no lugar (a capacidade dobra quando necessário);
+- busca em blocos de linhas distribuídos entre threads (o ``matmul`` libera o
+  GIL), com top-k por ``argpartition`` em cada bloco e merge final;
+- registros dos chunks em snapshots versionados (``ChunkRecordStore``);
+- busca em dois estágios opcional: cópia quantizada em memória
+  (``QuantizedCodes``, criada no primeiro uso) e reavaliação dos candidatos
+  com os vetores float32.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from app.config import settings
+from app.db.chunk_records import (
+    ChunkRecordStore,
+    current_snapshot_dir,
+    new_snapshot_dir,
+    publish_snapshot,
+)
+from app.db.quantization import QuantizedCodes, check_mode
+from app.db.search_filters import SearchFilters
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILE = "vectors.npy"
+_IDS_FILE = "ids.npy"
+_META_FILE = "meta.json"
+_EMPTY_ID = -1
+
+
+class ExactVectorDatabase:
+    """Busca vetorial exata sobre matriz float32 mapeada em memória."""
+
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        dimension: Optional[int] = None,
+        initial_capacity: int = 1024,
+        block_rows: Optional[int] = None,
+        threads: Optional[int] = None,
+    ):
+        """
+        Inicializa o backend (os arquivos são abertos na primeira chamada).
+
+        Args:
+            index_path: Diretório dos arquivos (padrão: ``EXACT_INDEX_PATH``)
+            dimension: Dimensão dos vetores armazenados
+            initial_capacity: Linhas alocadas ao criar a matriz
+            block_rows: Linhas por bloco de busca
+            threads: Threads usadas na busca
+        """
+        self.index_path = index_path or settings.exact_index_path
+        self.dimension = dimension or settings.vector_storage_dimension
+        self.initial_capacity = initial_capacity
+        self.block_rows = block_rows or settings.exact_search_block_rows
+        self.threads = threads or settings.exact_search_threads
+
+        self._vectors: Optional[np.ndarray] = None
+        self._ids: Optional[np.ndarray] = None
+        self._count = 0
+        self._rows: Dict[int, int] = {}
+        self._records: Optional[ChunkRecordStore] = None
+        self._quantized: Dict[str, QuantizedCodes] = {}
+        self._next_id = 1
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="exact-search"
+        )
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_path, name)
+
+    def _open(self) -> None:
+        """Abre (ou cria) matriz, IDs e registros (idempotente)."""
+        if self._vectors is not None:
+            return
+
+        with self._lock:
+            if self._vectors is not None:
+                return
+
+            os.makedirs(self.index_path, exist_ok=True)
+            if os.path.exists(self._path(_META_FILE)):
+                with open(self._path(_META_FILE)) as f:
+                    meta = json.load(f)
+                if meta["dimension"] != self.dimension:
+                    raise ValueError(
+                        f"Índice exato em {self.index_path} tem dimensão {meta['dimension']}"
+                    )
+                vectors = open_memmap(self._path(_VECTORS_FILE), mode="r+")
+                ids = open_memmap(self._path(_IDS_FILE), mode="r+")
+                self._count = meta["count"]
+                self._next_id = meta["next_id"]
+            else:
+                vectors, ids = self._allocate(self.initial_capacity, "")
+                self._count = 0
+
+            snapshot = current_snapshot_dir(self.index_path)
+            records = ChunkRecordStore.load(snapshot) if snapshot else ChunkRecordStore()
+
+            # Alterações posteriores ao último snapshot: vetores sem registro são
+            # descartados e registros sem vetor, removidos
+            live = ids[: self._count]
+            record_ids = records.live_ids()
+            orphan = (live != _EMPTY_ID) & ~np.isin(live, record_ids)
+            if orphan.any():
+                logger.warning(f"Descartando {int(orphan.sum())} vetores sem registro")
+                live[orphan] = _EMPTY_ID
+            for chunk_id in record_ids[~np.isin(record_ids, live)]:
+                records.delete(int(chunk_id))
+
+            self._rows = {int(i): row for row, i in enumerate(live) if i != _EMPTY_ID}
+            self._records = records
+            self._ids = ids
+            self._vectors = vectors
+            logger.info(f"Índice exato aberto: {len(self._rows)} vetores em {self.index_path}")
+
+    def _allocate(self, capacity: int, suffix: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Cria arquivos de vetores e IDs com ``capacity`` linhas."""
+        vectors = open_memmap(
+            self._path(_VECTORS_FILE + suffix),
+            mode="w+",
+            dtype=np.float32,
+            shape=(capacity, self.dimension),
+        )
+        ids = open_memmap(
+            self._path(_IDS_FILE + suffix), mode="w+", dtype=np.int64, shape=(capacity,)
+        )
+        ids[:] = _EMPTY_ID
+        return vectors, ids
+
+    def _grow(self, needed: int) -> None:
+        """Realoca a matriz com o dobro da capacidade, compactando remoções."""
+        capacity = max(len(self._ids) * 2, len(self._rows) + needed)
+        logger.info(f"Realocando índice exato para {capacity} linhas")
+
+        vectors, ids = self._allocate(capacity, ".tmp")
+        live_rows = np.flatnonzero(self._ids[: self._count] != _EMPTY_ID)
+        vectors[: len(live_rows)] = self._vectors[live_rows]
+        ids[: len(live_rows)] = self._ids[live_rows]
+        vectors.flush()
+        ids.flush()
+
+        os.replace(self._path(_VECTORS_FILE + ".tmp"), self._path(_VECTORS_FILE))
+        os.replace(self._path(_IDS_FILE + ".tmp"), self._path(_IDS_FILE))
+        self._vectors, self._ids = vectors, ids
+        self._count = len(live_rows)
+        self._rows = {int(i): row for row, i in enumerate(ids[: self._count])}
+
+    def _add(self, document_id: int, rows: Sequence[tuple], embeddings: np.ndarray) -> List[int]:
+        """Anexa vetores normalizados e registros (executado fora do event loop)."""
+        self._open()
+        vectors = np.array(np.atleast_2d(embeddings), dtype=np.float32)
+        if len(rows) != len(vectors):
+            raise ValueError("Número de chunks diferente de embeddings")
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if self._count + len(rows) > len(self._ids):
+                self._grow(len(rows))
+
+            ids = np.arange(self._next_id, self._next_id + len(rows), dtype=np.int64)
+            start, end = self._count, self._count + len(rows)
+            self._vectors[start:end] = vectors
+            self._ids[start:end] = ids
+            self._count = end
+            self._next_id += len(rows)
+
+            for row, chunk_id, (chunk_index, content, metadata) in zip(
+                range(start, end), ids, rows
+            ):
+                self._rows[int(chunk_id)] = row
+                self._records.add(int(chunk_id), document_id, chunk_index, content, metadata)
+            for codes in self._quantized.values():
+                codes.add(ids, vectors)
+            self._dirty = True
+
+        return ids.tolist()
+
+    async def add_chunk(
+        self,
+        document_id: int,
+        chunk_index: int,
+        content: str,
+        embedding: np.ndarray,
+        metadata: Optional[dict] = None,
+    ) -> int:
+        """
+        Insere um chunk.
+
+        Returns:
+            ID do chunk inserido
+        """
+        ids = await asyncio.to_thread(
+            self._add, document_id, [(chunk_index, content, metadata)], embedding
+        )
+        return ids[0]
+
+    async def add_chunks_bulk(
+        self,
+        document_id: int,
+        chunks: Sequence[dict],
+        embeddings: np.ndarray,
+        start_index: int = 0,
+    ) -> int:
+        """
+        Insere todos os chunks de um documento em uma única operação.
+
+        Returns:
+            Número de chunks inseridos
+        """
+        rows = [
+            (chunk.get("chunk_index", start_index + i), chunk["content"], chunk.get("metadata"))
+            for i, chunk in enumerate(chunks)
+        ]
+        await asyncio.to_thread(self._add, document_id, rows, embeddings)
+        return len(rows)
+
+    @staticmethod
+    def _search_block(
+        vectors: np.ndarray, ids: np.ndarray, start: int, end: int, query: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k de um bloco de linhas: (linhas, scores)."""
+        scores = vectors[start:end] @ query
+        scores[ids[start:end] == _EMPTY_ID] = -np.inf
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top + start, scores[top]
+
+    def _quantized_codes(self, mode: str) -> QuantizedCodes:
+        """Cópia quantizada dos vetores vivos (criada no primeiro uso, sob o lock)."""
+        codes = self._quantized.get(mode)
+        if codes is None:
+            check_mode(mode)
+            codes = QuantizedCodes(mode, self.dimension, capacity=max(len(self._rows), 1))
+            live_rows = np.flatnonzero(self._ids[: self._count] != _EMPTY_ID)
+            for start in range(0, len(live_rows), self.block_rows):
+                rows = live_rows[start : start + self.block_rows]
+                codes.add(self._ids[rows], self._vectors[rows])
+            self._quantized[mode] = codes
+            logger.info(f"Cópia {mode} criada: {len(codes)} vetores, {codes.nbytes} bytes")
+        return codes
+
+    def _search_quantized(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        threshold: float,
+        mode: str,
+        oversample: int,
+        filters: Optional[SearchFilters],
+    ) -> List[dict]:
+        """Candidatos pela cópia quantizada, reavaliados com os vetores float32."""
+        with self._lock:
+            codes = self._quantized_codes(mode)
+            allowed = None
+            if filters is not None and not filters.is_empty():
+                allowed = self._records.filter_ids(filters)
+            candidates = codes.candidates(query, top_k * max(oversample, 1), allowed)
+            # Linhas em ordem crescente: leitura sequencial no mmap
+            rows = np.sort([self._rows[int(i)] for i in candidates]).astype(np.int64)
+            vectors, ids = self._vectors, self._ids
+        if len(rows) == 0:
+            return []
+
+        scores = vectors[rows] @ query
+        return self._materialize(ids, rows, scores, top_k, threshold)
+
+    def _search(
+        self,
+        embedding: np.ndarray,
+        top_k: int,
+        threshold: float,
+        filters: Optional[SearchFilters] = None,
+        quantization: Optional[str] = None,
+        oversample: Optional[int] = None,
+    ) -> List[dict]:
+        """Busca exata em blocos paralelos (executado fora do event loop)."""
+        self._open()
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        if quantization and top_k > 0:
+            return self._search_quantized(
+                query,
+                top_k,
+                threshold,
+                quantization,
+                oversample or settings.quantized_search_oversample,
+                filters,
+            )
+
+        # Referências capturadas sob lock; a busca em si roda sem bloquear escritas
+        with self._lock:
+            vectors, ids, count = self._vectors, self._ids, self._count
+            if filters is not None and not filters.is_empty():
+                allowed = self._records.filter_ids(filters)
+                candidate_rows = np.array(
+                    [self._rows[int(i)] for i in allowed if int(i) in self._rows], dtype=np.int64
+                )
+            else:
+                candidate_rows = None
+        if count == 0 or top_k <= 0:
+            return []
+
+        if candidate_rows is not None:
+            # Filtro resolvido antes: produto só sobre as linhas permitidas
+            if len(candidate_rows) == 0:
+                return []
+            scores = vectors[candidate_rows] @ query
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            return self._materialize(ids, candidate_rows[top], scores[top], top_k, threshold)
+
+        blocks = [
+            (start, min(start + self.block_rows, count))
+            for start in range(0, count, self.block_rows)
+        ]
+        if len(blocks) == 1:
+            partials = [self._search_block(vectors, ids, 0, count, query, top_k)]
+        else:
+            partials = list(
+                self._executor.map(
+                    lambda block: self._search_block(vectors, ids, *block, query, top_k),
+                    blocks,
+                )
+            )
+
+        rows = np.concatenate([p[0] for p in partials])
+        scores = np.concatenate([p[1] for p in partials])
+        return self._materialize(ids, rows, scores, top_k, threshold)
+
+    def _materialize(
+        self, ids: np.ndarray, rows: np.ndarray, scores: np.ndarray, top_k: int, threshold: float
+    ) -> List[dict]:
+        """Ordena candidatos e monta os registros acima do limiar."""
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        results = []
+        for row, score in zip(rows[order], scores[order]):
+            if not np.isfinite(score) or score < threshold:
+                break
+            record = self._records.get(int(ids[row]))
+            if record is not None:
+                record["similarity"] = float(score)
+                results.append(record)
+
+        return results
+
+    async def search_similar_vectors(
+        self,
+        embedding: np.ndarray,
+        top_k: int = 5,
+        threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
+        quantization: Optional[str] = None,
+        oversample: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Busca chunks mais similares ao embedding.
+
+        ``ef_search`` e ``iterative_scan`` são aceitos por compatibilidade com
+        os backends HNSW e ignorados (a busca é sempre exata). Com ``filters``,
+        apenas as linhas dos chunks permitidos entram no produto. Com
+        ``quantization`` (``binary`` ou ``int8``), ``top_k * oversample``
+        candidatos vêm da cópia quantizada e só eles são lidos em float32.
+
+        Returns:
+            Lista de chunks com ``similarity``
+        """
+        return await asyncio.to_thread(
+            self._search, embedding, top_k, threshold, filters, quantization, oversample
+        )
+
+    def _delete_ids(self, ids: Sequence[int]) -> None:
+        """Libera linhas e registros de chunks (as linhas são reaproveitadas ao realocar)."""
+        for codes in self._quantized.values():
+            codes.remove(ids)
+        for chunk_id in ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is not None:
+                self._ids[row] = _EMPTY_ID
+            if self._records.delete(chunk_id):
+                self._dirty = True
+
+    def _delete(self, document_id: int) -> int:
+        """Remove chunks de um documento."""
+        self._open()
+        with self._lock:
+            ids = self._records.ids_for_document(document_id)
+            self._delete_ids(ids)
+        return len(ids)
+
+    def _document_chunks(self, document_id: int, min_index: int) -> List[dict]:
+        """Chunks de um documento a partir de ``min_index``."""
+        self._open()
+        with self._lock:
+            return self._records.document_records(document_id, min_index)
+
+    async def get_document_chunks(self, document_id: int, min_index: int = 0) -> List[dict]:
+        """
+        Lista os chunks de um documento (a partir de ``min_index``), em ordem.
+
+        Returns:
+            Lista de ``id``, ``document_id``, ``chunk_index``, ``content`` e ``metadata``
+        """
+        return await asyncio.to_thread(self._document_chunks, document_id, min_index)
+
+    def _chunks_after(self, after_id: int, limit: int) -> List[dict]:
+        """Página de chunks em ordem de ID."""
+        self._open()
+        with self._lock:
+            return self._records.records_after(after_id, limit)
+
+    async def get_chunks_after(self, after_id: int, limit: int) -> List[dict]:
+        """
+        Lista até ``limit`` chunks com ID maior que ``after_id``, em ordem de ID.
+
+        Returns:
+            Lista de ``id``, ``document_id``, ``chunk_index``, ``content`` e ``metadata``
+        """
+        return await asyncio.to_thread(self._chunks_after, after_id, limit)
+
+    def _chunk_hashes(self, document_id: int) -> List[dict]:
+        """Hashes dos chunks de um documento."""
+        self._open()
+        with self._lock:
+            return self._records.chunk_hashes(document_id)
+
+    async def get_chunk_hashes(self, document_id: int) -> List[dict]:
+        """
+        Lista os chunks de um documento com o hash do conteúdo.
+
+        Returns:
+            Lista de ``id``, ``chunk_index``, ``content_hash`` e ``metadata``
+        """
+        return await asyncio.to_thread(self._chunk_hashes, document_id)
+
+    def _apply_changes(
+        self,
+        document_id: int,
+        delete_ids: Sequence[int],
+        updates: Sequence[tuple],
+        new_chunks: Sequence[dict],
+        embeddings: np.ndarray,
+    ) -> None:
+        """Aplica a diferença de chunks sob o lock (executado fora do event loop)."""
+        self._open()
+        with self._lock:
+            self._delete_ids(delete_ids)
+            for chunk_id, chunk_index, metadata in updates:
+                self._records.update(chunk_id, chunk_index, metadata)
+                self._dirty = True
+            if new_chunks:
+                rows = [(c["chunk_index"], c["content"], c.get("metadata")) for c in new_chunks]
+                self._add(document_id, rows, embeddings)
+
+    async def apply_chunk_changes(
+        self,
+        document_id: int,
+        delete_ids: Sequence[int],
+        updates: Sequence[tuple],
+        new_chunks: Sequence[dict],
+        embeddings: np.ndarray,
+    ) -> None:
+        """
+        Aplica a diferença de chunks de um documento.
+
+        Args:
+            document_id: ID do documento
+            delete_ids: IDs dos chunks removidos
+            updates: ``(id, chunk_index, metadata)`` de chunks reaproveitados
+            new_chunks: Chunks novos (com ``chunk_index``)
+            embeddings: Embeddings dos chunks novos
+        """
+        await asyncio.to_thread(
+            self._apply_changes, document_id, delete_ids, updates, new_chunks, embeddings
+        )
+
+    async def delete_chunks(self, document_id: int) -> int:
+        """
+        Remove chunks de um documento.
+
+        Returns:
+            Número de chunks removidos
+        """
+        return await asyncio.to_thread(self._delete, document_id)
+
+    def _stats(self) -> dict:
+        """Estatísticas do índice (contadores mantidos a cada escrita, O(1))."""
+        self._open()
+        with self._lock:
+            total_chunks = len(self._records)
+            return {
+                "backend": "exact",
+                "total_chunks": total_chunks,
+                "total_documents": self._records.document_count(),
+                "content_bytes": self._records.content_bytes,
+                "vector_bytes": total_chunks * self.dimension * 4,
+                "capacity": len(self._ids),
+                "deleted_rows": self._count - len(self._rows),
+                "matrix_bytes": self._vectors.nbytes,
+                "quantized_bytes": {mode: c.nbytes for mode, c in self._quantized.items()},
+            }
+
+    async def get_vector_stats(self) -> dict:
+        """Retorna estatísticas dos vetores armazenados."""
+        return await asyncio.to_thread(self._stats)
+
+    def _document_stats(self, document_id: int) -> dict:
+        """Contador de chunks de um documento."""
+        self._open()
+        with self._lock:
+            chunk_count = self._records.chunk_count(document_id)
+        return {"document_id": document_id, "chunk_count": chunk_count}
+
+    async def get_document_stats(self, document_id: int) -> dict:
+        """Retorna o número de chunks de um documento (contador)."""
+        return await asyncio.to_thread(self._document_stats, document_id)
+
+    def _reconcile_stats(self) -> dict:
+        """Recalcula os contadores sob o lock."""
+        self._open()
+        with self._lock:
+            return self._records.reconcile_counters()
+
+    async def reconcile_stats(self) -> dict:
+        """
+        Recalcula os contadores a partir dos registros (job periódico).
+
+        Returns:
+            Diferença corrigida
+        """
+        return await asyncio.to_thread(self._reconcile_stats)
+
+    def _snapshot(self) -> str:
+        """Sincroniza matriz e IDs e grava snapshot dos registros."""
+        self._open()
+        with self._lock:
+            self._vectors.flush()
+            self._ids.flush()
+
+            snapshot = new_snapshot_dir(self.index_path)
+            self._records.save(snapshot)
+            publish_snapshot(self.index_path, snapshot)
+
+            meta_tmp = self._path(_META_FILE + ".tmp")
+            with open(meta_tmp, "w") as f:
+                json.dump(
+                    {"dimension": self.dimension, "count": self._count, "next_id": self._next_id},
+                    f,
+                )
+            os.replace(meta_tmp, self._path(_META_FILE))
+
+            self._records = ChunkRecordStore.load(snapshot)
+            self._dirty = False
+
+        return snapshot
+
+    async def snapshot(self) -> str:
+        """
+        Persiste o estado atual em disco.
+
+        Returns:
+            Diretório do snapshot dos registros
+        """
+        try:
+            return await asyncio.to_thread(self._snapshot)
+        except Exception as e:
+            logger.error(f"Erro ao gravar snapshot do índice exato: {e}")
+            raise
+
+    async def close(self) -> None:
+        """Grava snapshot se houver alterações pendentes e encerra as threads."""
+        if self._vectors is not None and self._dirty:
+            await self.snapshot()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,551 @@
+"""
+Backend vetorial em processo baseado em HNSW (hnswlib), sem PostgreSQL.
+
+Implementa o mesmo protocolo de banco do ``PgVectorDatabase`` usado pelo
+``VectorStore`` (``add_chunk``, ``add_chunks_bulk``, ``search_similar_vectors``,
+``delete_chunks``, ``get_vector_stats``), para edge e ambientes de teste.
+
+- inserção e remoção incrementais (remoções marcam o nó como apagado e o slot
+  é reaproveitado por inserções seguintes);
+- snapshots versionados em disco: o grafo é salvo pelo hnswlib e carregado por
+  inteiro na memória na reinicialização; só os registros dos chunks ficam em
+  arrays/blobs abertos com ``mmap``;
+- busca em dois estágios opcional (``quantization``): varredura de uma cópia
+  quantizada em memória e reavaliação dos candidatos com os vetores do grafo.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.db.chunk_records import (
+    ChunkRecordStore,
+    current_snapshot_dir,
+    new_snapshot_dir,
+    publish_snapshot,
+)
+from app.db.quantization import QuantizedCodes, check_mode
+from app.db.search_filters import SearchFilters
+
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = "index.hnsw"
+_RECORDS_DIR = "records"
+_META_FILE = "meta.json"
+# Abaixo disso, buscas filtradas calculam distâncias direto (sem o grafo)
+_BRUTE_FORCE_MAX_IDS = 2048
+
+
+class HNSWVectorDatabase:
+    """Armazena vetores de chunks em um grafo HNSW no próprio processo."""
+
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        dimension: Optional[int] = None,
+        max_elements: Optional[int] = None,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ):
+        """
+        Inicializa o backend (o índice é aberto na primeira chamada).
+
+        Args:
+            index_path: Diretório de snapshots (padrão: ``HNSW_INDEX_PATH``)
+            dimension: Dimensão dos vetores armazenados
+            max_elements: Capacidade inicial do grafo (cresce sob demanda)
+            m: Vizinhos por nó do HNSW
+            ef_construction: Largura da busca na construção
+            ef_search: Largura da busca na consulta
+        """
+        self.index_path = index_path or settings.hnsw_index_path
+        self.dimension = dimension or settings.vector_storage_dimension
+        self.max_elements = max_elements or settings.hnsw_max_elements
+        self.m = m or settings.hnsw_m
+        self.ef_construction = ef_construction or settings.hnsw_ef_construction
+        self.ef_search = ef_search or settings.hnsw_ef_search
+
+        # Com vetores normalizados, "ip" evita normalizar de novo a cada busca;
+        # nos dois espaços a distância é 1 - similaridade
+        self.space = "ip" if settings.normalize_embeddings else "cosine"
+
+        self._index = None
+        self._records: Optional[ChunkRecordStore] = None
+        self._quantized: Dict[str, QuantizedCodes] = {}
+        self._next_id = 1
+        self._deleted = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def _open(self) -> None:
+        """Carrega o snapshot ativo ou cria índice vazio (idempotente)."""
+        if self._index is not None:
+            return
+
+        import hnswlib
+
+        with self._lock:
+            if self._index is not None:
+                return
+
+            index = hnswlib.Index(space=self.space, dim=self.dimension)
+            snapshot = current_snapshot_dir(self.index_path)
+
+            if snapshot is None:
+                index.init_index(
+                    max_elements=self.max_elements,
+                    ef_construction=self.ef_construction,
+                    M=self.m,
+                    allow_replace_deleted=True,
+                )
+                records = ChunkRecordStore()
+                logger.info(f"Índice HNSW criado (dim={self.dimension}, M={self.m})")
+            else:
+                with open(os.path.join(snapshot, _META_FILE)) as f:
+                    meta = json.load(f)
+                if meta["dimension"] != self.dimension or meta["space"] != self.space:
+                    raise ValueError(
+                        f"Snapshot incompatível em {snapshot}: "
+                        f"dim={meta['dimension']} space={meta['space']}"
+                    )
+
+                index.load_index(
+                    os.path.join(snapshot, _INDEX_FILE),
+                    max_elements=max(meta["max_elements"], self.max_elements),
+                    allow_replace_deleted=True,
+                )
+                records = ChunkRecordStore.load(os.path.join(snapshot, _RECORDS_DIR))
+                self._next_id = meta["next_id"]
+                self._deleted = meta["deleted"]
+                logger.info(f"Snapshot HNSW carregado: {snapshot} ({len(records)} chunks)")
+
+            index.set_ef(self.ef_search)
+            self._records = records
+            self._index = index
+
+    def _ensure_capacity(self, count: int) -> None:
+        """Aumenta o grafo se não houver slots livres para ``count`` vetores."""
+        index = self._index
+        free = index.get_max_elements() - index.get_current_count() + self._deleted
+        if count > free:
+            new_size = max(index.get_max_elements() * 2, index.get_current_count() + count)
+            logger.info(f"Redimensionando índice HNSW para {new_size} elementos")
+            index.resize_index(new_size)
+
+    def _add(self, document_id: int, rows: Sequence[tuple], embeddings: np.ndarray) -> List[int]:
+        """Insere vetores e registros (executado fora do event loop)."""
+        self._open()
+        vectors = np.ascontiguousarray(np.atleast_2d(embeddings), dtype=np.float32)
+        if len(rows) != len(vectors):
+            raise ValueError("Número de chunks diferente de embeddings")
+
+        with self._lock:
+            self._ensure_capacity(len(rows))
+            ids = np.arange(self._next_id, self._next_id + len(rows), dtype=np.int64)
+            self._next_id += len(rows)
+
+            replaced = min(self._deleted, len(rows))
+            self._index.add_items(vectors, ids, replace_deleted=replaced > 0)
+            self._deleted -= replaced
+
+            for chunk_id, (chunk_index, content, metadata) in zip(ids, rows):
+                self._records.add(int(chunk_id), document_id, chunk_index, content, metadata)
+            for codes in self._quantized.values():
+                codes.add(ids, self._normalized(vectors))
+            self._dirty = True
+
+        return ids.tolist()
+
+    async def add_chunk(
+        self,
+        document_id: int,
+        chunk_index: int,
+        content: str,
+        embedding: np.ndarray,
+        metadata: Optional[dict] = None,
+    ) -> int:
+        """
+        Insere um chunk.
+
+        Returns:
+            ID do chunk inserido
+        """
+        ids = await asyncio.to_thread(
+            self._add, document_id, [(chunk_index, content, metadata)], embedding
+        )
+        return ids[0]
+
+    async def add_chunks_bulk(
+        self,
+        document_id: int,
+        chunks: Sequence[dict],
+        embeddings: np.ndarray,
+        start_index: int = 0,
+    ) -> int:
+        """
+        Insere todos os chunks de um documento em uma única operação.
+
+        Returns:
+            Número de chunks inseridos
+        """
+        rows = [
+            (chunk.get("chunk_index", start_index + i), chunk["content"], chunk.get("metadata"))
+            for i, chunk in enumerate(chunks)
+        ]
+        await asyncio.to_thread(self._add, document_id, rows, embeddings)
+        return len(rows)
+
+    def _knn(self, query: np.ndarray, k: int, ef_search: Optional[int], allowed=None):
+        """``knn_query`` com ef por query e filtro opcional de labels."""
+        filter_fn = None if allowed is None else allowed.__contains__
+        if ef_search is None:
+            return self._index.knn_query(query, k=k, filter=filter_fn)
+
+        # ef é global no hnswlib: ajustado e restaurado sob o lock
+        self._index.set_ef(max(ef_search, k))
+        try:
+            return self._index.knn_query(query, k=k, filter=filter_fn)
+        finally:
+            self._index.set_ef(self.ef_search)
+
+    @staticmethod
+    def _normalized(vectors: np.ndarray) -> np.ndarray:
+        """Vetores com norma 1 (a cópia int8 aproxima o cosseno)."""
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def _quantized_codes(self, mode: str) -> QuantizedCodes:
+        """Cópia quantizada dos vetores do grafo (criada no primeiro uso, sob o lock)."""
+        codes = self._quantized.get(mode)
+        if codes is None:
+            check_mode(mode)
+            live_ids = self._records.live_ids()
+            codes = QuantizedCodes(mode, self.dimension, capacity=max(len(live_ids), 1))
+            for start in range(0, len(live_ids), 65536):
+                batch = live_ids[start : start + 65536]
+                vectors = np.asarray(self._index.get_items(batch), dtype=np.float32)
+                codes.add(batch, self._normalized(vectors))
+            self._quantized[mode] = codes
+            logger.info(f"Cópia {mode} criada: {len(codes)} vetores, {codes.nbytes} bytes")
+        return codes
+
+    def _brute_force(self, query: np.ndarray, allowed: np.ndarray, k: int):
+        """Busca exata sobre poucos labels (mesmas distâncias do grafo)."""
+        vectors = np.asarray(self._index.get_items(allowed), dtype=np.float32)
+        if self.space == "cosine":
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+        distances = 1.0 - vectors @ query[0]
+        top = np.argsort(distances, kind="stable")[:k]
+        return allowed[top][None, :], distances[top][None, :]
+
+    def _search(
+        self,
+        embedding: np.ndarray,
+        top_k: int,
+        threshold: float,
+        ef_search: Optional[int],
+        filters: Optional[SearchFilters] = None,
+        quantization: Optional[str] = None,
+        oversample: Optional[int] = None,
+    ) -> List[dict]:
+        """Busca k-NN no grafo (executado fora do event loop)."""
+        self._open()
+        query = np.ascontiguousarray(np.atleast_2d(embedding), dtype=np.float32)
+
+        with self._lock:
+            if quantization:
+                # Dois estágios: sem o grafo, candidatos da cópia quantizada
+                allowed = None
+                if filters is not None and not filters.is_empty():
+                    allowed = self._records.filter_ids(filters)
+                oversample = oversample or settings.quantized_search_oversample
+                candidates = self._quantized_codes(quantization).candidates(
+                    query[0], top_k * max(oversample, 1), allowed
+                )
+                k = min(top_k, len(candidates))
+                if k == 0:
+                    return []
+                labels, distances = self._brute_force(query, candidates, k)
+            elif filters is None or filters.is_empty():
+                # knn_query falha se k exceder os elementos vivos
+                k = min(top_k, len(self._records))
+                if k == 0:
+                    return []
+                labels, distances = self._knn(query, k, ef_search)
+            else:
+                allowed = self._records.filter_ids(filters)
+                k = min(top_k, len(allowed))
+                if k == 0:
+                    return []
+                if len(allowed) <= _BRUTE_FORCE_MAX_IDS:
+                    # Filtro seletivo: mais barato (e exato) calcular direto
+                    labels, distances = self._brute_force(query, allowed, k)
+                else:
+                    try:
+                        labels, distances = self._knn(query, k, ef_search, set(allowed.tolist()))
+                    except RuntimeError:
+                        # Grafo filtrado não alcançou k vizinhos
+                        labels, distances = self._brute_force(query, allowed, k)
+
+            results = []
+            for label, distance in zip(labels[0], distances[0]):
+                similarity = 1.0 - float(distance)
+                if similarity < threshold:
+                    continue
+                record = self._records.get(int(label))
+                if record is not None:
+                    record["similarity"] = similarity
+                    results.append(record)
+
+        return results
+
+    async def search_similar_vectors(
+        self,
+        embedding: np.ndarray,
+        top_k: int = 5,
+        threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
+        quantization: Optional[str] = None,
+        oversample: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Busca chunks mais similares ao embedding.
+
+        Args:
+            embedding: Embedding da query
+            top_k: Número de resultados
+            threshold: Limiar de similaridade
+            ef_search: Largura da busca nesta query (padrão: ``HNSW_EF_SEARCH``)
+            iterative_scan: Ignorado (específico do PgVector)
+            filters: Filtros aplicados durante a busca no grafo
+            quantization: ``binary`` ou ``int8``: busca em dois estágios sobre a
+                cópia quantizada em vez do grafo
+            oversample: Candidatos por resultado no primeiro estágio (padrão:
+                ``QUANTIZED_SEARCH_OVERSAMPLE``)
+
+        Returns:
+            Lista de chunks com ``similarity``
+        """
+        return await asyncio.to_thread(
+            self._search,
+            embedding,
+            top_k,
+            threshold,
+            ef_search,
+            filters,
+            quantization,
+            oversample,
+        )
+
+    def _delete_ids(self, ids: Sequence[int]) -> None:
+        """Marca chunks como apagados no grafo e remove os registros."""
+        for codes in self._quantized.values():
+            codes.remove(ids)
+        for chunk_id in ids:
+            if self._records.delete(chunk_id):
+                self._index.mark_deleted(chunk_id)
+                self._deleted += 1
+                self._dirty = True
+
+    def _delete(self, document_id: int) -> int:
+        """Marca chunks de um documento como apagados."""
+        self._open()
+        with self._lock:
+            ids = self._records.ids_for_document(document_id)
+            self._delete_ids(ids)
+        return len(ids)
+
+    def _document_chunks(self, document_id: int, min_index: int) -> List[dict]:
+        """Chunks de um documento a partir de ``min_index``."""
+        self._open()
+        with self._lock:
+            return self._records.document_records(document_id, min_index)
+
+    async def get_document_chunks(self, document_id: int, min_index: int = 0) -> List[dict]:
+        """
+        Lista os chunks de um documento (a partir de ``min_index``), em ordem.
+
+        Returns:
+            Lista de ``id``, ``document_id``, ``chunk_index``, ``content`` e ``metadata``
+        """
+        return await asyncio.to_thread(self._document_chunks, document_id, min_index)
+
+    def _chunks_after(self, after_id: int, limit: int) -> List[dict]:
+        """Página de chunks em ordem de ID."""
+        self._open()
+        with self._lock:
+            return self._records.records_after(after_id, limit)
+
+    async def get_chunks_after(self, after_id: int, limit: int) -> List[dict]:
+        """
+        Lista até ``limit`` chunks com ID maior que ``after_id``, em ordem de ID.
+
+        Returns:
+            Lista de ``id``, ``document_id``, ``chunk_index``, ``content`` e ``metadata``
+        """
+        return await asyncio.to_thread(self._chunks_after, after_id, limit)
+
+    def _chunk_hashes(self, document_id: int) -> List[dict]:
+        """Hashes dos chunks de um documento."""
+        self._open()
+        with self._lock:
+            return self._records.chunk_hashes(document_id)
+
+    async def get_chunk_hashes(self, document_id: int) -> List[dict]:
+        """
+        Lista os chunks de um documento com o hash do conteúdo.
+
+        Returns:
+            Lista de ``id``, ``chunk_index``, ``content_hash`` e ``metadata``
+        """
+        return await asyncio.to_thread(self._chunk_hashes, document_id)
+
+    def _apply_changes(
+        self,
+        document_id: int,
+        delete_ids: Sequence[int],
+        updates: Sequence[tuple],
+        new_chunks: Sequence[dict],
+        embeddings: np.ndarray,
+    ) -> None:
+        """Aplica a diferença de chunks sob o lock (executado fora do event loop)."""
+        self._open()
+        with self._lock:
+            self._delete_ids(delete_ids)
+            for chunk_id, chunk_index, metadata in updates:
+                self._records.update(chunk_id, chunk_index, metadata)
+                self._dirty = True
+            if new_chunks:
+                rows = [(c["chunk_index"], c["content"], c.get("metadata")) for c in new_chunks]
+                self._add(document_id, rows, embeddings)
+
+    async def apply_chunk_changes(
+        self,
+        document_id: int,
+        delete_ids: Sequence[int],
+        updates: Sequence[tuple],
+        new_chunks: Sequence[dict],
+        embeddings: np.ndarray,
+    ) -> None:
+        """
+        Aplica a diferença de chunks de um documento.
+
+        Args:
+            document_id: ID do documento
+            delete_ids: IDs dos chunks removidos
+            updates: ``(id, chunk_index, metadata)`` de chunks reaproveitados
+            new_chunks: Chunks novos (com ``chunk_index``)
+            embeddings: Embeddings dos chunks novos
+        """
+        await asyncio.to_thread(
+            self._apply_changes, document_id, delete_ids, updates, new_chunks, embeddings
+        )
+
+    async def delete_chunks(self, document_id: int) -> int:
+        """
+        Remove chunks de um documento.
+
+        Returns:
+            Número de chunks removidos
+        """
+        return await asyncio.to_thread(self._delete, document_id)
+
+    def _stats(self) -> dict:
+        """Estatísticas do índice (contadores mantidos a cada escrita, O(1))."""
+        self._open()
+        with self._lock:
+            total_chunks = len(self._records)
+            return {
+                "backend": "hnsw",
+                "total_chunks": total_chunks,
+                "total_documents": self._records.document_count(),
+                "content_bytes": self._records.content_bytes,
+                "vector_bytes": total_chunks * self.dimension * 4,
+                "deleted_slots": self._deleted,
+                "capacity": self._index.get_max_elements(),
+                "m": self.m,
+                "ef_search": self.ef_search,
+                "quantized_bytes": {mode: c.nbytes for mode, c in self._quantized.items()},
+            }
+
+    async def get_vector_stats(self) -> dict:
+        """Retorna estatísticas dos vetores armazenados."""
+        return await asyncio.to_thread(self._stats)
+
+    def _document_stats(self, document_id: int) -> dict:
+        """Contador de chunks de um documento."""
+        self._open()
+        with self._lock:
+            chunk_count = self._records.chunk_count(document_id)
+        return {"document_id": document_id, "chunk_count": chunk_count}
+
+    async def get_document_stats(self, document_id: int) -> dict:
+        """Retorna o número de chunks de um documento (contador)."""
+        return await asyncio.to_thread(self._document_stats, document_id)
+
+    def _reconcile_stats(self) -> dict:
+        """Recalcula os contadores sob o lock."""
+        self._open()
+        with self._lock:
+            return self._records.reconcile_counters()
+
+    async def reconcile_stats(self) -> dict:
+        """
+        Recalcula os contadores a partir dos registros (job periódico).
+
+        Returns:
+            Diferença corrigida
+        """
+        return await asyncio.to_thread(self._reconcile_stats)
+
+    def _snapshot(self) -> Optional[str]:
+        """Grava snapshot versionado e o torna ativo."""
+        self._open()
+        with self._lock:
+            snapshot = new_snapshot_dir(self.index_path)
+            self._index.save_index(os.path.join(snapshot, _INDEX_FILE))
+            self._records.save(os.path.join(snapshot, _RECORDS_DIR))
+            with open(os.path.join(snapshot, _META_FILE), "w") as f:
+                json.dump(
+                    {
+                        "dimension": self.dimension,
+                        "space": self.space,
+                        "max_elements": self._index.get_max_elements(),
+                        "next_id": self._next_id,
+                        "deleted": self._deleted,
+                    },
+                    f,
+                )
+            publish_snapshot(self.index_path, snapshot)
+
+            # Registros passam a ser lidos do snapshot (mmap), liberando o overlay
+            self._records = ChunkRecordStore.load(os.path.join(snapshot, _RECORDS_DIR))
+            self._dirty = False
+
+        return snapshot
+
+    async def snapshot(self) -> Optional[str]:
+        """
+        Persiste o estado atual em disco.
+
+        Returns:
+            Diretório do snapshot gravado
+        """
+        try:
+            return await asyncio.to_thread(self._snapshot)
+        except Exception as e:
+            logger.error(f"Erro ao gravar snapshot HNSW: {e}")
+            raise
+
+    async def close(self) -> None:
+        """Grava snapshot se houver alterações pendentes."""
+        if self._index is not None and self._dirty:
+            await self.snapshot()
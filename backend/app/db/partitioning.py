@@ -0,0 +1,370 @@
+"""
+Particionamento por hash da tabela ``document_chunks``.
+
+Com ``CHUNK_PARTITIONS`` > 0, ``document_chunks`` é uma tabela
+``PARTITION BY HASH`` (por ``document_id`` ou, com
+``CHUNK_PARTITION_KEY=user_id``, por usuário) com um índice HNSW em cada
+partição. Índices menores são construídos em paralelo (uma conexão por
+partição) e a busca vetorial consulta as partições em paralelo, juntando os
+top-k (``PgVectorDatabase.search_similar_vectors``).
+
+Migração da tabela existente (janela de manutenção; escritas em
+``document_chunks`` ficam bloqueadas durante a cópia, leituras não):
+
+    python -m app.db.partitioning migrate --partitions 8 --key document_id
+
+A tabela original é mantida como ``document_chunks_unpartitioned`` (removida
+com ``--drop-old``).
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import asyncpg
+
+from app.config import settings
+from app.db.pgvector_codec import vector_ops_sql
+from app.db.stats_counters import chunk_stats_triggers_sql
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEYS = ("document_id", "user_id")
+
+UNPARTITIONED_TABLE = "document_chunks_unpartitioned"
+
+_COPY_COLUMNS = (
+    "id",
+    "document_id",
+    "chunk_index",
+    "content",
+    "embedding",
+    "metadata",
+    "content_hash",
+    "created_at",
+)
+
+
+def partition_name(table: str, index: int) -> str:
+    """Nome da partição ``index`` de ``table``."""
+    return f"{table}_p{index}"
+
+
+def partition_names(table: str, partitions: int) -> List[str]:
+    """Nomes de todas as partições de ``table``."""
+    return [partition_name(table, i) for i in range(partitions)]
+
+
+def _check_layout(partitions: int, key: str) -> None:
+    if partitions < 2:
+        raise ValueError("O particionamento exige ao menos 2 partições")
+    if key not in PARTITION_KEYS:
+        raise ValueError(f"Chave de partição desconhecida: {key}")
+
+
+def partitioned_table_sql(
+    table: str, partitions: int, key: str, embedding_type: str
+) -> List[str]:
+    """
+    DDL da tabela particionada e de suas partições.
+
+    A chave primária inclui a chave de partição (exigência do PostgreSQL); a
+    unicidade de ``id`` continua garantida pela sequência.
+
+    Args:
+        table: Nome da tabela particionada
+        partitions: Número de partições (``MODULUS``)
+        key: ``document_id`` ou ``user_id``
+        embedding_type: Tipo da coluna (ex.: ``vector(384)``)
+
+    Returns:
+        Lista de comandos SQL
+    """
+    _check_layout(partitions, key)
+    user_column = (
+        "user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,"
+        if key == "user_id"
+        else ""
+    )
+    statements = [
+        f"""
+        CREATE TABLE {table} (
+            id SERIAL,
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            {user_column}
+            chunk_index INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            embedding {embedding_type},
+            metadata JSONB,
+            content_hash CHAR(64),
+            content_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('portuguese', content)) STORED,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, {key})
+        ) PARTITION BY HASH ({key})
+        """
+    ]
+    statements.extend(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+        for i, name in enumerate(partition_names(table, partitions))
+    )
+    return statements
+
+
+def secondary_indexes_sql(table: str) -> List[str]:
+    """Índices não vetoriais, criados na tabela pai (propagados às partições)."""
+    return [
+        f"CREATE INDEX IF NOT EXISTS {table}_document_id_idx ON {table} (document_id)",
+        f"CREATE INDEX IF NOT EXISTS {table}_metadata_idx "
+        f"ON {table} USING gin (metadata jsonb_path_ops)",
+        f"CREATE INDEX IF NOT EXISTS {table}_content_tsv_idx ON {table} USING gin (content_tsv)",
+    ]
+
+
+def partition_hnsw_index_sql(
+    partition: str, m: int, ef_construction: int, concurrently: bool = False, suffix: str = ""
+) -> str:
+    """``CREATE INDEX`` do HNSW de uma partição (``<partição>_embedding_hnsw``)."""
+    ops = vector_ops_sql(settings.vector_storage_precision, settings.normalize_embeddings)
+    return f"""
+        CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{partition}_embedding_hnsw{suffix}
+        ON {partition} USING hnsw (embedding {ops})
+        WITH (m = {m}, ef_construction = {ef_construction})
+    """
+
+
+async def build_partition_indexes(
+    pool: asyncpg.Pool,
+    table: str,
+    partitions: int,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    concurrently: bool = False,
+    suffix: str = "",
+) -> float:
+    """
+    Constrói os índices HNSW das partições em paralelo.
+
+    Cada partição usa uma conexão do pool; o paralelismo efetivo é limitado
+    pelo tamanho do pool e pelos workers do servidor.
+
+    Args:
+        pool: Pool asyncpg
+        table: Tabela particionada
+        partitions: Número de partições
+        m: Vizinhos por nó (padrão: ``HNSW_M``)
+        ef_construction: Largura da busca na construção (padrão: ``HNSW_EF_CONSTRUCTION``)
+        concurrently: Usar ``CREATE INDEX CONCURRENTLY`` (sem bloquear escritas)
+        suffix: Sufixo do nome dos índices (reconstrução sob outro nome)
+
+    Returns:
+        Segundos gastos
+    """
+    m = int(m or settings.hnsw_m)
+    ef_construction = int(ef_construction or settings.hnsw_ef_construction)
+
+    async def build(partition: str) -> None:
+        async with pool.acquire() as conn:
+            await conn.execute(
+                partition_hnsw_index_sql(partition, m, ef_construction, concurrently, suffix),
+                timeout=None,
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(build(name) for name in partition_names(table, partitions)))
+    return time.perf_counter() - start
+
+
+async def _copy_partition(
+    pool: asyncpg.Pool, source: str, target: str, partitions: int, index: int, key: str
+) -> int:
+    """Copia para uma partição as linhas de ``source`` cujo hash cai nela."""
+    columns = ", ".join(_COPY_COLUMNS)
+    select = ", ".join(f"c.{column}" for column in _COPY_COLUMNS)
+    if key == "user_id":
+        columns += ", user_id"
+        select += ", d.user_id"
+        source_sql = f"{source} c JOIN documents d ON d.id = c.document_id"
+        key_sql = "d.user_id"
+    else:
+        source_sql = f"{source} c"
+        key_sql = "c.document_id"
+
+    async with pool.acquire() as conn:
+        status = await conn.execute(
+            f"""
+            INSERT INTO {partition_name(target, index)} ({columns})
+            SELECT {select}
+            FROM {source_sql}
+            WHERE satisfies_hash_partition('{target}'::regclass, {partitions}, {index}, {key_sql})
+            """,
+            timeout=None,
+        )
+    return int(status.split()[-1])
+
+
+async def migrate_to_partitioned(
+    dsn: str,
+    partitions: int,
+    key: str = "document_id",
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    drop_old: bool = False,
+) -> None:
+    """
+    Converte ``document_chunks`` em tabela particionada por hash.
+
+    Etapas: cria ``document_chunks_new`` particionada; copia as linhas em
+    paralelo (uma conexão por partição); constrói os índices HNSW das partições
+    em paralelo; ajusta a sequência de IDs; move os triggers de estatísticas e troca os
+    nomes em uma transação.
+    ``document_chunks`` fica com ``LOCK ... IN EXCLUSIVE MODE`` do início ao
+    fim: buscas continuam atendidas, escritas aguardam a troca. Em caso de
+    falha (ou sobras de uma execução interrompida), ``document_chunks_new`` e
+    suas partições são removidas, e a migração pode ser repetida.
+
+    Args:
+        dsn: URL de conexão
+        partitions: Número de partições
+        key: ``document_id`` ou ``user_id``
+        m: Vizinhos por nó do HNSW
+        ef_construction: Largura da busca na construção do HNSW
+        drop_old: Remover a tabela original após a troca
+    """
+    _check_layout(partitions, key)
+    target = "document_chunks_new"
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=partitions + 1)
+
+    try:
+        async with pool.acquire() as lock_conn:
+            already = await lock_conn.fetchval(
+                "SELECT relkind = 'p' FROM pg_class WHERE oid = 'document_chunks'::regclass"
+            )
+            if already:
+                raise ValueError("document_chunks já é particionada")
+
+            leftover = await lock_conn.fetchval("SELECT to_regclass($1) IS NOT NULL", target)
+            if leftover:
+                logger.warning(f"Removendo {target} deixada por migração interrompida")
+                await lock_conn.execute(f"DROP TABLE {target} CASCADE")
+
+            embedding_type = await lock_conn.fetchval(
+                "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+                "WHERE attrelid = 'document_chunks'::regclass AND attname = 'embedding'"
+            )
+
+            async with lock_conn.transaction():
+                await lock_conn.execute("LOCK TABLE document_chunks IN EXCLUSIVE MODE")
+
+                # DDL e cópia em outras conexões (autocommit): visíveis à troca
+                async with pool.acquire() as conn:
+                    for statement in partitioned_table_sql(
+                        target, partitions, key, embedding_type
+                    ):
+                        await conn.execute(statement)
+
+                start = time.perf_counter()
+                copied = await asyncio.gather(
+                    *(
+                        _copy_partition(pool, "document_chunks", target, partitions, i, key)
+                        for i in range(partitions)
+                    )
+                )
+                logger.info(
+                    f"{sum(copied)} chunks copiados para {partitions} partições "
+                    f"em {time.perf_counter() - start:.1f}s"
+                )
+
+                async with pool.acquire() as conn:
+                    for statement in secondary_indexes_sql(target):
+                        await conn.execute(statement, timeout=None)
+                elapsed = await build_partition_indexes(
+                    pool, target, partitions, m, ef_construction
+                )
+                logger.info(f"Índices HNSW das partições construídos em {elapsed:.1f}s")
+
+                await lock_conn.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{target}', 'id'), "
+                    f"(SELECT coalesce(max(id), 0) + 1 FROM document_chunks), false)"
+                )
+                # Contadores de estatísticas: triggers passam para a nova tabela
+                # (criados após a cópia, que não altera os totais)
+                for statement in chunk_stats_triggers_sql(target):
+                    await lock_conn.execute(statement)
+                for trigger in ("document_chunks_stats_insert", "document_chunks_stats_delete"):
+                    await lock_conn.execute(f"DROP TRIGGER IF EXISTS {trigger} ON document_chunks")
+                await _swap_tables(lock_conn, target, partitions)
+
+            if drop_old:
+                await lock_conn.execute(f"DROP TABLE {UNPARTITIONED_TABLE}")
+
+        logger.info(f"document_chunks particionada ({partitions} partições por {key})")
+
+    except Exception as e:
+        logger.error(f"Erro ao particionar document_chunks: {e}")
+        # A tabela nova é criada fora da transação da troca (autocommit) e
+        # impediria uma nova tentativa; após a troca ela já não existe
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {target} CASCADE", timeout=None)
+        except Exception as cleanup_error:
+            logger.error(f"Erro ao remover {target}: {cleanup_error}")
+        raise
+
+    finally:
+        await pool.close()
+
+
+async def _swap_tables(conn: asyncpg.Connection, target: str, partitions: int) -> None:
+    """Renomeia tabela, partições, índices HNSW e sequência para os nomes finais."""
+    final = "document_chunks"
+    await conn.execute(f"ALTER TABLE {final} RENAME TO {UNPARTITIONED_TABLE}")
+    await conn.execute(f"ALTER SEQUENCE {final}_id_seq RENAME TO {UNPARTITIONED_TABLE}_id_seq")
+    await conn.execute(f"ALTER TABLE {target} RENAME TO {final}")
+    await conn.execute(f"ALTER SEQUENCE {target}_id_seq RENAME TO {final}_id_seq")
+
+    for i in range(partitions):
+        old, new = partition_name(target, i), partition_name(final, i)
+        await conn.execute(f"ALTER TABLE {old} RENAME TO {new}")
+        await conn.execute(f"ALTER INDEX {old}_embedding_hnsw RENAME TO {new}_embedding_hnsw")
+
+    for suffix in ("document_id_idx", "metadata_idx", "content_tsv_idx"):
+        await conn.execute(f"ALTER INDEX {target}_{suffix} RENAME TO {final}_{suffix}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Particionamento de document_chunks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Converter a tabela existente")
+    migrate.add_argument("--partitions", type=int, default=settings.chunk_partitions or 8)
+    migrate.add_argument(
+        "--key", choices=PARTITION_KEYS, default=settings.chunk_partition_key
+    )
+    migrate.add_argument("--m", type=int, default=settings.hnsw_m)
+    migrate.add_argument("--ef-construction", type=int, default=settings.hnsw_ef_construction)
+    migrate.add_argument(
+        "--drop-old", action="store_true", help=f"Remover {UNPARTITIONED_TABLE} ao final"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    await migrate_to_partitioned(
+        settings.database_url,
+        args.partitions,
+        args.key,
+        m=args.m,
+        ef_construction=args.ef_construction,
+        drop_old=args.drop_old,
+    )
+    print(
+        f"Defina CHUNK_PARTITIONS={args.partitions} e CHUNK_PARTITION_KEY={args.key} "
+        "e reinicie o backend"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""
+Inserção em massa de chunks via ``COPY ... FROM STDIN`` em formato binário.
+
+Em vez de um ``INSERT`` (e uma atualização de índice com round trip) por chunk,
+todos os chunks de um documento são enviados em um único ``COPY`` binário,
+dentro de uma transação. O payload é gerado em streaming a partir dos arrays
+NumPy, sem converter embeddings para listas Python.
+
+Formato PGCOPY: assinatura + flags + extensão do cabeçalho; cada tupla é
+``int16`` número de campos seguido de ``int32`` tamanho + bytes por campo;
+o trailer é ``int16`` -1.
+"""
+
+import json
+import logging
+import struct
+from typing import AsyncIterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.db.chunk_diff import content_hash
+from app.db.pgvector_codec import encode_vectors
+
+logger = logging.getLogger(__name__)
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+CHUNK_COPY_COLUMNS = [
+    "document_id",
+    "chunk_index",
+    "content",
+    "embedding",
+    "metadata",
+    "content_hash",
+]
+
+_FIELD_COUNT = struct.pack(">h", len(CHUNK_COPY_COLUMNS))
+# Tabela particionada por usuário: coluna user_id extra (ver app.db.partitioning)
+_FIELD_COUNT_WITH_USER = struct.pack(">h", len(CHUNK_COPY_COLUMNS) + 1)
+_INT4_FIELD = struct.Struct(">ii")
+_LENGTH = struct.Struct(">i")
+_JSONB_VERSION = b"\x01"
+
+
+def _field(data: bytes) -> bytes:
+    """Campo binário com prefixo de tamanho."""
+    return _LENGTH.pack(len(data)) + data
+
+
+async def iter_chunk_copy_rows(
+    document_id: int,
+    chunks: Sequence[dict],
+    embeddings: np.ndarray,
+    start_index: int = 0,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Gera o payload binário do COPY de chunks de um documento.
+
+    Args:
+        document_id: ID do documento
+        chunks: Lista de chunks (``content`` e ``metadata``; ``chunk_index`` e
+            ``content_hash`` opcionais)
+        embeddings: Matriz (n, dim) no dtype de armazenamento
+        start_index: ``chunk_index`` do primeiro chunk (quando não informado)
+        user_id: Valor da coluna ``user_id`` (tabela particionada por usuário)
+
+    Yields:
+        Blocos de bytes do payload PGCOPY
+    """
+    yield PGCOPY_HEADER
+
+    field_count = _FIELD_COUNT if user_id is None else _FIELD_COUNT_WITH_USER
+    user_field = b"" if user_id is None else _INT4_FIELD.pack(4, user_id)
+
+    buffer: List[bytes] = []
+    buffered = 0
+    rows = zip(chunks, encode_vectors(embeddings))
+    for idx, (chunk, vector) in enumerate(rows, start=start_index):
+        content = chunk["content"].encode("utf-8")
+        metadata = json.dumps(chunk.get("metadata") or {}).encode("utf-8")
+        digest = chunk.get("content_hash") or content_hash(chunk["content"])
+
+        row = b"".join(
+            (
+                field_count,
+                _INT4_FIELD.pack(4, document_id),
+                _INT4_FIELD.pack(4, chunk.get("chunk_index", idx)),
+                _field(content),
+                _field(vector),
+                _field(_JSONB_VERSION + metadata),
+                _field(digest.encode("ascii")),
+                user_field,
+            )
+        )
+        buffer.append(row)
+        buffered += len(row)
+
+        # Blocos de ~1 MiB limitam memória sem multiplicar chamadas de rede
+        if buffered >= 1 << 20:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
+
+    buffer.append(PGCOPY_TRAILER)
+    yield b"".join(buffer)
+
+
+async def copy_chunks(
+    conn,
+    document_id: int,
+    chunks: Sequence[dict],
+    embeddings: np.ndarray,
+    start_index: int = 0,
+    table: str = "document_chunks",
+    user_id: Optional[int] = None,
+) -> int:
+    """
+    Insere chunks de um documento com um único COPY binário.
+
+    Args:
+        conn: Conexão asyncpg
+        document_id: ID do documento
+        chunks: Lista de chunks
+        embeddings: Matriz (n, dim) no dtype de armazenamento
+        start_index: ``chunk_index`` do primeiro chunk
+        table: Tabela de destino
+        user_id: Dono do documento, gravado quando a tabela é particionada por
+            ``user_id``
+
+    Returns:
+        Número de linhas inseridas
+    """
+    if len(chunks) != len(embeddings):
+        raise ValueError("Número de chunks diferente de embeddings")
+
+    async with conn.transaction():
+        await conn.copy_to_table(
+            table,
+            source=iter_chunk_copy_rows(document_id, chunks, embeddings, start_index, user_id),
+            columns=CHUNK_COPY_COLUMNS + (["user_id"] if user_id is not None else []),
+            format="binary",
+        )
+
+    logger.info(f"COPY binário inseriu {len(chunks)} chunks do documento {document_id}")
+    return len(chunks)
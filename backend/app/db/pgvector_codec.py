@@ -0,0 +1,106 @@
+"""
+Codec binário dos tipos ``vector`` e ``halfvec`` do PgVector.
+
+Formato de wire (``vector_send``/``vector_recv``): ``int16`` dimensão,
+``int16`` reservado (0) e ``dim`` valores ``float4`` big-endian. O tipo
+``halfvec`` usa o mesmo cabeçalho com valores ``float2``. Os vetores trafegam
+como arrays NumPy do encoder até o banco, sem passar por listas de floats
+Python; o tipo de wire é escolhido pelo dtype (``float16`` -> ``halfvec``).
+"""
+
+import struct
+from typing import Iterator
+
+import numpy as np
+
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+_HALF_WIRE_DTYPE = np.dtype(">f2")
+
+# Com vetores normalizados, o cosseno equivale ao produto interno; o operador
+# <#> do PgVector retorna o produto interno negativo e é mais barato que <=>
+INNER_PRODUCT_OPERATOR = "<#>"
+COSINE_DISTANCE_OPERATOR = "<=>"
+
+STORAGE_PRECISIONS = ("float32", "float16")
+
+# Modos de ``hnsw.iterative_scan`` (PgVector >= 0.8): com filtros, a varredura
+# continua no grafo até preencher o LIMIT
+ITERATIVE_SCAN_MODES = ("off", "strict_order", "relaxed_order")
+
+
+def vector_type_sql(dimension: int, precision: str = "float32") -> str:
+    """Tipo SQL da coluna de embeddings (``vector(n)`` ou ``halfvec(n)``)."""
+    if precision not in STORAGE_PRECISIONS:
+        raise ValueError(f"Precisão de armazenamento desconhecida: {precision}")
+    return f"halfvec({dimension})" if precision == "float16" else f"vector({dimension})"
+
+
+def vector_ops_sql(precision: str = "float32", normalized: bool = True) -> str:
+    """
+    Classe de operadores HNSW para a precisão e o operador da busca.
+
+    Vetores normalizados são buscados com ``<#>`` (``*_ip_ops``); os demais,
+    com ``<=>`` (``*_cosine_ops``). Índice com a outra classe não é usado.
+    """
+    prefix = "halfvec" if precision == "float16" else "vector"
+    return f"{prefix}_ip_ops" if normalized else f"{prefix}_cosine_ops"
+
+
+def _wire_dtype(dtype: np.dtype) -> np.dtype:
+    """Dtype de wire correspondente ao dtype do array."""
+    return _HALF_WIRE_DTYPE if np.dtype(dtype) == np.float16 else _WIRE_DTYPE
+
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    """
+    Serializa um vetor no formato binário do PgVector.
+
+    Args:
+        vector: Vetor 1-D (``float16`` gera ``halfvec``; demais, ``vector``)
+
+    Returns:
+        Bytes prontos para envio em formato binário
+    """
+    vector = np.asarray(vector)
+    data = vector.astype(_wire_dtype(vector.dtype), copy=False)
+    if data.ndim != 1:
+        raise ValueError(f"Vetor deve ser 1-D, recebido shape {data.shape}")
+    return _HEADER.pack(data.shape[0], 0) + data.tobytes()
+
+
+def encode_vectors(matrix: np.ndarray) -> Iterator[bytes]:
+    """
+    Serializa as linhas de uma matriz, convertendo a byte order uma única vez.
+
+    Args:
+        matrix: Matriz (n, dim) (``float16`` gera ``halfvec``)
+
+    Yields:
+        Bytes de cada linha no formato binário do PgVector
+    """
+    matrix = np.asarray(matrix)
+    data = np.ascontiguousarray(matrix, dtype=_wire_dtype(matrix.dtype))
+    if data.ndim != 2:
+        raise ValueError(f"Matriz deve ser 2-D, recebido shape {data.shape}")
+
+    header = _HEADER.pack(data.shape[1], 0)
+    for row in data:
+        yield header + row.tobytes()
+
+
+def decode_vector(data: bytes, half: bool = False) -> np.ndarray:
+    """
+    Desserializa um vetor do formato binário do PgVector.
+
+    Args:
+        data: Bytes recebidos do banco
+        half: Dados no formato ``halfvec``
+
+    Returns:
+        Vetor float32 (nativo)
+    """
+    dim, _ = _HEADER.unpack_from(data)
+    wire_dtype = _HALF_WIRE_DTYPE if half else _WIRE_DTYPE
+    values = np.frombuffer(data, dtype=wire_dtype, count=dim, offset=_HEADER.size)
+    return values.astype(np.float32)
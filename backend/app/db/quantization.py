@@ -0,0 +1,234 @@
+"""
+Busca vetorial em dois estágios com cópias quantizadas dos embeddings.
+
+O primeiro estágio varre uma cópia compacta dos vetores e seleciona
+``top_k * oversample`` candidatos; o segundo recalcula a similaridade desses
+candidatos com os vetores em precisão total e devolve o top-k.
+
+- ``binary``: 1 bit por dimensão (sinal), distância de Hamming — 32x menor
+  que float32;
+- ``int8``: 1 byte por dimensão com escala por vetor, produto interno
+  aproximado — 4x menor que float32.
+
+No PgVector, ``binary`` usa ``binary_quantize(embedding)::bit(n)`` com índice
+HNSW ``bit_hamming_ops``; como não há tipo int8, ``int8`` usa a cópia
+``halfvec(n)`` (16 bits) com índice HNSW próprio. Os backends em processo
+mantêm ``QuantizedCodes`` em memória.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+QUANTIZATION_MODES = ("binary", "int8")
+
+# Constantes do popcount SWAR em palavras de 64 bits (Hamming sobre códigos empacotados)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+# Linhas por bloco no produto int8 (limita a cópia temporária em float32)
+_INT8_BLOCK_ROWS = 65536
+
+
+def check_mode(mode: str) -> None:
+    """Valida o modo de quantização."""
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Modo de quantização desconhecido: {mode}")
+
+
+def _binary_width(dimension: int) -> int:
+    """Bytes por código binário, arredondados para palavras de 64 bits."""
+    return (dimension + 63) // 64 * 8
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Bits ligados por linha de uma matriz ``uint64``."""
+    words = words - ((words >> np.uint64(1)) & _M1)
+    words = (words & _M2) + ((words >> np.uint64(2)) & _M2)
+    words = (words + (words >> np.uint64(4))) & _M4
+    return ((words * _H01) >> np.uint64(56)).sum(axis=1, dtype=np.int32)
+
+
+def _pack_signs(vectors: np.ndarray) -> np.ndarray:
+    """Bits de sinal empacotados, com zeros até completar palavras de 64 bits."""
+    packed = np.packbits(vectors > 0, axis=1)
+    codes = np.zeros((len(vectors), _binary_width(vectors.shape[1])), dtype=np.uint8)
+    codes[:, : packed.shape[1]] = packed
+    return codes
+
+
+def quantize(vectors: np.ndarray, mode: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantiza uma matriz de vetores.
+
+    Args:
+        vectors: Matriz (n, dim) float
+        mode: ``binary`` ou ``int8``
+
+    Returns:
+        Tupla (códigos, escalas); escalas só no modo ``int8``
+    """
+    check_mode(mode)
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if mode == "binary":
+        return _pack_signs(vectors), None
+
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantized_distance_sql(
+    mode: str, dimension: int, vector_type: str, operator: str, alias: str = "c"
+) -> str:
+    """
+    Distância do primeiro estágio no PgVector (mesma expressão do índice).
+
+    Args:
+        mode: ``binary`` ou ``int8``
+        dimension: Dimensão armazenada
+        vector_type: ``vector`` ou ``halfvec``
+        operator: Operador de distância dos vetores completos (``<#>``/``<=>``)
+        alias: Alias da tabela de chunks
+    """
+    check_mode(mode)
+    if mode == "binary":
+        return (
+            f"binary_quantize({alias}.embedding)::bit({dimension}) "
+            f"<~> binary_quantize($1::{vector_type})"
+        )
+    return f"{alias}.embedding::halfvec({dimension}) {operator} $1::halfvec({dimension})"
+
+
+def quantized_index_sql(
+    mode: str, table: str, dimension: int, normalized: bool, concurrently: bool = False
+) -> str:
+    """``CREATE INDEX`` HNSW sobre a cópia quantizada (``<tabela>_<modo>_hnsw``)."""
+    check_mode(mode)
+    if mode == "binary":
+        expression = f"(binary_quantize(embedding)::bit({dimension})) bit_hamming_ops"
+    else:
+        ops = "halfvec_ip_ops" if normalized else "halfvec_cosine_ops"
+        expression = f"(embedding::halfvec({dimension})) {ops}"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{table}_{mode}_hnsw ON {table} USING hnsw ({expression})"
+    )
+
+
+class QuantizedCodes:
+    """Cópia quantizada de vetores, indexada pelo ID do chunk (backends em processo)."""
+
+    def __init__(self, mode: str, dimension: int, capacity: int = 1024):
+        """
+        Inicializa a cópia vazia.
+
+        Args:
+            mode: ``binary`` ou ``int8``
+            dimension: Dimensão dos vetores
+            capacity: Linhas alocadas inicialmente (dobra quando necessário)
+        """
+        check_mode(mode)
+        self.mode = mode
+        self.dimension = dimension
+        width = _binary_width(dimension) if mode == "binary" else dimension
+        dtype = np.uint8 if mode == "binary" else np.int8
+        self._codes = np.zeros((capacity, width), dtype=dtype)
+        self._scales = np.zeros(capacity, dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos códigos (e escalas)."""
+        scales = self._scales.nbytes if self.mode == "int8" else 0
+        return self._codes[: self._count].nbytes + scales
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray) -> None:
+        """Acrescenta (ou substitui) vetores."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        codes, scales = quantize(vectors, self.mode)
+
+        needed = self._count + len(ids)
+        if needed > len(self._ids):
+            capacity = max(len(self._ids) * 2, needed)
+            self._codes = np.resize(self._codes, (capacity, self._codes.shape[1]))
+            self._scales = np.resize(self._scales, capacity)
+            self._ids = np.resize(self._ids, capacity)
+
+        for i, chunk_id in enumerate(ids.tolist()):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                row = self._count
+                self._count += 1
+                self._rows[chunk_id] = row
+                self._ids[row] = chunk_id
+            self._codes[row] = codes[i]
+            if scales is not None:
+                self._scales[row] = scales[i]
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Remove vetores (a última linha ocupa o lugar da removida)."""
+        for chunk_id in ids:
+            row = self._rows.pop(int(chunk_id), None)
+            if row is None:
+                continue
+            last = self._count - 1
+            if row != last:
+                moved = int(self._ids[last])
+                self._codes[row] = self._codes[last]
+                self._scales[row] = self._scales[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+            self._count = last
+
+    def _scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Similaridade aproximada (maior é melhor) das linhas com a query."""
+        codes = self._codes[: self._count] if rows is None else self._codes[rows]
+        if self.mode == "binary":
+            query_code = _pack_signs(query[None, :]).view(np.uint64)
+            words = np.ascontiguousarray(codes).view(np.uint64)
+            return -_popcount(words ^ query_code)
+
+        scales = self._scales[: self._count] if rows is None else self._scales[rows]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _INT8_BLOCK_ROWS):
+            end = start + _INT8_BLOCK_ROWS
+            scores[start:end] = (codes[start:end].astype(np.float32) @ query) * scales[start:end]
+        return scores
+
+    def candidates(
+        self, query: np.ndarray, count: int, allowed: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        IDs dos ``count`` vetores mais próximos pela cópia quantizada.
+
+        Args:
+            query: Vetor da query (float)
+            count: Número de candidatos
+            allowed: IDs permitidos (filtros); ``None`` considera todos
+
+        Returns:
+            Array de IDs de chunks, sem ordem definida
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        rows = None
+        if allowed is not None:
+            rows = np.array(
+                [self._rows[i] for i in np.asarray(allowed).tolist() if i in self._rows],
+                dtype=np.int64,
+            )
+        total = self._count if rows is None else len(rows)
+        count = min(count, total)
+        if count <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        scores = self._scores(query, rows)
+        top = np.argpartition(-scores, count - 1)[:count]
+        return self._ids[top] if rows is None else self._ids[rows[top]]
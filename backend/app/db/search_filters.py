@@ -0,0 +1,132 @@
+"""
+Filtros de busca vetorial (documento, usuário, tipo de arquivo e metadados).
+
+Os filtros são compilados em predicados SQL aplicados dentro da busca no
+PgVector (antes do LIMIT), em vez de pós-filtrar o top-k. Os backends em
+processo aplicam os mesmos filtros aos registros dos chunks.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def _contains(container: Any, contained: Any) -> bool:
+    """Equivalente em Python de ``jsonb @> jsonb`` (objetos e listas)."""
+    if isinstance(contained, dict):
+        return isinstance(container, dict) and all(
+            key in container and _contains(container[key], value)
+            for key, value in contained.items()
+        )
+    if isinstance(contained, list):
+        if not isinstance(container, list):
+            return False
+        return all(any(_contains(item, value) for item in container) for value in contained)
+    return container == contained
+
+
+@dataclass
+class SearchFilters:
+    """Restrições aplicadas à busca vetorial."""
+
+    document_ids: Optional[Sequence[int]] = None
+    user_id: Optional[int] = None
+    file_types: Optional[Sequence[str]] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    def is_empty(self) -> bool:
+        """Indica se nenhum filtro foi informado."""
+        return (
+            self.document_ids is None
+            and self.user_id is None
+            and self.file_types is None
+            and not self.metadata
+        )
+
+    @property
+    def needs_record(self) -> bool:
+        """Filtros que exigem o registro completo (além do ``document_id``)."""
+        return self.user_id is not None or self.file_types is not None or bool(self.metadata)
+
+    @property
+    def has_document_filters(self) -> bool:
+        """Filtros resolvidos pela tabela ``documents`` (usuário, tipo de arquivo)."""
+        return self.user_id is not None or self.file_types is not None
+
+    def chunk_filters(self) -> "SearchFilters":
+        """Cópia só com os filtros avaliáveis no próprio chunk (documento, metadados)."""
+        return SearchFilters(document_ids=self.document_ids, metadata=self.metadata)
+
+    def to_sql(
+        self, first_param: int, alias: str = "c", user_column: bool = False
+    ) -> Tuple[str, List[Any]]:
+        """
+        Compila os filtros em predicados SQL parametrizados.
+
+        ``user_id`` e ``file_types`` viram um semi-join com ``documents``
+        (índice ``idx_documents_user_file_type``); metadados usam ``@>``
+        (índice GIN ``idx_document_chunks_metadata``).
+
+        Args:
+            first_param: Número do primeiro parâmetro (``$n``)
+            alias: Alias da tabela ``document_chunks`` na query
+            user_column: Comparar ``user_id`` com a coluna do próprio chunk
+                (tabela particionada por usuário, permite poda de partições)
+
+        Returns:
+            Tupla (predicados unidos por AND, ou "TRUE"; valores dos parâmetros)
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        def param(value: Any) -> str:
+            params.append(value)
+            return f"${first_param + len(params) - 1}"
+
+        if self.document_ids is not None:
+            clauses.append(f"{alias}.document_id = ANY({param(list(self.document_ids))}::int[])")
+
+        document_clauses = []
+        if self.user_id is not None and user_column:
+            clauses.append(f"{alias}.user_id = {param(self.user_id)}")
+        elif self.user_id is not None:
+            document_clauses.append(f"d.user_id = {param(self.user_id)}")
+        if self.file_types is not None:
+            document_clauses.append(
+                f"d.file_type = ANY({param(list(self.file_types))}::varchar[])"
+            )
+        if document_clauses:
+            clauses.append(
+                f"{alias}.document_id IN (SELECT d.id FROM documents d "
+                f"WHERE {' AND '.join(document_clauses)})"
+            )
+
+        if self.metadata:
+            clauses.append(f"{alias}.metadata @> {param(self.metadata)}::jsonb")
+
+        return (" AND ".join(clauses) or "TRUE"), params
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """
+        Avalia os filtros sobre um registro de chunk (backends em processo).
+
+        Sem a tabela ``documents``, ``user_id`` e ``file_types`` são comparados
+        com as chaves ``user_id`` e ``file_type`` dos metadados do chunk.
+
+        Args:
+            record: Registro com ``document_id`` e ``metadata``
+
+        Returns:
+            True se o registro satisfaz todos os filtros
+        """
+        metadata = record.get("metadata") or {}
+
+        if self.document_ids is not None and record.get("document_id") not in self.document_ids:
+            return False
+        if self.user_id is not None and metadata.get("user_id") != self.user_id:
+            return False
+        if self.file_types is not None and metadata.get("file_type") not in self.file_types:
+            return False
+        if self.metadata and not _contains(metadata, self.metadata):
+            return False
+
+        return True
@@ -0,0 +1,169 @@
+"""
+Estatísticas mantidas incrementalmente e reconciliação periódica.
+
+No PostgreSQL, triggers de statement em ``document_chunks`` (ver
+``docker/postgres/init-db.sql``) mantêm ``document_chunk_stats`` (por
+documento) e ``vector_store_stats`` (totais distribuídos em linhas por
+``pg_backend_pid() % 16``, para que ingestões concorrentes não serializem em
+uma só linha): estatísticas são lidas somando 16 linhas, sem ``count(*)``
+sobre os chunks. Os backends em processo e o
+``MinIOClient`` mantêm contadores equivalentes em memória.
+
+Contadores incrementais podem desviar (UPDATE de conteúdo, TRUNCATE, escritas
+de outras réplicas no MinIO); o ``StatsReconciler`` os recalcula na partida e a
+cada ``STATS_RECONCILE_INTERVAL`` segundos, fora do caminho das requisições.
+No PostgreSQL uma só execução ocorre por vez entre workers e réplicas
+(advisory lock), sem bloquear escritas: o desvio é medido em um snapshot e
+somado aos contadores.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_stats_triggers_sql(table: str = "document_chunks") -> List[str]:
+    """
+    Triggers dos contadores de chunks em ``table``.
+
+    As funções ``document_chunks_stats_insert``/``_delete`` são criadas pelo
+    ``init-db.sql``; usado ao recriar a tabela (``app.db.partitioning``).
+    """
+    return [
+        f"DROP TRIGGER IF EXISTS document_chunks_stats_insert ON {table}",
+        f"""
+        CREATE TRIGGER document_chunks_stats_insert
+        AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_chunks
+        FOR EACH STATEMENT EXECUTE FUNCTION document_chunks_stats_insert()
+        """,
+        f"DROP TRIGGER IF EXISTS document_chunks_stats_delete ON {table}",
+        f"""
+        CREATE TRIGGER document_chunks_stats_delete
+        AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_chunks
+        FOR EACH STATEMENT EXECUTE FUNCTION document_chunks_stats_delete()
+        """,
+    ]
+
+
+# Chave do advisory lock da reconciliação: uma execução por vez entre todos os
+# workers e réplicas
+RECONCILE_LOCK_KEY = 0x5354415453
+
+# Desvio (contagem real - contador) por documento e nos totais (soma dos
+# slots), lido em um snapshot REPEATABLE READ; a linha de totais tem
+# document_id NULL
+RECONCILE_DRIFT_SQL = """
+    WITH actual AS (
+        SELECT document_id, count(*) AS chunk_count,
+               sum(octet_length(content)) AS content_bytes,
+               sum(coalesce(pg_column_size(embedding), 0)) AS vector_bytes
+        FROM document_chunks
+        GROUP BY document_id
+    ), documents AS (
+        SELECT coalesce(a.document_id, s.document_id) AS document_id,
+               coalesce(a.chunk_count, 0) - coalesce(s.chunk_count, 0) AS chunk_count,
+               coalesce(a.content_bytes, 0) - coalesce(s.content_bytes, 0) AS content_bytes,
+               coalesce(a.vector_bytes, 0) - coalesce(s.vector_bytes, 0) AS vector_bytes,
+               0::bigint AS documents
+        FROM actual a
+        FULL JOIN document_chunk_stats s ON s.document_id = a.document_id
+    )
+    SELECT * FROM documents
+    WHERE (chunk_count, content_bytes, vector_bytes) <> (0, 0, 0)
+    UNION ALL
+    SELECT NULL, a.chunk_count - t.total_chunks, a.content_bytes - t.content_bytes,
+           a.vector_bytes - t.vector_bytes, a.documents - t.total_documents
+    FROM (
+        SELECT coalesce(sum(total_chunks), 0)::bigint AS total_chunks,
+               coalesce(sum(content_bytes), 0)::bigint AS content_bytes,
+               coalesce(sum(vector_bytes), 0)::bigint AS vector_bytes,
+               coalesce(sum(total_documents), 0)::bigint AS total_documents
+        FROM vector_store_stats
+    ) AS t, (
+        SELECT coalesce(sum(chunk_count), 0)::bigint AS chunk_count,
+               coalesce(sum(content_bytes), 0)::bigint AS content_bytes,
+               coalesce(sum(vector_bytes), 0)::bigint AS vector_bytes,
+               count(*) AS documents
+        FROM actual
+    ) AS a
+"""
+
+# Aplica o desvio somando aos contadores (escritas feitas depois do snapshot já
+# foram contadas pelos triggers e são preservadas)
+APPLY_DOCUMENT_DRIFT_SQL = """
+    INSERT INTO document_chunk_stats AS s
+        (document_id, chunk_count, content_bytes, vector_bytes)
+    SELECT * FROM unnest($1::int[], $2::bigint[], $3::bigint[], $4::bigint[])
+    ON CONFLICT (document_id) DO UPDATE
+    SET chunk_count = s.chunk_count + EXCLUDED.chunk_count,
+        content_bytes = s.content_bytes + EXCLUDED.content_bytes,
+        vector_bytes = s.vector_bytes + EXCLUDED.vector_bytes
+"""
+
+DELETE_EMPTY_DOCUMENTS_SQL = """
+    DELETE FROM document_chunk_stats
+    WHERE document_id = ANY($1::int[]) AND chunk_count <= 0
+"""
+
+# O desvio dos totais vai para o slot 0, que também guarda reconciled_at
+APPLY_TOTALS_DRIFT_SQL = """
+    UPDATE vector_store_stats AS t
+    SET total_chunks = t.total_chunks + $1,
+        content_bytes = t.content_bytes + $2,
+        vector_bytes = t.vector_bytes + $3,
+        total_documents = t.total_documents + $4,
+        reconciled_at = now()
+    WHERE t.slot = 0
+"""
+
+
+class StatsReconciler:
+    """Job periódico que recalcula contadores incrementais."""
+
+    def __init__(self, interval: float, jobs: Dict[str, Callable[[], Awaitable[dict]]]):
+        """
+        Inicializa o job (iniciado com ``start``).
+
+        Args:
+            interval: Segundos entre reconciliações
+            jobs: Nome -> corrotina de reconciliação (retorna o desvio corrigido)
+        """
+        self.interval = interval
+        self.jobs = jobs
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Agenda o loop no event loop atual (primeira execução imediata)."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Reconciliação de estatísticas a cada {self.interval:.0f}s")
+
+    async def run_once(self) -> Dict[str, dict]:
+        """Executa todas as reconciliações; falhas são registradas e não interrompem as demais."""
+        results = {}
+        for name, job in self.jobs.items():
+            try:
+                results[name] = await job()
+                logger.info(f"Estatísticas reconciliadas ({name}): {results[name]}")
+            except Exception as e:
+                logger.error(f"Erro ao reconciliar estatísticas ({name}): {e}")
+        return results
+
+    async def _run(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        """Cancela o loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
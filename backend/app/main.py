@@ -2,12 +2,21 @@
 Aplicação FastAPI principal - RAG Agent Solution.
 """
 
+import asyncio
 import logging
+from typing import Optional
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import settings
+from app.db.database import close_database, get_database
+from app.db.stats_counters import StatsReconciler
+from app.rag.hybrid_search import get_keyword_search
+from app.rag.inference import get_inference_executor
+from app.rag.model_registry import model_registry
+from app.storage.minio_client import get_minio_client
 
 # Configurar logging
 logging.basicConfig(
@@ -17,6 +26,36 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+async def reconcile_object_stats() -> dict:
+    """Relista o bucket (o cliente conecta ao MinIO fora do event loop)."""
+    client = await asyncio.to_thread(get_minio_client)
+    return await client.reconcile_stats()
+
+
+# Reconciliação periódica dos contadores de estatísticas (vetores e bucket),
+# fora do caminho das requisições
+stats_reconciler = StatsReconciler(
+    settings.stats_reconcile_interval,
+    {
+        "vectors": lambda: get_database().reconcile_stats(),
+        "objects": reconcile_object_stats,
+    },
+)
+
+# Preenchimento do índice de palavras-chave vazio a partir do banco, em segundo
+# plano para não atrasar a partida
+keyword_bootstrap: Optional[asyncio.Task] = None
+
+
+async def bootstrap_keyword_index(keyword_search) -> None:
+    """Preenche o índice de palavras-chave (falhas só são registradas)."""
+    try:
+        await keyword_search.bootstrap()
+    except Exception as e:
+        logger.error(f"Erro ao preencher índice de palavras-chave: {e}")
+
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title="RAG Agent Solution",
@@ -69,6 +108,18 @@ async def get_config():
     }
 
 
+@app.get("/api/metrics/inference")
+async def get_inference_metrics():
+    """Retorna métricas do executor de inferência."""
+    return get_inference_executor().get_stats()
+
+
+@app.get("/api/metrics/models")
+async def get_model_metrics():
+    """Retorna modelos carregados e seu consumo de memória."""
+    return model_registry.get_stats()
+
+
 # Exception handlers
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
@@ -88,6 +139,7 @@ async def general_exception_handler(request, exc):
 @app.on_event("startup")
 async def startup_event():
     """Executado ao iniciar a aplicação."""
+    global keyword_bootstrap
     logger.info("=" * 50)
     logger.info("RAG Agent Solution iniciando...")
     logger.info(f"Ambiente: {settings.environment}")
@@ -95,6 +147,14 @@ async def startup_event():
     logger.info(f"Modelo de embeddings: {settings.embedding_model}")
     logger.info(f"Modelo de re-ranking: {settings.rerank_model}")
     logger.info("=" * 50)
+    if settings.vector_backend == "pgvector":
+        # Recusa partir com índice HNSW que não atende o operador da busca
+        await get_database().check_hnsw_index()
+    if settings.keyword_search_backend == "memory":
+        # Criado aqui: recusa partir com índice por worker (KEYWORD_INDEX_PATH vazio)
+        keyword_search = get_keyword_search()
+        keyword_bootstrap = asyncio.create_task(bootstrap_keyword_index(keyword_search))
+    stats_reconciler.start()
 
 
 # Shutdown event
@@ -102,6 +162,11 @@ async def startup_event():
 async def shutdown_event():
     """Executado ao desligar a aplicação."""
     logger.info("RAG Agent Solution desligando...")
+    await stats_reconciler.stop()
+    if keyword_bootstrap is not None:
+        keyword_bootstrap.cancel()
+    await close_database()
+    get_inference_executor().shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -5,7 +5,9 @@ Módulo RAG: Pipeline de Retrieval-Augmented Generation.
 from app.rag.document_processor import DocumentProcessor
 from app.rag.chunking import ChunkingFactory, Chunk
 from app.rag.embeddings import EmbeddingsGenerator, VectorStore
-from app.rag.hybrid_search import HybridSearch, SearchResult
+from app.rag.hybrid_search import HybridSearch, HybridSearchResponse, SearchResult
+from app.rag.model_registry import ModelRegistry, model_registry
+from app.rag.similarity import similarity_matrix, top_k_similarity
 
 __all__ = [
     "DocumentProcessor",
@@ -14,5 +16,10 @@ __all__ = [
     "EmbeddingsGenerator",
     "VectorStore",
     "HybridSearch",
+    "HybridSearchResponse",
     "SearchResult",
+    "ModelRegistry",
+    "model_registry",
+    "similarity_matrix",
+    "top_k_similarity",
 ]
@@ -0,0 +1,243 @@
+"""
+Backends de inferência para o modelo de embeddings.
+
+- ``torch``: ``SentenceTransformer`` original (PyTorch);
+- ``onnx``: mesmo modelo exportado para ONNX e executado no ONNX Runtime;
+- ``onnx-int8``: modelo ONNX com quantização dinâmica int8 dos pesos.
+
+Todos os backends expõem a mesma interface usada pelo ``EmbeddingsGenerator``
+(``encode``, ``tokenizer`` e ``max_seq_length``), de modo que a troca é feita
+apenas pela configuração ``EMBEDDING_BACKEND``.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class OnnxEmbeddingBackend:
+    """Modelo de embeddings executado no ONNX Runtime."""
+
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int = 1):
+        """
+        Carrega modelo ONNX exportado por ``export_onnx_model``.
+
+        Args:
+            model_dir: Diretório com ``model.onnx``, tokenizer e ``pooling.json``
+            quantized: Usar ``model-int8.onnx``
+            num_threads: Threads intra-op do ONNX Runtime
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, "pooling.json")) as f:
+            pooling = json.load(f)
+
+        self.pooling_mode = pooling["pooling_mode"]
+        self.normalize = pooling["normalize"]
+        self.max_seq_length = pooling["max_seq_length"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(1, num_threads)
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        model_file = "model-int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = [inp.name for inp in self.session.get_inputs()]
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        """
+        Codifica textos (mesma assinatura de ``SentenceTransformer.encode``).
+
+        Args:
+            texts: Lista de textos
+            batch_size: Tamanho de cada batch de inferência
+            convert_to_numpy: Ignorado (sempre retorna NumPy)
+            normalize_embeddings: Normalizar vetores (norma L2 = 1)
+
+        Returns:
+            Matriz float32 (n, dim)
+        """
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, normalize_embeddings=normalize_embeddings)[0]
+
+        batches = []
+        for start in range(0, len(texts), max(1, batch_size)):
+            encoded = self.tokenizer(
+                texts[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            batches.append(self._pool(hidden, encoded["attention_mask"]))
+
+        embeddings = np.concatenate(batches).astype(np.float32, copy=False)
+
+        if self.normalize or normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+
+        return embeddings
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Aplica o pooling do SentenceTransformer original."""
+        if self.pooling_mode == "cls":
+            return hidden[:, 0]
+
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        if self.pooling_mode == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def export_onnx_model(model_name: str, model_dir: str, quantize: bool = False) -> None:
+    """
+    Exporta modelo SentenceTransformer para ONNX (e opcionalmente int8).
+
+    Args:
+        model_name: Nome do modelo SentenceTransformer
+        model_dir: Diretório de destino
+        quantize: Gerar também ``model-int8.onnx``
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    onnx_path = os.path.join(model_dir, "model.onnx")
+
+    if not os.path.exists(onnx_path):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Exportando {model_name} para ONNX: {onnx_path}")
+
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer = st_model[0].auto_model.eval()
+        tokenizer = st_model.tokenizer
+
+        pooling_module = next(
+            (m for m in st_model if hasattr(m, "get_pooling_mode_str")), None
+        )
+        pooling_mode = pooling_module.get_pooling_mode_str() if pooling_module else "mean"
+        normalize = any(type(m).__name__ == "Normalize" for m in st_model)
+
+        sample = tokenizer(["exemplo de texto"], return_tensors="pt")
+        input_names = [
+            name
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in sample
+        ]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                onnx_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+
+        tokenizer.save_pretrained(model_dir)
+        with open(os.path.join(model_dir, "pooling.json"), "w") as f:
+            json.dump(
+                {
+                    "pooling_mode": pooling_mode,
+                    "normalize": normalize,
+                    "max_seq_length": st_model.max_seq_length,
+                },
+                f,
+            )
+
+    int8_path = os.path.join(model_dir, "model-int8.onnx")
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizando modelo ONNX para int8: {int8_path}")
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+
+
+def load_embedding_backend(model_name: str, backend: Optional[str] = None):
+    """
+    Carrega o modelo de embeddings no backend configurado.
+
+    Args:
+        model_name: Nome do modelo SentenceTransformer
+        backend: ``torch``, ``onnx`` ou ``onnx-int8`` (padrão: configuração)
+
+    Returns:
+        Objeto com ``encode``, ``tokenizer`` e ``max_seq_length``
+    """
+    backend = backend or settings.embedding_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de embeddings desconhecido: {backend}")
+
+    logger.info(f"Backend de embeddings: {backend}")
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+
+    quantized = backend == "onnx-int8"
+    model_dir = os.path.join(settings.embedding_onnx_dir, re.sub(r"[^\w.-]", "_", model_name))
+    export_onnx_model(model_name, model_dir, quantize=quantized)
+
+    return OnnxEmbeddingBackend(
+        model_dir, quantized=quantized, num_threads=settings.onnx_intra_op_threads
+    )
+
+
+def check_backend_parity(
+    reference, candidate, texts: List[str], tolerance: float = 0.99
+) -> dict:
+    """
+    Compara embeddings de dois backends pelo cosseno linha a linha.
+
+    Args:
+        reference: Modelo de referência (normalmente ``torch``)
+        candidate: Modelo a validar
+        texts: Textos de amostra
+        tolerance: Cosseno mínimo aceito para cada texto
+
+    Returns:
+        Dicionário com cosseno mínimo/médio e se passou na tolerância
+    """
+    ref = reference.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    cand = candidate.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+    cosines = np.sum(np.asarray(ref, dtype=np.float32) * cand, axis=1)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "tolerance": tolerance,
+        "passed": bool(cosines.min() >= tolerance),
+    }
@@ -0,0 +1,210 @@
+"""
+Cache de embeddings endereçado por conteúdo.
+
+A chave de cada entrada é derivada do nome do modelo e de um hash SHA-256 do
+texto normalizado, de modo que o mesmo texto nunca é codificado duas vezes
+pelo mesmo modelo. O cache possui dois níveis:
+
+- memória: LRU limitado por número de entradas;
+- disco (opcional): arquivos ``.npy`` que sobrevivem a reinicializações.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Cache LRU em memória com nível opcional em disco."""
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        cache_dir: Optional[str] = None,
+    ):
+        """
+        Inicializa cache de embeddings.
+
+        Args:
+            model_name: Nome do modelo (faz parte da chave)
+            max_entries: Número máximo de entradas em memória
+            cache_dir: Diretório do nível em disco (None desativa)
+        """
+        self.model_name = model_name
+        self.max_entries = max(0, max_entries)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.disk_dir: Optional[str] = None
+        if cache_dir:
+            model_slug = re.sub(r"[^\w.-]", "_", model_name)
+            self.disk_dir = os.path.join(cache_dir, model_slug)
+            os.makedirs(self.disk_dir, exist_ok=True)
+            logger.info(f"Cache de embeddings em disco: {self.disk_dir}")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normaliza texto (espaços colapsados e bordas removidas)."""
+        return " ".join(text.split())
+
+    def make_key(self, text: str) -> str:
+        """Gera chave do cache para um texto."""
+        payload = f"{self.model_name}\0{self.normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Busca embedding no cache.
+
+        Args:
+            text: Texto original
+
+        Returns:
+            Embedding (somente leitura) ou None se ausente
+        """
+        key = self.make_key(text)
+
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return embedding
+
+        embedding = self._read_disk(key)
+
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, embedding)
+            return embedding
+
+    def get_many(self, texts: List[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """
+        Busca vários embeddings no cache.
+
+        Args:
+            texts: Lista de textos
+
+        Returns:
+            Tupla (embeddings encontrados por índice, índices ausentes)
+        """
+        found: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+
+        for idx, text in enumerate(texts):
+            embedding = self.get(text)
+            if embedding is None:
+                missing.append(idx)
+            else:
+                found[idx] = embedding
+
+        return found, missing
+
+    def put(self, text: str, embedding: np.ndarray) -> None:
+        """
+        Armazena embedding no cache.
+
+        Args:
+            text: Texto original
+            embedding: Embedding calculado
+        """
+        key = self.make_key(text)
+        embedding = np.array(embedding, dtype=np.float32, copy=True)
+        embedding.setflags(write=False)
+
+        with self._lock:
+            self._store_memory(key, embedding)
+
+        self._write_disk(key, embedding)
+
+    def clear(self) -> None:
+        """Limpa o nível em memória e zera os contadores."""
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas de uso do cache."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_enabled": self.disk_dir is not None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _store_memory(self, key: str, embedding: np.ndarray) -> None:
+        """Insere no LRU em memória (chamar com lock adquirido)."""
+        if self.max_entries == 0:
+            return
+
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        """Caminho do arquivo de uma chave no nível em disco."""
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npy")
+
+    def _read_disk(self, key: str) -> Optional[np.ndarray]:
+        """Lê embedding do disco, se existir."""
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            embedding = np.load(path, allow_pickle=False)
+            embedding.setflags(write=False)
+            return embedding
+        except Exception as e:
+            logger.warning(f"Entrada de cache corrompida ({path}): {e}")
+            return None
+
+    def _write_disk(self, key: str, embedding: np.ndarray) -> None:
+        """Grava embedding no disco de forma atômica."""
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, embedding, allow_pickle=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache em disco: {e}")
@@ -2,15 +2,171 @@
 Geração de embeddings e integração com PgVector.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+import time
+from collections import deque
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 import numpy as np
 
-from sentence_transformers import SentenceTransformer
 from app.config import settings
+from app.db.chunk_diff import diff_chunks
+from app.db.search_filters import SearchFilters
+from app.rag.embedding_cache import EmbeddingCache
+from app.rag.inference import get_inference_executor
+from app.rag.model_registry import model_registry
+from app.rag.similarity import similarity_matrix, top_k_similarity
+from app.rag.vector_projection import VectorProjection
 
 logger = logging.getLogger(__name__)
 
+# Vetor(es) aceitos pelo VectorStore: arrays float32 (caminho sem cópia) ou listas
+VectorLike = Union[np.ndarray, Sequence[float]]
+VectorsLike = Union[np.ndarray, Sequence[Sequence[float]]]
+
+
+class EmbeddingBatch(NamedTuple):
+    """Batch produzido por ``stream_embeddings``."""
+
+    start_index: int
+    embeddings: np.ndarray
+
+
+class StreamProgress(NamedTuple):
+    """Progresso de ``stream_embeddings``."""
+
+    processed: int
+    total: Optional[int]
+    elapsed_seconds: float
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def as_float32_vectors(vectors: VectorsLike) -> np.ndarray:
+    """Converte vetores para matriz float32 contígua (sem cópia se já for)."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    return np.ascontiguousarray(matrix)
+
+
+class EmbeddingBatcher:
+    """
+    Agrupa chamadas concorrentes de embedding em um único encode em batch.
+
+    Cada chamada a ``submit`` aguarda até que o batch atinja ``max_batch_size``
+    textos ou até que ``max_wait_ms`` tenha passado desde o primeiro texto
+    pendente; então todo o batch é codificado de uma vez e cada chamador recebe
+    o seu próprio vetor.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Awaitable[np.ndarray]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Inicializa batcher.
+
+        Args:
+            encode_fn: Função assíncrona que codifica uma lista de textos
+            max_batch_size: Tamanho máximo de cada batch
+            max_wait_ms: Espera máxima (ms) antes de disparar um batch incompleto
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, text: str) -> np.ndarray:
+        """
+        Enfileira texto e aguarda o seu embedding.
+
+        Args:
+            text: Texto já normalizado
+
+        Returns:
+            Embedding do texto
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispara o processamento dos textos pendentes."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Codifica um batch e entrega cada vetor ao seu chamador."""
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+
+        try:
+            embeddings = await self.encode_fn([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do batcher."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
 
 class EmbeddingsGenerator:
     """Gera embeddings para textos usando modelos pré-treinados."""
@@ -28,69 +184,307 @@ class EmbeddingsGenerator:
         logger.info(f"Carregando modelo de embeddings: {self.model_name}")
 
         try:
-            self.model = SentenceTransformer(self.model_name)
+            # Pesos compartilhados com os demais componentes do processo
+            self.model = model_registry.get_embedding_model(
+                self.model_name, settings.embedding_backend
+            )
             logger.info(f"Modelo carregado com sucesso. Dimensão: {self.vector_dimension}")
         except Exception as e:
             logger.error(f"Erro ao carregar modelo: {e}")
             raise
 
-    async def generate_embedding(self, text: str) -> List[float]:
+        # Vetores unitários permitem usar produto interno no lugar do cosseno
+        self.normalize = settings.normalize_embeddings
+
+        # Cache de embeddings endereçado por conteúdo
+        self.cache: Optional[EmbeddingCache] = None
+        if settings.embedding_cache_enabled:
+            cache_namespace = f"{self.model_name}:{settings.embedding_backend}"
+            if self.normalize:
+                cache_namespace += ":normalized"
+            self.cache = EmbeddingCache(
+                model_name=cache_namespace,
+                max_entries=settings.embedding_cache_max_entries,
+                cache_dir=settings.embedding_cache_dir or None,
+            )
+
+        # Tamanho dos grupos por comprimento em generate_embeddings_array
+        self.encode_batch_size = max(1, settings.embedding_encode_batch_size)
+
+        # Micro-batching de chamadas concorrentes a generate_embedding
+        self.batcher: Optional[EmbeddingBatcher] = None
+        if settings.embedding_batching_enabled:
+            self.batcher = EmbeddingBatcher(
+                encode_fn=self._encode,
+                max_batch_size=settings.embedding_batch_max_size,
+                max_wait_ms=settings.embedding_batch_max_wait_ms,
+            )
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
         """
-        Gera embedding para um texto.
+        Codifica uma lista de textos com o modelo, fora do event loop.
+
+        Returns:
+            Matriz float32 contígua (n, dim), normalizada se configurado
+        """
+        embeddings = await get_inference_executor().run(
+            self.model.encode,
+            texts,
+            batch_size=max(1, len(texts)),
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize,
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def _token_lengths(self, texts: List[str]) -> np.ndarray:
+        """Calcula número de tokens de cada texto (caracteres, sem tokenizer)."""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            return np.array([len(text) for text in texts])
+
+        input_ids = tokenizer(
+            texts,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+        )["input_ids"]
+        return np.array([len(ids) for ids in input_ids])
+
+    async def _encode_bucketed(self, texts: List[str]) -> np.ndarray:
+        """
+        Codifica textos agrupados por comprimento em tokens.
+
+        Textos de tamanho parecido são codificados juntos, reduzindo o padding
+        desperdiçado quando chunks curtos e longos se misturam. O resultado
+        volta na ordem original.
+
+        Args:
+            texts: Lista de textos não vazios
+
+        Returns:
+            Matriz float32 (n, dim) alinhada com ``texts``
+        """
+        lengths = await get_inference_executor().run(self._token_lengths, texts)
+        order = np.argsort(lengths, kind="stable")
+
+        embeddings: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.encode_batch_size):
+            bucket = order[start : start + self.encode_batch_size]
+            bucket_embeddings = await self._encode([texts[idx] for idx in bucket])
+
+            if embeddings is None:
+                embeddings = np.empty((len(texts), bucket_embeddings.shape[1]), dtype=np.float32)
+            embeddings[bucket] = bucket_embeddings
+
+        return embeddings
+
+    async def generate_embedding_array(self, text: str) -> np.ndarray:
+        """
+        Gera embedding para um texto, sem conversão para lista.
 
         Args:
             text: Texto para gerar embedding
 
         Returns:
-            Lista de floats representando o embedding
+            Vetor float32 de dimensão ``vector_dimension``
         """
         try:
             # Normalizar texto
             text = text.strip()
             if not text:
                 logger.warning("Texto vazio para embedding")
-                return [0.0] * self.vector_dimension
+                return np.zeros(self.vector_dimension, dtype=np.float32)
+
+            # Consultar cache
+            if self.cache:
+                cached = self.cache.get(text)
+                if cached is not None:
+                    return cached
+
+            # Gerar embedding (agrupado com chamadas concorrentes, se habilitado)
+            if self.batcher:
+                embedding = await self.batcher.submit(text)
+            else:
+                embedding = (await self._encode([text]))[0]
 
-            # Gerar embedding
-            embedding = self.model.encode(text, convert_to_numpy=True)
+            if self.cache:
+                self.cache.put(text, embedding)
 
-            # Converter para lista
-            return embedding.tolist()
+            return embedding
 
         except Exception as e:
             logger.error(f"Erro ao gerar embedding: {e}")
             raise
 
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def generate_embeddings_array(self, texts: List[str]) -> np.ndarray:
         """
-        Gera embeddings para múltiplos textos.
+        Gera embeddings para múltiplos textos como matriz float32.
+
+        A linha ``i`` do resultado corresponde sempre a ``texts[i]``; textos
+        vazios recebem vetor nulo em vez de serem descartados.
 
         Args:
             texts: Lista de textos
 
         Returns:
-            Lista de embeddings
+            Matriz float32 contígua (n, dim)
         """
         try:
             # Normalizar textos
-            texts = [t.strip() for t in texts if t.strip()]
-
-            if not texts:
-                logger.warning("Nenhum texto válido para embeddings")
-                return []
-
-            logger.info(f"Gerando embeddings para {len(texts)} textos")
+            texts = [t.strip() for t in texts]
+            embeddings = np.zeros((len(texts), self.vector_dimension), dtype=np.float32)
+
+            valid = [idx for idx, text in enumerate(texts) if text]
+            if len(valid) < len(texts):
+                logger.warning(f"{len(texts) - len(valid)} textos vazios recebem vetor nulo")
+            if not valid:
+                return embeddings
+
+            # Consultar cache e codificar apenas textos ausentes (sem repetição)
+            pending = {}
+            cached = 0
+            for idx in valid:
+                embedding = self.cache.get(texts[idx]) if self.cache else None
+                if embedding is not None:
+                    embeddings[idx] = embedding
+                    cached += 1
+                else:
+                    key = EmbeddingCache.normalize_text(texts[idx])
+                    pending.setdefault(key, []).append(idx)
+
+            logger.info(
+                f"Gerando embeddings para {len(pending)} textos "
+                f"({cached} do cache, total {len(texts)})"
+            )
 
-            # Gerar embeddings em batch
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
+            if pending:
+                groups = list(pending.values())
+                new_embeddings = await self._encode_bucketed([texts[group[0]] for group in groups])
+                for group, embedding in zip(groups, new_embeddings):
+                    if self.cache:
+                        self.cache.put(texts[group[0]], embedding)
+                    embeddings[group] = embedding
 
-            # Converter para lista de listas
-            return embeddings.tolist()
+            return embeddings
 
         except Exception as e:
             logger.error(f"Erro ao gerar embeddings em batch: {e}")
             raise
 
+    async def stream_embeddings(
+        self,
+        texts: Union[Iterable[str], AsyncIterable[str]],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[StreamProgress], None]] = None,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> AsyncIterator[EmbeddingBatch]:
+        """
+        Gera embeddings de um iterável de textos em batches, com memória limitada.
+
+        Os textos são consumidos sob demanda e no máximo
+        ``embedding_stream_prefetch`` batches ficam prontos à frente do
+        consumidor, de modo que a codificação do próximo batch se sobrepõe à
+        escrita do anterior. Fechar o iterador ou sinalizar ``cancel_event``
+        interrompe a geração.
+
+        Args:
+            texts: Iterável (síncrono ou assíncrono) de textos
+            batch_size: Textos por batch (padrão: ``embedding_stream_batch_size``)
+            progress_callback: Chamado após cada batch com o progresso
+            cancel_event: Evento que, quando sinalizado, encerra o stream
+
+        Yields:
+            ``EmbeddingBatch(start_index, embeddings)``, em ordem
+        """
+        batch_size = batch_size or settings.embedding_stream_batch_size
+        total = len(texts) if hasattr(texts, "__len__") else None
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.embedding_stream_prefetch))
+
+        async def iterate():
+            if hasattr(texts, "__aiter__"):
+                async for text in texts:
+                    yield text
+            else:
+                for text in texts:
+                    yield text
+
+        async def produce():
+            try:
+                start_index = 0
+                batch: List[str] = []
+                async for text in iterate():
+                    batch.append(text)
+                    if len(batch) >= batch_size:
+                        embeddings = await self.generate_embeddings_array(batch)
+                        await queue.put(EmbeddingBatch(start_index, embeddings))
+                        start_index += len(batch)
+                        batch = []
+                    if cancel_event and cancel_event.is_set():
+                        break
+
+                if batch and not (cancel_event and cancel_event.is_set()):
+                    embeddings = await self.generate_embeddings_array(batch)
+                    await queue.put(EmbeddingBatch(start_index, embeddings))
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        started = time.perf_counter()
+        processed = 0
+        producer = asyncio.ensure_future(produce())
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"Erro no stream de embeddings: {item}")
+                    raise item
+                if cancel_event and cancel_event.is_set():
+                    logger.info(f"Stream de embeddings cancelado após {processed} textos")
+                    break
+
+                processed += len(item.embeddings)
+                if progress_callback:
+                    progress_callback(
+                        StreamProgress(processed, total, time.perf_counter() - started)
+                    )
+
+                yield item
+        finally:
+            producer.cancel()
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        """
+        Gera embedding para um texto.
+
+        Prefira ``generate_embedding_array`` em caminhos críticos; este método
+        existe por compatibilidade e converte o vetor para lista.
+
+        Args:
+            text: Texto para gerar embedding
+
+        Returns:
+            Lista de floats representando o embedding
+        """
+        return (await self.generate_embedding_array(text)).tolist()
+
+    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings para múltiplos textos.
+
+        Prefira ``generate_embeddings_array`` em caminhos críticos; este método
+        existe por compatibilidade e converte a matriz para listas.
+
+        Args:
+            texts: Lista de textos
+
+        Returns:
+            Lista de embeddings
+        """
+        return (await self.generate_embeddings_array(texts)).tolist()
+
     async def get_similarity(self, text1: str, text2: str) -> float:
         """
         Calcula similaridade entre dois textos.
@@ -103,46 +497,155 @@ class EmbeddingsGenerator:
             Similaridade (0-1)
         """
         try:
-            embeddings = await self.generate_embeddings_batch([text1, text2])
+            embeddings = await self.generate_embeddings_array([text1, text2])
+            similarity = similarity_matrix(embeddings[:1], embeddings[1:], normalized=False)
 
-            if len(embeddings) < 2:
-                return 0.0
-
-            # Calcular similaridade cosseno
-            emb1 = np.array(embeddings[0])
-            emb2 = np.array(embeddings[1])
-
-            similarity = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
-
-            return float(similarity)
+            return float(similarity[0, 0])
 
         except Exception as e:
             logger.error(f"Erro ao calcular similaridade: {e}")
             return 0.0
 
+    async def get_similarity_matrix(
+        self,
+        texts: List[str],
+        other_texts: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        exclude_self: bool = False,
+    ):
+        """
+        Calcula similaridades entre muitos textos de uma vez.
+
+        Args:
+            texts: Textos das linhas (ex.: queries)
+            other_texts: Textos das colunas; se None, compara ``texts`` entre si
+            top_k: Se informado, retorna apenas os ``top_k`` mais similares por linha
+            exclude_self: Ignorar a diagonal quando ``other_texts`` é None
+
+        Returns:
+            Matriz (n, m) de similaridades, ou tupla (índices, scores) com top_k
+        """
+        embeddings = await self.generate_embeddings_array(texts)
+        others = None
+        if other_texts is not None:
+            others = await self.generate_embeddings_array(other_texts)
+
+        # Vetores do modelo só são unitários com NORMALIZE_EMBEDDINGS
+        executor = get_inference_executor()
+        if top_k is not None:
+            return await executor.run(
+                top_k_similarity,
+                embeddings,
+                others,
+                k=top_k,
+                normalized=self.normalize,
+                exclude_self=exclude_self,
+            )
+        return await executor.run(
+            similarity_matrix, embeddings, others, normalized=self.normalize
+        )
+
     def get_dimension(self) -> int:
         """Retorna dimensão dos embeddings."""
         return self.vector_dimension
 
+    def get_cache_stats(self) -> dict:
+        """Retorna estatísticas do cache de embeddings."""
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
+
 
 class VectorStore:
     """Interface para armazenamento vetorial no PgVector."""
 
-    def __init__(self, db_connection):
+    def __init__(
+        self,
+        db_connection,
+        embeddings_gen: Optional[EmbeddingsGenerator] = None,
+        projection: Optional[VectorProjection] = None,
+        storage_precision: Optional[str] = None,
+        keyword_search=None,
+    ):
         """
         Inicializa store vetorial.
 
         Args:
             db_connection: Conexão com banco de dados
+            embeddings_gen: Gerador de embeddings (padrão: instância compartilhada)
+            projection: Redução de dimensão (padrão: configuração)
+            storage_precision: ``float32`` ou ``float16`` (padrão: configuração)
+            keyword_search: ``KeywordSearch`` cujo índice acompanha as gravações
+                (padrão: instância compartilhada do processo, com
+                ``KEYWORD_SEARCH_BACKEND=memory``)
         """
         self.db = db_connection
-        self.embeddings_gen = EmbeddingsGenerator()
+        self._keyword_search = keyword_search
+        self._embeddings_gen = embeddings_gen
+        self.projection = projection or VectorProjection.from_settings()
+        self.storage_precision = storage_precision or settings.vector_storage_precision
+        self.storage_dtype = np.float16 if self.storage_precision == "float16" else np.float32
+
+    def prepare_vectors(self, vectors: VectorsLike) -> np.ndarray:
+        """
+        Converte embeddings do modelo para o formato armazenado.
+
+        Aplica a projeção configurada e a precisão de armazenamento; usado
+        tanto nos chunks quanto nas queries, mantendo ambos no mesmo espaço.
+
+        Args:
+            vectors: Matriz (n, dim) ou vetor do modelo
+
+        Returns:
+            Matriz (n, dim armazenada) no dtype de armazenamento
+        """
+        projected = self.projection.transform(as_float32_vectors(vectors))
+        return projected.astype(self.storage_dtype, copy=False)
+
+    @property
+    def embeddings_gen(self) -> EmbeddingsGenerator:
+        """Gerador de embeddings, carregado sob demanda do registro de modelos."""
+        if self._embeddings_gen is None:
+            self._embeddings_gen = model_registry.get_embeddings_generator()
+        return self._embeddings_gen
+
+    @property
+    def keyword_search(self):
+        """Busca por palavra-chave com índice no processo (None com backend ``postgres``)."""
+        if self._keyword_search is None:
+            if settings.keyword_search_backend != "memory":
+                return None
+            # Import tardio: hybrid_search depende deste módulo
+            from app.rag.hybrid_search import get_keyword_search
+
+            self._keyword_search = get_keyword_search()
+        return self._keyword_search if self._keyword_search.backend == "memory" else None
+
+    async def _index_keywords(self, document_id: int, start_index: Optional[int] = None) -> None:
+        """
+        Atualiza o índice de palavras-chave após gravar chunks de um documento.
+
+        Args:
+            document_id: ID do documento
+            start_index: Indexar só chunks a partir deste ``chunk_index``
+                (inserção); ``None`` substitui todos os chunks do documento
+        """
+        keyword_search = self.keyword_search
+        if keyword_search is None:
+            return
+
+        chunks = await self.db.get_document_chunks(document_id, min_index=start_index or 0)
+        if start_index is None:
+            await keyword_search.replace_document(document_id, chunks)
+        else:
+            await keyword_search.index_chunks(chunks)
 
     async def add_vectors(
         self,
         document_id: int,
         chunks: List[dict],
-        embeddings: List[List[float]],
+        embeddings: VectorsLike,
+        start_index: int = 0,
     ) -> bool:
         """
         Adiciona vetores ao banco.
@@ -150,19 +653,34 @@ class VectorStore:
         Args:
             document_id: ID do documento
             chunks: Lista de chunks
-            embeddings: Lista de embeddings
+            embeddings: Matriz float32 (n, dim) ou lista de embeddings
+            start_index: ``chunk_index`` do primeiro chunk
 
         Returns:
             True se bem-sucedido
         """
         try:
+            embeddings = self.prepare_vectors(embeddings)
+
             if len(chunks) != len(embeddings):
                 raise ValueError("Número de chunks diferente de embeddings")
 
             logger.info(f"Adicionando {len(chunks)} vetores para documento {document_id}")
 
+            # Caminho em massa (COPY binário, uma transação) quando disponível
+            if hasattr(self.db, "add_chunks_bulk"):
+                await self.db.add_chunks_bulk(
+                    document_id=document_id,
+                    chunks=chunks,
+                    embeddings=embeddings,
+                    start_index=start_index,
+                )
+                await self._index_keywords(document_id, start_index)
+                logger.info(f"Vetores adicionados com sucesso")
+                return True
+
             # Inserir chunks com embeddings
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings), start=start_index):
                 await self.db.add_chunk(
                     document_id=document_id,
                     chunk_index=idx,
@@ -171,6 +689,7 @@ class VectorStore:
                     metadata=chunk.get("metadata", {}),
                 )
 
+            await self._index_keywords(document_id, start_index)
             logger.info(f"Vetores adicionados com sucesso")
             return True
 
@@ -178,8 +697,122 @@ class VectorStore:
             logger.error(f"Erro ao adicionar vetores: {e}")
             raise
 
+    async def add_vectors_stream(
+        self,
+        document_id: int,
+        chunks: Union[Iterable[dict], AsyncIterable[dict]],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[StreamProgress], None]] = None,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> int:
+        """
+        Gera embeddings e grava chunks em streaming (ingestão em massa).
+
+        Apenas os chunks dos batches em andamento ficam em memória, o que
+        permite ingerir milhões de linhas de CSV ou log.
+
+        Args:
+            document_id: ID do documento
+            chunks: Iterável de chunks (``{"content": ..., "metadata": ...}``)
+            batch_size: Chunks por batch
+            progress_callback: Chamado após cada batch gravado
+            cancel_event: Evento para interromper a ingestão
+
+        Returns:
+            Número de chunks gravados
+        """
+        pending: deque = deque()
+
+        async def contents():
+            if hasattr(chunks, "__aiter__"):
+                async for chunk in chunks:
+                    pending.append(chunk)
+                    yield chunk["content"]
+            else:
+                for chunk in chunks:
+                    pending.append(chunk)
+                    yield chunk["content"]
+
+        written = 0
+        stream = self.embeddings_gen.stream_embeddings(
+            contents(),
+            batch_size=batch_size,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event,
+        )
+        try:
+            async for batch in stream:
+                batch_chunks = [pending.popleft() for _ in range(len(batch.embeddings))]
+                await self.add_vectors(
+                    document_id, batch_chunks, batch.embeddings, start_index=batch.start_index
+                )
+                written += len(batch_chunks)
+        finally:
+            await stream.aclose()
+
+        logger.info(f"Ingestão em streaming gravou {written} chunks do documento {document_id}")
+        return written
+
+    async def upsert_vectors(self, document_id: int, chunks: List[dict]) -> dict:
+        """
+        Re-indexa um documento gravando apenas o que mudou.
+
+        Os hashes do conteúdo dos chunks são comparados com os armazenados:
+        chunks iguais são reaproveitados (sem novo embedding), chunks novos ou
+        alterados são embutidos e inseridos e os removidos são apagados.
+
+        Args:
+            document_id: ID do documento
+            chunks: Nova lista de chunks do documento, em ordem
+
+        Returns:
+            Contagens ``reused``, ``added``, ``deleted`` e ``repositioned``
+        """
+        try:
+            existing = await self.db.get_chunk_hashes(document_id)
+            diff = diff_chunks(existing, chunks)
+
+            embeddings = None
+            if diff.new_chunks:
+                embeddings = self.prepare_vectors(
+                    await self.embeddings_gen.generate_embeddings_array(
+                        [chunk["content"] for chunk in diff.new_chunks]
+                    )
+                )
+
+            if diff.new_chunks or diff.delete_ids or diff.updates:
+                await self.db.apply_chunk_changes(
+                    document_id=document_id,
+                    delete_ids=diff.delete_ids,
+                    updates=diff.updates,
+                    new_chunks=diff.new_chunks,
+                    embeddings=embeddings,
+                )
+                await self._index_keywords(document_id)
+
+            stats = {
+                "reused": diff.reused,
+                "added": len(diff.new_chunks),
+                "deleted": len(diff.delete_ids),
+                "repositioned": len(diff.updates),
+            }
+            logger.info(f"Re-indexação do documento {document_id}: {stats}")
+            return stats
+
+        except Exception as e:
+            logger.error(f"Erro ao re-indexar documento {document_id}: {e}")
+            raise
+
     async def search_similar(
-        self, query_embedding: List[float], top_k: int = 5, threshold: float = 0.7
+        self,
+        query_embedding: VectorLike,
+        top_k: int = 5,
+        threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
+        quantization: Optional[str] = None,
+        oversample: Optional[int] = None,
     ) -> List[dict]:
         """
         Busca vetores similares.
@@ -188,15 +821,32 @@ class VectorStore:
             query_embedding: Embedding da query
             top_k: Número de resultados
             threshold: Limiar de similaridade
+            ef_search: Largura da busca HNSW nesta query (troca recall por latência)
+            iterative_scan: Modo de iterative scan do HNSW (buscas filtradas)
+            filters: Restrições por documento, usuário, tipo de arquivo ou
+                metadados, aplicadas dentro da busca (não sobre o top-k)
+            quantization: Busca em dois estágios (``binary`` ou ``int8``):
+                candidatos pela cópia quantizada, reordenados em precisão
+                total; ``None`` usa ``QUANTIZED_SEARCH`` e ``""`` desativa
+            oversample: Candidatos por resultado no primeiro estágio
 
         Returns:
             Lista de resultados similares
         """
+        if quantization is None:
+            quantization = settings.quantized_search
         try:
             logger.info(f"Buscando {top_k} vetores similares")
 
             results = await self.db.search_similar_vectors(
-                embedding=query_embedding, top_k=top_k, threshold=threshold
+                embedding=self.prepare_vectors(query_embedding)[0],
+                top_k=top_k,
+                threshold=threshold,
+                ef_search=ef_search,
+                iterative_scan=iterative_scan,
+                filters=filters,
+                quantization=quantization or None,
+                oversample=oversample,
             )
 
             logger.info(f"Encontrados {len(results)} resultados similares")
@@ -221,6 +871,9 @@ class VectorStore:
 
             await self.db.delete_chunks(document_id)
 
+            if self.keyword_search is not None:
+                await self.keyword_search.remove_document(document_id)
+
             logger.info(f"Vetores deletados com sucesso")
             return True
 
@@ -236,3 +889,11 @@ class VectorStore:
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {e}")
             return {}
+
+    async def get_document_stats(self, document_id: int) -> dict:
+        """Retorna chunks (e bytes, no PgVector) de um documento."""
+        try:
+            return await self.db.get_document_stats(document_id)
+        except Exception as e:
+            logger.error(f"Erro ao obter estatísticas do documento {document_id}: {e}")
+            return {}
@@ -2,16 +2,27 @@
 Busca híbrida (semântica + palavra-chave) com re-ranking.
 """
 
+import asyncio
 import logging
-import re
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import threading
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Tuple, Union
+from dataclasses import dataclass, field
 
-from sentence_transformers import CrossEncoder
 from app.config import settings
+from app.db.database import get_database
+from app.db.search_filters import SearchFilters
+from app.rag.embeddings import VectorLike
+from app.rag.inference import get_inference_executor
+from app.rag.keyword_index import InvertedIndex, tokenize
+from app.rag.keyword_matrix import KeywordMatrix
+from app.rag.keyword_segments import SegmentedKeywordIndex
+from app.rag.model_registry import model_registry
 
 logger = logging.getLogger(__name__)
 
+KEYWORD_SEARCH_BACKENDS = ("memory", "postgres")
+
 
 @dataclass
 class SearchResult:
@@ -25,28 +36,204 @@ class SearchResult:
     metadata: Dict[str, Any]
 
 
+@dataclass
+class HybridSearchResponse:
+    """Resultados da busca híbrida e ramos que não responderam a tempo."""
+
+    results: List[SearchResult]
+    partial: bool = False
+    timed_out: List[str] = field(default_factory=list)
+
+
 class KeywordSearch:
-    """Busca por palavra-chave (BM25 ou regex)."""
+    """
+    Busca por palavra-chave.
 
-    def __init__(self):
-        """Inicializa busca por palavra-chave."""
+    Backends (``KEYWORD_SEARCH_BACKEND``):
+
+    - ``memory``: BM25 sobre segmentos no disco abertos via mmap em
+      ``KEYWORD_INDEX_PATH`` (compartilhados entre workers), ou sobre índice
+      invertido no processo com o caminho vazio (um só worker); o índice vazio
+      é preenchido a partir do banco na partida (``bootstrap``);
+    - ``postgres``: full-text no banco (``content_tsv`` com índice GIN,
+      ``ts_rank``), sem manter os chunks no processo da API.
+    """
+
+    def __init__(
+        self,
+        index: Optional[Union[InvertedIndex, SegmentedKeywordIndex]] = None,
+        backend: Optional[str] = None,
+        database=None,
+        matrix_path: Optional[str] = None,
+    ):
+        """
+        Inicializa busca por palavra-chave.
+
+        Args:
+            index: Índice invertido (padrão: segmentos em ``KEYWORD_INDEX_PATH``
+                ou índice vazio em memória, alimentado pelo ``VectorStore``
+                com ``index_chunks`` à medida que chunks são ingeridos)
+            backend: ``memory`` ou ``postgres`` (padrão: configuração)
+            database: Banco do backend ``postgres`` (padrão: ``get_database()``)
+            matrix_path: Snapshots da matriz BM25 de ``search_batch`` (padrão:
+                ``KEYWORD_MATRIX_PATH``; só com segmentos no disco, cuja
+                geração é compartilhada; vazio mantém a matriz só em memória)
+        """
         self.weight = settings.hybrid_search_weight_keyword
+        self.backend = backend or settings.keyword_search_backend
+        if self.backend not in KEYWORD_SEARCH_BACKENDS:
+            raise ValueError(f"Backend de busca por palavra-chave desconhecido: {self.backend}")
+        if index is None:
+            if self.backend == "memory" and settings.keyword_index_path:
+                index = SegmentedKeywordIndex(settings.keyword_index_path)
+            elif self.backend == "memory" and settings.api_workers > 1:
+                # Cada worker teria um índice próprio, com só os chunks que ele gravou
+                raise ValueError(
+                    "KEYWORD_INDEX_PATH vazio exige API_WORKERS=1 "
+                    f"(API_WORKERS={settings.api_workers})"
+                )
+            else:
+                index = InvertedIndex()
+        self.index = index
+        # Buscas rodam fora do event loop; alterações no índice esperam a busca em curso
+        self._index_lock = threading.Lock()
+        self._database = database
+        # Alterações feitas por este processo (a matriz BM25 é recalculada quando muda)
+        self._generation = 0
+
+        self.matrix_path = settings.keyword_matrix_path if matrix_path is None else matrix_path
+        self.matrix: Optional[KeywordMatrix] = None
+        self._matrix_generation: Optional[Tuple[int, Optional[int]]] = None
+        if self.backend == "memory" and self.matrix_path:
+            self._load_matrix()
+
+    @property
+    def database(self):
+        """Banco usado pelo backend ``postgres``."""
+        if self._database is None:
+            self._database = get_database()
+        if not hasattr(self._database, "keyword_search"):
+            raise ValueError("KEYWORD_SEARCH_BACKEND=postgres exige VECTOR_BACKEND=pgvector")
+        return self._database
+
+    # Alterações e buscas no índice rodam em threads (asyncio.to_thread): o
+    # _index_lock nunca é disputado no event loop, nem quando uma busca
+    # cancelada pelo prazo do HybridSearch ainda o segura
+
+    async def index_chunks(self, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Indexa chunks ingeridos (``id``, ``document_id``, ``content``, ``metadata``).
+
+        Returns:
+            Número de chunks indexados
+        """
+        return await asyncio.to_thread(self._locked, self.index.add_many, chunks)
+
+    async def remove_document(self, document_id: int) -> int:
+        """Remove do índice os chunks de um documento."""
+        return await asyncio.to_thread(self._locked, self.index.remove_document, document_id)
+
+    async def replace_document(self, document_id: int, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Substitui os chunks indexados de um documento (re-indexação).
+
+        Returns:
+            Número de chunks indexados
+        """
+        return await asyncio.to_thread(self._replace_document, document_id, chunks)
+
+    def _locked(self, fn, *args):
+        """Altera o índice com ``fn`` sob o lock (em thread)."""
+        with self._index_lock:
+            self._generation += 1
+            return fn(*args)
+
+    def _replace_document(self, document_id: int, chunks: List[Dict[str, Any]]) -> int:
+        """Remove e reindexa os chunks de um documento sob o lock (em thread)."""
+        with self._index_lock:
+            self._generation += 1
+            self.index.remove_document(document_id)
+            return self.index.add_many(chunks)
+
+    def _index_generation(self) -> Tuple[int, Optional[int]]:
+        """
+        Versão do índice: alterações deste processo e, com segmentos no disco,
+        a geração do manifesto publicado (inclui escritas de outros workers).
+        """
+        if isinstance(self.index, SegmentedKeywordIndex):
+            self.index.refresh()
+            return self._generation, self.index.generation
+        return self._generation, None
+
+    async def bootstrap(self, database=None, batch_size: int = 5000) -> int:
+        """
+        Preenche o índice vazio com os chunks já gravados no banco (partida).
+
+        Com segmentos no disco, só um worker preenche o índice
+        (``SegmentedKeywordIndex.bootstrapping``); os demais o veem crescer a
+        cada lote publicado.
+
+        Args:
+            database: Banco de origem (padrão: ``get_database()``)
+            batch_size: Chunks lidos e indexados por lote
+
+        Returns:
+            Número de chunks indexados
+        """
+        if self.backend != "memory":
+            return 0
+
+        database = database or get_database()
+        bootstrapping = getattr(self.index, "bootstrapping", None)
+        guard = bootstrapping() if bootstrapping else nullcontext(len(self.index) == 0)
+
+        # flock e leitura do manifesto fora do event loop
+        empty = await asyncio.to_thread(guard.__enter__)
+        indexed = 0
+        try:
+            if not empty:
+                return 0
+            after_id = 0
+            while True:
+                chunks = await database.get_chunks_after(after_id, batch_size)
+                if not chunks:
+                    break
+                indexed += await self.index_chunks(chunks)
+                after_id = chunks[-1]["id"]
+        finally:
+            await asyncio.to_thread(guard.__exit__, None, None, None)
+
+        logger.info(f"Índice de palavras-chave preenchido a partir do banco: {indexed} chunks")
+        return indexed
 
     async def search(
-        self, query: str, documents: List[Dict[str, Any]], top_k: int = 10
+        self,
+        query: str,
+        documents: Optional[List[Dict[str, Any]]] = None,
+        top_k: int = 10,
+        filters: Optional[SearchFilters] = None,
     ) -> List[SearchResult]:
         """
         Busca por palavras-chave.
 
         Args:
             query: Query de busca
-            documents: Lista de documentos
+            documents: Lista completa de chunks a considerar; quando informada,
+                o índice em memória é alinhado a ela (só chunks novos ou
+                alterados são tokenizados). Ignorada com o índice em disco
+                (``KEYWORD_INDEX_PATH``), que só é escrito nas gravações do
+                ``VectorStore``, fora do caminho das buscas. ``None`` usa o
+                índice como está
             top_k: Número de resultados
+            filters: Restrições aplicadas durante a busca no índice
 
         Returns:
             Lista de resultados
         """
         try:
+            if self.backend == "postgres":
+                return await self._search_database(query, top_k, filters)
+
             # Normalizar query
             query_terms = self._normalize_query(query)
 
@@ -56,59 +243,188 @@ class KeywordSearch:
 
             logger.info(f"Buscando por palavras-chave: {query_terms}")
 
-            results = []
-
-            for doc in documents:
-                content = doc.get("content", "").lower()
-                score = self._calculate_score(query_terms, content)
-
-                if score > 0:
-                    results.append(
-                        SearchResult(
-                            chunk_id=doc.get("id"),
-                            document_id=doc.get("document_id"),
-                            content=doc.get("content", ""),
-                            score=score * self.weight,
-                            search_type="keyword",
-                            metadata=doc.get("metadata", {}),
-                        )
-                    )
-
-            # Ordenar por score
-            results.sort(key=lambda x: x.score, reverse=True)
+            if not isinstance(self.index, InvertedIndex):
+                documents = None
+            accept = filters.matches if filters is not None and not filters.is_empty() else None
+            hits = await asyncio.to_thread(
+                self._search_index, documents, query_terms, top_k, accept
+            )
 
-            return results[:top_k]
+            return [
+                SearchResult(
+                    chunk_id=doc.get("id"),
+                    document_id=doc.get("document_id"),
+                    content=doc.get("content", ""),
+                    score=score * self.weight,
+                    search_type="keyword",
+                    metadata=doc.get("metadata", {}),
+                )
+                for score, doc in hits
+            ]
 
         except Exception as e:
             logger.error(f"Erro em busca por palavra-chave: {e}")
             return []
 
-    def _normalize_query(self, query: str) -> List[str]:
-        """Normaliza query em termos."""
-        # Remover pontuação e converter para minúsculas
-        query = re.sub(r"[^\w\s]", " ", query.lower())
-        terms = query.split()
+    def _search_index(
+        self,
+        documents: Optional[List[Dict[str, Any]]],
+        query_terms: List[str],
+        top_k: int,
+        accept,
+    ) -> list:
+        """Alinha o índice a ``documents`` (se informada) e busca o top-k, em thread."""
+        with self._index_lock:
+            if documents is not None:
+                added, removed = self.index.sync(documents)
+                if added or removed:
+                    self._generation += 1
+                    logger.info(f"Índice de palavras-chave: +{added} -{removed} chunks")
+            return self.index.search(query_terms, top_k, accept=accept)
+
+    def _load_matrix(self) -> None:
+        """Abre o snapshot da matriz se foi calculado na geração atual dos segmentos."""
+        try:
+            matrix = KeywordMatrix.load(self.matrix_path)
+        except Exception as e:
+            logger.warning(f"Erro ao abrir matriz BM25 em {self.matrix_path}: {e}")
+            return
+        generation = self._index_generation()
+        if matrix is not None and matrix.generation is not None and (
+            matrix.generation == generation[1]
+        ):
+            self.matrix = matrix
+            self._matrix_generation = generation
+
+    def _matrix_stale(self) -> bool:
+        """Indica se o índice mudou desde o cálculo da matriz (em thread)."""
+        with self._index_lock:
+            return self.matrix is None or self._matrix_generation != self._index_generation()
+
+    def build_matrix(self) -> KeywordMatrix:
+        """
+        Recalcula a matriz BM25 de ``search_batch`` a partir do índice.
+
+        Com ``matrix_path`` e segmentos no disco, grava e publica um novo
+        snapshot com a geração do índice; workers que o abrirem na mesma
+        geração passam a usá-lo sem recalcular.
+
+        Returns:
+            Matriz calculada
+        """
+        with self._index_lock:
+            generation = self._index_generation()
+            matrix = KeywordMatrix.build(self.index.records(), k1=self.index.k1, b=self.index.b)
+        matrix.generation = generation[1]
+        if self.matrix_path and matrix.generation is not None:
+            try:
+                matrix.save(self.matrix_path)
+            except OSError as e:
+                logger.warning(f"Erro ao gravar matriz BM25 em {self.matrix_path}: {e}")
+        self.matrix = matrix
+        self._matrix_generation = generation
+        return matrix
+
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchResult]]:
+        """
+        Busca por palavras-chave para várias queries de uma vez.
 
-        # Remover stopwords comuns
-        stopwords = {"o", "a", "de", "em", "para", "com", "por", "e", "ou", "é", "que"}
-        terms = [t for t in terms if t not in stopwords and len(t) > 2]
+        Os scores vêm de um único produto esparso com a matriz BM25 (aberta
+        do snapshot ou calculada do índice), recalculada quando a geração do
+        índice muda. Com o backend ``postgres``, índice vazio ou filtros além
+        de ``document_ids``, cada query é buscada com ``search``.
 
-        return terms
+        Args:
+            queries: Queries de busca
+            top_k: Resultados por query
+            filters: Restrições (apenas ``document_ids`` no caminho em lote)
 
-    def _calculate_score(self, query_terms: List[str], content: str) -> float:
-        """Calcula score BM25 simplificado."""
-        score = 0.0
-        content_lower = content.lower()
+        Returns:
+            Lista de resultados de cada query, na ordem das queries
+        """
+        try:
+            batched = self.backend == "memory" and not (
+                filters is not None and filters.needs_record
+            )
+            if batched and await asyncio.to_thread(self._matrix_stale):
+                if len(self.index):
+                    await asyncio.to_thread(self.build_matrix)
+                else:
+                    self.matrix = None
+
+            if not batched or self.matrix is None:
+                return list(
+                    await asyncio.gather(
+                        *(self.search(query, top_k=top_k, filters=filters) for query in queries)
+                    )
+                )
 
-        for term in query_terms:
-            # Contar ocorrências
-            count = content_lower.count(term)
+            logger.info(f"Buscando {len(queries)} queries por palavras-chave em lote")
+            document_ids = filters.document_ids if filters is not None else None
+            batches = await asyncio.to_thread(
+                self.matrix.score_batch,
+                [self._normalize_query(query) for query in queries],
+                top_k,
+                document_ids,
+            )
 
-            if count > 0:
-                # BM25 simplificado
-                score += count / (1 + count * 0.1)
+            results = []
+            for hits in batches:
+                query_results = []
+                for score, chunk_id, document_id in hits:
+                    record = self.index.record(chunk_id)
+                    if record is None:
+                        # Removido do índice depois do cálculo da matriz
+                        continue
+                    query_results.append(
+                        SearchResult(
+                            chunk_id=chunk_id,
+                            document_id=document_id,
+                            content=record.get("content", ""),
+                            score=score * self.weight,
+                            search_type="keyword",
+                            metadata=record.get("metadata", {}),
+                        )
+                    )
+                results.append(query_results)
+            return results
+
+        except Exception as e:
+            logger.error(f"Erro em busca em lote por palavra-chave: {e}")
+            return [[] for _ in queries]
 
-        return score
+    async def _search_database(
+        self, query: str, top_k: int, filters: Optional[SearchFilters]
+    ) -> List[SearchResult]:
+        """Busca full-text no PostgreSQL (``documents`` é ignorado)."""
+        query_terms = self._normalize_query(query)
+        if not query_terms:
+            logger.warning("Query vazia após normalização")
+            return []
+
+        logger.info(f"Buscando por palavras-chave no banco: {query_terms}")
+        rows = await self.database.keyword_search(query_terms, top_k=top_k, filters=filters)
+
+        return [
+            SearchResult(
+                chunk_id=row["id"],
+                document_id=row["document_id"],
+                content=row["content"],
+                score=row["score"] * self.weight,
+                search_type="keyword",
+                metadata=row.get("metadata") or {},
+            )
+            for row in rows
+        ]
+
+    def _normalize_query(self, query: str) -> List[str]:
+        """Normaliza query em termos (mesma tokenização dos chunks)."""
+        return tokenize(query)
 
 
 class SemanticSearch:
@@ -120,10 +436,13 @@ class SemanticSearch:
 
     async def search(
         self,
-        query_embedding: List[float],
+        query_embedding: VectorLike,
         vector_store,
         top_k: int = 10,
         threshold: float = 0.7,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
     ) -> List[SearchResult]:
         """
         Busca semântica usando embeddings.
@@ -133,6 +452,9 @@ class SemanticSearch:
             vector_store: Store vetorial
             top_k: Número de resultados
             threshold: Limiar de similaridade
+            ef_search: Largura da busca HNSW nesta query
+            iterative_scan: Modo de iterative scan do HNSW
+            filters: Filtros aplicados dentro da busca vetorial
 
         Returns:
             Lista de resultados
@@ -141,7 +463,12 @@ class SemanticSearch:
             logger.info(f"Buscando semanticamente (top_k={top_k})")
 
             results_raw = await vector_store.search_similar(
-                query_embedding=query_embedding, top_k=top_k, threshold=threshold
+                query_embedding=query_embedding,
+                top_k=top_k,
+                threshold=threshold,
+                ef_search=ef_search,
+                iterative_scan=iterative_scan,
+                filters=filters,
             )
 
             results = []
@@ -170,59 +497,151 @@ class HybridSearch:
 
     def __init__(self):
         """Inicializa busca híbrida."""
-        self.keyword_search = KeywordSearch()
+        self.keyword_search = get_keyword_search()
         self.semantic_search = SemanticSearch()
+
+        # Prazo de cada ramo, em segundos (0 = sem prazo)
+        self.semantic_timeout = settings.hybrid_semantic_timeout
+        self.keyword_timeout = settings.hybrid_keyword_timeout
+
+        # Modelo de re-ranking carregado sob demanda (registro compartilhado)
         self.reranker = None
+        self._reranker_failed = False
+
+    async def _get_reranker(self):
+        """Retorna cross-encoder, carregando-o na primeira chamada."""
+        if self.reranker is None and not self._reranker_failed:
+            try:
+                logger.info(f"Carregando modelo de re-ranking: {settings.rerank_model}")
+                self.reranker = await get_inference_executor().run(
+                    model_registry.get_cross_encoder, settings.rerank_model
+                )
+                logger.info("Modelo de re-ranking carregado com sucesso")
+            except Exception as e:
+                self._reranker_failed = True
+                logger.warning(f"Erro ao carregar re-ranker: {e}. Continuando sem re-ranking.")
 
-        # Carregar modelo de re-ranking
-        try:
-            logger.info(f"Carregando modelo de re-ranking: {settings.rerank_model}")
-            self.reranker = CrossEncoder(settings.rerank_model)
-            logger.info("Modelo de re-ranking carregado com sucesso")
-        except Exception as e:
-            logger.warning(f"Erro ao carregar re-ranker: {e}. Continuando sem re-ranking.")
+        return self.reranker
 
     async def search(
         self,
         query: str,
-        query_embedding: List[float],
+        query_embedding: VectorLike,
         vector_store,
-        keyword_documents: List[Dict[str, Any]],
+        keyword_documents: Optional[List[Dict[str, Any]]] = None,
         top_k: int = 5,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
     ) -> List[SearchResult]:
         """
         Busca híbrida combinando semântica e palavra-chave.
 
+        Mesmos argumentos de ``search_with_metadata``; retorna só os resultados.
+
+        Returns:
+            Lista de resultados ordenados
+        """
+        response = await self.search_with_metadata(
+            query=query,
+            query_embedding=query_embedding,
+            vector_store=vector_store,
+            keyword_documents=keyword_documents,
+            top_k=top_k,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+            filters=filters,
+        )
+        return response.results
+
+    async def search_with_metadata(
+        self,
+        query: str,
+        query_embedding: VectorLike,
+        vector_store,
+        keyword_documents: Optional[List[Dict[str, Any]]] = None,
+        top_k: int = 5,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> HybridSearchResponse:
+        """
+        Busca híbrida com as duas buscas em paralelo, cada uma com seu prazo.
+
+        A latência fica limitada pelo ramo mais lento (e pelos prazos
+        ``HYBRID_SEMANTIC_TIMEOUT`` / ``HYBRID_KEYWORD_TIMEOUT``); um ramo que
+        estoura o prazo é descartado e a resposta usa só o outro, marcada como
+        parcial.
+
         Args:
             query: Query de busca
             query_embedding: Embedding da query
             vector_store: Store vetorial
-            keyword_documents: Documentos para busca por palavra-chave
+            keyword_documents: Chunks para busca por palavra-chave; ``None`` usa
+                o índice alimentado pelo ``VectorStore`` nas gravações
             top_k: Número de resultados finais
+            ef_search: Largura da busca HNSW (troca recall por latência)
+            iterative_scan: Modo de iterative scan do HNSW (buscas filtradas)
+            filters: Restrições por documento, usuário, tipo de arquivo ou
+                metadados (aplicadas nas duas buscas; no índice em memória,
+                usuário e tipo de arquivo via documentos do ramo semântico)
 
         Returns:
-            Lista de resultados ordenados
+            Resultados ordenados, com ``partial`` e os ramos em ``timed_out``
         """
         try:
             logger.info("Iniciando busca híbrida")
 
-            # Busca semântica
-            semantic_results = await self.semantic_search.search(
-                query_embedding=query_embedding,
-                vector_store=vector_store,
-                top_k=top_k * 2,
+            # O índice em memória não conhece a tabela documents: usuário e tipo
+            # de arquivo são conferidos pelos documentos do ramo semântico
+            post_filter = (
+                filters is not None
+                and filters.has_document_filters
+                and self.keyword_search.backend == "memory"
             )
-
-            # Busca por palavra-chave
-            keyword_results = await self.keyword_search.search(
-                query=query, documents=keyword_documents, top_k=top_k * 2
+            keyword_filters = filters.chunk_filters() if post_filter else filters
+
+            semantic_results, keyword_results = await asyncio.gather(
+                self._run_branch(
+                    "semantic",
+                    self.semantic_search.search(
+                        query_embedding=query_embedding,
+                        vector_store=vector_store,
+                        top_k=top_k * 2,
+                        ef_search=ef_search,
+                        iterative_scan=iterative_scan,
+                        filters=filters,
+                    ),
+                    self.semantic_timeout,
+                ),
+                self._run_branch(
+                    "keyword",
+                    self.keyword_search.search(
+                        query=query,
+                        documents=keyword_documents,
+                        top_k=top_k * 2,
+                        filters=keyword_filters,
+                    ),
+                    self.keyword_timeout,
+                ),
             )
+            timed_out = [
+                name
+                for name, results in (("semantic", semantic_results), ("keyword", keyword_results))
+                if results is None
+            ]
+
+            if post_filter and keyword_results:
+                allowed = {result.document_id for result in semantic_results or []}
+                keyword_results = [
+                    result for result in keyword_results if result.document_id in allowed
+                ]
 
             # Combinar resultados
-            combined_results = self._combine_results(semantic_results, keyword_results)
+            combined_results = self._combine_results(semantic_results or [], keyword_results or [])
 
             # Re-ranking
-            if self.reranker and combined_results:
+            if combined_results:
                 combined_results = await self._rerank_results(query, combined_results)
 
             # Ordenar e retornar top_k
@@ -230,11 +649,28 @@ class HybridSearch:
 
             logger.info(f"Busca híbrida retornou {len(combined_results[:top_k])} resultados")
 
-            return combined_results[:top_k]
+            return HybridSearchResponse(
+                results=combined_results[:top_k], partial=bool(timed_out), timed_out=timed_out
+            )
 
         except Exception as e:
             logger.error(f"Erro em busca híbrida: {e}")
-            return []
+            return HybridSearchResponse(results=[])
+
+    async def _run_branch(
+        self, name: str, search, timeout: float
+    ) -> Optional[List[SearchResult]]:
+        """
+        Aguarda um ramo da busca até ``timeout`` segundos (0 = sem prazo).
+
+        Returns:
+            Resultados do ramo, ou None se o prazo estourou
+        """
+        try:
+            return await asyncio.wait_for(search, timeout if timeout > 0 else None)
+        except asyncio.TimeoutError:
+            logger.warning(f"Ramo {name} da busca híbrida excedeu {timeout}s; seguindo sem ele")
+            return None
 
     def _combine_results(
         self, semantic_results: List[SearchResult], keyword_results: List[SearchResult]
@@ -265,7 +701,8 @@ class HybridSearch:
     ) -> List[SearchResult]:
         """Re-ranking usando cross-encoder."""
         try:
-            if not self.reranker or not results:
+            reranker = await self._get_reranker()
+            if not reranker or not results:
                 return results
 
             logger.info(f"Re-ranking {len(results)} resultados")
@@ -273,8 +710,8 @@ class HybridSearch:
             # Preparar pares query-documento
             pairs = [(query, result.content) for result in results]
 
-            # Calcular scores
-            scores = self.reranker.predict(pairs)
+            # Calcular scores (fora do event loop)
+            scores = await get_inference_executor().run(reranker.predict, pairs)
 
             # Atualizar scores dos resultados
             for result, score in zip(results, scores):
@@ -287,3 +724,20 @@ class HybridSearch:
         except Exception as e:
             logger.error(f"Erro ao re-rankear resultados: {e}")
             return results
+
+
+_keyword_search: Optional[KeywordSearch] = None
+
+
+def get_keyword_search() -> KeywordSearch:
+    """
+    Retorna a busca por palavra-chave compartilhada pelo processo.
+
+    O ``VectorStore`` alimenta o índice desta instância ao gravar chunks e o
+    ``HybridSearch`` consulta o mesmo índice.
+    """
+    global _keyword_search
+
+    if _keyword_search is None:
+        _keyword_search = KeywordSearch()
+    return _keyword_search
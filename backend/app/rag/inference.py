@@ -0,0 +1,146 @@
+"""
+Executor dedicado para inferência de modelos.
+
+``SentenceTransformer.encode`` e ``CrossEncoder.predict`` são chamadas síncronas
+e pesadas; executá-las diretamente em uma corrotina bloqueia todo o event loop
+do worker (inclusive ``/health``). O ``InferenceExecutor`` roda essas chamadas
+em um pool de threads limitado e expõe métricas de fila e de espera.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """Pool de threads limitado para inferência, com métricas."""
+
+    def __init__(self, max_workers: int = 1, max_queue_size: int = 64):
+        """
+        Inicializa executor de inferência.
+
+        Args:
+            max_workers: Número de threads de inferência
+            max_queue_size: Máximo de chamadas aguardando thread livre
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference"
+        )
+        # Limita chamadas em voo (executando + enfileiradas); excedentes
+        # aguardam de forma assíncrona, sem bloquear o event loop
+        self._slots = asyncio.Semaphore(self.max_workers + self.max_queue_size)
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._waits = deque(maxlen=1000)
+        self._max_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa função de inferência no pool.
+
+        Args:
+            fn: Função síncrona (ex.: ``model.encode``)
+            *args: Argumentos posicionais
+            **kwargs: Argumentos nomeados
+
+        Returns:
+            Resultado de ``fn``
+        """
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+        def task():
+            wait = time.perf_counter() - submitted
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._waits.append(wait)
+                self._max_wait = max(self._max_wait, wait)
+
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+            return result
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, task)
+        finally:
+            self._slots.release()
+
+    def get_stats(self) -> dict:
+        """Retorna métricas de fila e de espera."""
+        with self._lock:
+            waits_ms = np.array(self._waits) * 1000
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_ms_avg": float(waits_ms.mean()) if len(waits_ms) else 0.0,
+                "wait_ms_p95": float(np.percentile(waits_ms, 95)) if len(waits_ms) else 0.0,
+                "wait_ms_max": self._max_wait * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Encerra o pool de threads."""
+        self._executor.shutdown(wait=wait)
+
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Retorna executor de inferência compartilhado pelo processo."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                logger.info(
+                    f"Criando executor de inferência "
+                    f"(threads={settings.inference_threads}, "
+                    f"fila={settings.inference_max_queue_size})"
+                )
+                _executor = InferenceExecutor(
+                    max_workers=settings.inference_threads,
+                    max_queue_size=settings.inference_max_queue_size,
+                )
+
+    return _executor
@@ -0,0 +1,331 @@
+"""
+Índice invertido BM25 para a busca por palavra-chave.
+
+Cada chunk indexado recebe um número interno sequencial; as listas de
+postings (número do chunk, frequência do termo) ficam, portanto, sempre
+ordenadas e crescem por append quando chunks são ingeridos. Remoções marcam o
+chunk como apagado (tombstone) e descontam a frequência de documento dos seus
+termos; as listas são compactadas quando os tombstones passam de
+``COMPACT_RATIO`` das postings.
+
+A busca top-k usa MaxScore: os termos são ordenados pelo limite superior da
+sua contribuição BM25; enquanto a soma dos limites dos termos de menor
+contribuição não alcança o k-ésimo score, esses termos são "não essenciais"
+e só são consultados (por busca binária) para candidatos vindos dos termos
+essenciais, com poda assim que o score parcial mais o limite restante não
+supera o k-ésimo.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+STOPWORDS = frozenset({"o", "a", "de", "em", "para", "com", "por", "e", "ou", "é", "que"})
+
+# Fração de postings apagadas que dispara a compactação
+COMPACT_RATIO = 0.25
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Termos de um texto: palavras inteiras em minúsculas, sem stopwords e com
+    mais de 2 caracteres (mesma normalização para chunks e queries).
+    """
+    return [
+        term
+        for term in _TOKEN_RE.findall(text.lower())
+        if len(term) > 2 and term not in STOPWORDS
+    ]
+
+
+class InvertedIndex:
+    """Índice invertido em memória com atualização incremental e top-k BM25."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Inicializa índice vazio.
+
+        Args:
+            k1: Saturação da frequência do termo
+            b: Peso da normalização pelo tamanho do chunk
+        """
+        self.k1 = k1
+        self.b = b
+
+        # Postings por termo: números de chunk (crescentes) e frequências
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._df: Dict[str, int] = {}
+        self._max_tf: Dict[str, int] = {}
+
+        # Por número de chunk; ``None`` em ``_lengths`` marca chunk apagado
+        self._lengths: List[Optional[int]] = []
+        self._records: List[Optional[Dict[str, Any]]] = []
+        self._terms: List[Optional[Tuple[str, ...]]] = []
+        self._number: Dict[int, int] = {}
+        self._by_document: Dict[int, Set[int]] = {}
+
+        self._total_length = 0
+        self._dead_postings = 0
+        self._live_postings = 0
+
+    def __len__(self) -> int:
+        return len(self._number)
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return chunk_id in self._number
+
+    def record(self, chunk_id: int) -> Optional[Dict[str, Any]]:
+        """Registro indexado de um chunk, ou None."""
+        number = self._number.get(chunk_id)
+        return None if number is None else self._records[number]
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Itera os registros indexados (vivos), em ordem de indexação."""
+        return (record for record in self._records if record is not None)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """
+        Indexa (ou re-indexa) um chunk.
+
+        Args:
+            record: Registro com ``id``, ``document_id``, ``content`` e ``metadata``
+        """
+        chunk_id = record["id"]
+        if chunk_id in self._number:
+            self.remove([chunk_id])
+
+        frequencies = Counter(tokenize(record.get("content", "")))
+        number = len(self._lengths)
+        length = sum(frequencies.values())
+
+        for term, tf in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = ([], [])
+            postings[0].append(number)
+            postings[1].append(tf)
+            self._df[term] = self._df.get(term, 0) + 1
+            if tf > self._max_tf.get(term, 0):
+                self._max_tf[term] = tf
+
+        self._lengths.append(length)
+        self._records.append(record)
+        self._terms.append(tuple(frequencies))
+        self._number[chunk_id] = number
+        self._by_document.setdefault(record.get("document_id"), set()).add(chunk_id)
+        self._total_length += length
+        self._live_postings += len(frequencies)
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Indexa vários chunks; retorna quantos foram indexados."""
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+        return count
+
+    def remove(self, chunk_ids: Iterable[int]) -> int:
+        """
+        Remove chunks (tombstone; compacta se necessário).
+
+        Returns:
+            Número de chunks removidos
+        """
+        removed = 0
+        for chunk_id in chunk_ids:
+            number = self._number.pop(chunk_id, None)
+            if number is None:
+                continue
+            terms = self._terms[number]
+            for term in terms:
+                self._df[term] -= 1
+            self._total_length -= self._lengths[number]
+            self._dead_postings += len(terms)
+            self._live_postings -= len(terms)
+
+            document_id = self._records[number].get("document_id")
+            siblings = self._by_document.get(document_id)
+            if siblings is not None:
+                siblings.discard(chunk_id)
+                if not siblings:
+                    del self._by_document[document_id]
+
+            self._lengths[number] = None
+            self._records[number] = None
+            self._terms[number] = None
+            removed += 1
+
+        if self._dead_postings > COMPACT_RATIO * (self._dead_postings + self._live_postings):
+            self.compact()
+        return removed
+
+    def remove_document(self, document_id: int) -> int:
+        """Remove todos os chunks de um documento."""
+        return self.remove(list(self._by_document.get(document_id, ())))
+
+    def sync(self, records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Alinha o índice a uma lista completa de chunks.
+
+        Só chunks novos ou com conteúdo alterado são tokenizados; chunks
+        ausentes da lista são removidos.
+
+        Returns:
+            Tupla (indexados, removidos)
+        """
+        seen = set()
+        added = 0
+        for record in records:
+            chunk_id = record["id"]
+            seen.add(chunk_id)
+            current = self.record(chunk_id)
+            if current is None or current.get("content") != record.get("content"):
+                self.add(record)
+                added += 1
+            elif current is not record:
+                # Metadados podem mudar sem alterar os termos
+                self._records[self._number[chunk_id]] = record
+
+        stale = [chunk_id for chunk_id in self._number if chunk_id not in seen]
+        return added, self.remove(stale)
+
+    def compact(self) -> None:
+        """Descarta postings de chunks apagados e recalcula os limites por termo."""
+        lengths = self._lengths
+        for term in list(self._postings):
+            numbers, tfs = self._postings[term]
+            kept = [(n, tf) for n, tf in zip(numbers, tfs) if lengths[n] is not None]
+            if not kept:
+                del self._postings[term], self._df[term], self._max_tf[term]
+                continue
+            self._postings[term] = ([n for n, _ in kept], [tf for _, tf in kept])
+            self._max_tf[term] = max(tf for _, tf in kept)
+        self._dead_postings = 0
+
+    def _idf(self, term: str) -> float:
+        """IDF BM25 (sempre positivo)."""
+        df = self._df[term]
+        return math.log(1.0 + (len(self._number) - df + 0.5) / (df + 0.5))
+
+    def search(
+        self,
+        terms: List[str],
+        top_k: int,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Top-k BM25 com poda MaxScore.
+
+        Args:
+            terms: Termos da query (``tokenize``)
+            top_k: Número de resultados
+            accept: Predicado sobre o registro (filtros); rejeitados não contam
+                para o top-k
+
+        Returns:
+            Lista de (score, registro), do maior para o menor score
+        """
+        query = [term for term in dict.fromkeys(terms) if self._df.get(term, 0) > 0]
+        if not query or top_k <= 0:
+            return []
+
+        k1, b = self.k1, self.b
+        lengths = self._lengths
+        norm_scale = k1 * b / (self._total_length / len(self._number))
+        norm_base = k1 * (1.0 - b)
+
+        # (números, frequências, idf * (k1 + 1), limite superior), por limite crescente
+        lists = []
+        for term in query:
+            weight = self._idf(term) * (k1 + 1.0)
+            max_tf = self._max_tf[term]
+            # Limite com tamanho zero: vale para qualquer chunk da lista
+            bound = weight * max_tf / (max_tf + norm_base)
+            numbers, tfs = self._postings[term]
+            lists.append((numbers, tfs, weight, bound))
+        lists.sort(key=lambda entry: entry[3])
+
+        prefix = []
+        total = 0.0
+        for entry in lists:
+            total += entry[3]
+            prefix.append(total)
+
+        pointers = [0] * len(lists)
+        heap: List[Tuple[float, int]] = []
+        threshold = 0.0
+        essential = 0
+
+        while True:
+            if len(heap) == top_k:
+                while essential < len(lists) and prefix[essential] <= threshold:
+                    essential += 1
+                if essential == len(lists):
+                    break
+
+            current = None
+            for i in range(essential, len(lists)):
+                numbers = lists[i][0]
+                if pointers[i] < len(numbers) and (
+                    current is None or numbers[pointers[i]] < current
+                ):
+                    current = numbers[pointers[i]]
+            if current is None:
+                break
+
+            length = lengths[current]
+            norm = 0.0 if length is None else norm_base + norm_scale * length
+            score = 0.0
+            for i in range(essential, len(lists)):
+                numbers, tfs, weight, _ = lists[i]
+                position = pointers[i]
+                if position < len(numbers) and numbers[position] == current:
+                    tf = tfs[position]
+                    score += weight * tf / (tf + norm)
+                    pointers[i] = position + 1
+
+            if length is None:
+                continue
+            record = self._records[current]
+            if accept is not None and not accept(record):
+                continue
+
+            # Termos não essenciais, do maior limite para o menor
+            for i in range(essential - 1, -1, -1):
+                if len(heap) == top_k and score + prefix[i] <= threshold:
+                    break
+                numbers, tfs, weight, _ = lists[i]
+                position = bisect_left(numbers, current, pointers[i])
+                pointers[i] = position
+                if position < len(numbers) and numbers[position] == current:
+                    tf = tfs[position]
+                    score += weight * tf / (tf + norm)
+
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, current))
+            elif score > threshold:
+                heapq.heapreplace(heap, (score, current))
+            else:
+                continue
+            if len(heap) == top_k:
+                threshold = heap[0][0]
+
+        return [
+            (score, self._records[number])
+            for score, number in sorted(heap, key=lambda item: (-item[0], item[1]))
+        ]
+
+    def get_stats(self) -> dict:
+        """Tamanho do índice."""
+        return {
+            "chunks": len(self._number),
+            "terms": len(self._postings),
+            "postings": self._live_postings,
+            "deleted_postings": self._dead_postings,
+            "avg_length": self._total_length / len(self._number) if self._number else 0.0,
+        }
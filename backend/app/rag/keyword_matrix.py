@@ -0,0 +1,252 @@
+"""
+Matriz esparsa de pesos BM25 para pontuar lotes de queries.
+
+A matriz CSR tem uma linha por termo do vocabulário e uma coluna por chunk;
+cada valor é a contribuição BM25 do termo no chunk (IDF, saturação e
+normalização pelo tamanho já aplicadas). Um lote de queries vira uma matriz
+esparsa (queries x termos) com 1 em cada termo da query: um único produto
+esparso devolve os scores (queries x chunks), iguais aos do
+``InvertedIndex``, e o top-k de cada query sai de ``argpartition`` sobre os
+valores não nulos da linha.
+
+A matriz é uma fotografia do corpus: ``save`` grava arrays ``.npy`` em um
+snapshot versionado (mesmo esquema de ``CURRENT`` dos backends vetoriais) e
+``load`` os abre com ``mmap``, compartilhando as páginas entre os workers.
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.db.chunk_records import current_snapshot_dir, new_snapshot_dir, publish_snapshot
+from app.rag.keyword_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordMatrix:
+    """Pesos BM25 do corpus em CSR (termos x chunks), somente leitura."""
+
+    def __init__(
+        self,
+        weights: sparse.csr_matrix,
+        vocabulary: List[str],
+        chunk_ids: np.ndarray,
+        document_ids: np.ndarray,
+        generation: Optional[int] = None,
+    ):
+        """
+        Inicializa a partir de arrays já calculados (use ``build`` ou ``load``).
+
+        Args:
+            weights: Matriz CSR (termos x chunks) float32
+            vocabulary: Termo de cada linha
+            chunk_ids: ID do chunk de cada coluna
+            document_ids: ID do documento de cada coluna
+            generation: Geração do índice de origem (``SegmentedKeywordIndex``),
+                gravada no snapshot para que outros workers saibam se está atual
+        """
+        self.generation = generation
+        self.weights = weights
+        self.vocabulary = vocabulary
+        self.terms = {term: row for row, term in enumerate(vocabulary)}
+        self.chunk_ids = chunk_ids
+        self.document_ids = document_ids
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def build(
+        cls, records: Iterable[Dict[str, Any]], k1: float = 1.2, b: float = 0.75
+    ) -> "KeywordMatrix":
+        """
+        Calcula a matriz a partir dos chunks.
+
+        Args:
+            records: Registros com ``id``, ``document_id`` e ``content``
+            k1: Saturação da frequência do termo
+            b: Peso da normalização pelo tamanho do chunk
+
+        Returns:
+            Matriz pronta para ``score_batch``
+        """
+        terms: Dict[str, int] = {}
+        rows: List[int] = []
+        columns: List[int] = []
+        tfs: List[int] = []
+        chunk_ids: List[int] = []
+        document_ids: List[int] = []
+        lengths: List[int] = []
+
+        for column, record in enumerate(records):
+            frequencies = Counter(tokenize(record.get("content", "")))
+            for term, tf in frequencies.items():
+                rows.append(terms.setdefault(term, len(terms)))
+                columns.append(column)
+                tfs.append(tf)
+            chunk_ids.append(record["id"])
+            document_ids.append(record.get("document_id") or 0)
+            lengths.append(sum(frequencies.values()))
+
+        count = len(chunk_ids)
+        rows_array = np.asarray(rows, dtype=np.int64)
+        columns_array = np.asarray(columns, dtype=np.int64)
+        tf_array = np.asarray(tfs, dtype=np.float32)
+        length_array = np.asarray(lengths, dtype=np.float32)
+
+        df = np.bincount(rows_array, minlength=len(terms)).astype(np.float32)
+        idf = np.log1p((count - df + 0.5) / (df + 0.5)).astype(np.float32)
+        average = float(length_array.mean()) if count else 0.0
+        norm = k1 * (1.0 - b + b * length_array / average) if average else np.full(count, k1)
+
+        values = idf[rows_array] * (k1 + 1.0) * tf_array / (tf_array + norm[columns_array])
+        weights = sparse.csr_matrix(
+            (values.astype(np.float32), (rows_array, columns_array)),
+            shape=(len(terms), count),
+            dtype=np.float32,
+        )
+        weights.sort_indices()
+
+        vocabulary = [""] * len(terms)
+        for term, row in terms.items():
+            vocabulary[row] = term
+
+        logger.info(f"Matriz BM25: {len(vocabulary)} termos x {count} chunks, {weights.nnz} pesos")
+        return cls(
+            _canonical(weights),
+            vocabulary,
+            np.asarray(chunk_ids, dtype=np.int64),
+            np.asarray(document_ids, dtype=np.int64),
+        )
+
+    def query_matrix(self, queries: Sequence[Sequence[str]]) -> sparse.csr_matrix:
+        """Queries (termos tokenizados) como matriz CSR (queries x termos)."""
+        indptr = [0]
+        indices: List[int] = []
+        for terms in queries:
+            rows = {self.terms[term] for term in terms if term in self.terms}
+            indices.extend(sorted(rows))
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(queries), len(self.vocabulary)),
+        )
+
+    def score_batch(
+        self,
+        queries: Sequence[Sequence[str]],
+        top_k: int,
+        document_ids: Optional[Sequence[int]] = None,
+    ) -> List[List[Tuple[float, int, int]]]:
+        """
+        Top-k BM25 de várias queries com um único produto esparso.
+
+        Args:
+            queries: Termos de cada query (``tokenize``)
+            top_k: Resultados por query
+            document_ids: Restringir a estes documentos
+
+        Returns:
+            Por query, lista de (score, chunk_id, document_id) do maior score
+            para o menor
+        """
+        scores = (self.query_matrix(queries) @ self.weights).tocsr()
+
+        allowed = None
+        if document_ids is not None:
+            allowed = np.isin(self.document_ids, np.asarray(list(document_ids), dtype=np.int64))
+
+        results = []
+        for i in range(len(queries)):
+            start, end = scores.indptr[i], scores.indptr[i + 1]
+            columns = scores.indices[start:end]
+            values = scores.data[start:end]
+            if allowed is not None:
+                keep = allowed[columns]
+                columns, values = columns[keep], values[keep]
+
+            count = min(top_k, len(values))
+            if count <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-values, count - 1)[:count]
+            top = top[np.argsort(-values[top], kind="stable")]
+            results.append(
+                [
+                    (float(values[j]), int(self.chunk_ids[columns[j]]),
+                     int(self.document_ids[columns[j]]))
+                    for j in top
+                ]
+            )
+        return results
+
+    def save(self, root: str) -> str:
+        """
+        Grava a matriz como novo snapshot em ``root`` e o publica.
+
+        Returns:
+            Diretório do snapshot
+        """
+        directory = new_snapshot_dir(root)
+        np.save(os.path.join(directory, "indptr.npy"), self.weights.indptr)
+        np.save(os.path.join(directory, "indices.npy"), self.weights.indices)
+        np.save(os.path.join(directory, "data.npy"), self.weights.data)
+        np.save(os.path.join(directory, "chunk_ids.npy"), self.chunk_ids)
+        np.save(os.path.join(directory, "document_ids.npy"), self.document_ids)
+        with open(os.path.join(directory, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocabulary, f, ensure_ascii=False)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"generation": self.generation}, f)
+        publish_snapshot(root, directory)
+        return directory
+
+    @classmethod
+    def load(cls, root: str) -> Optional["KeywordMatrix"]:
+        """Abre o snapshot ativo de ``root`` via mmap (None se não existe)."""
+        directory = current_snapshot_dir(root)
+        if directory is None:
+            return None
+
+        def array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        with open(os.path.join(directory, "vocabulary.json"), encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        meta_path = os.path.join(directory, "meta.json")
+        generation = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                generation = json.load(f).get("generation")
+        chunk_ids = array("chunk_ids.npy")
+        weights = sparse.csr_matrix(
+            (array("data.npy"), array("indices.npy"), array("indptr.npy")),
+            shape=(len(vocabulary), len(chunk_ids)),
+            copy=False,
+        )
+        logger.info(f"Matriz BM25 aberta via mmap: {directory}")
+        return cls(weights, vocabulary, chunk_ids, array("document_ids.npy"), generation)
+
+    def get_stats(self) -> dict:
+        """Dimensões e bytes da matriz."""
+        return {
+            "terms": len(self.vocabulary),
+            "chunks": len(self.chunk_ids),
+            "nnz": int(self.weights.nnz),
+            "bytes": int(
+                self.weights.data.nbytes + self.weights.indices.nbytes + self.weights.indptr.nbytes
+            ),
+        }
+
+
+def _canonical(weights: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Índices int32 quando cabem (o ``load`` abre os arrays sem conversão)."""
+    if weights.nnz < np.iinfo(np.int32).max:
+        weights.indices = weights.indices.astype(np.int32, copy=False)
+        weights.indptr = weights.indptr.astype(np.int32, copy=False)
+    return weights
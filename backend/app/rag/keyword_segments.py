@@ -0,0 +1,665 @@
+"""
+Índice de palavras-chave em segmentos imutáveis no disco.
+
+Cada segmento é um diretório com vocabulário ordenado, postings (offsets,
+chunks locais e frequências), tamanhos dos chunks e os registros dos chunks
+(``ChunkRecordStore``); todos os arrays são abertos com ``mmap``, de modo que
+os workers compartilham as páginas do page cache em vez de reconstruir o
+índice a partir do PostgreSQL na inicialização.
+
+- Chunks novos viram um pequeno segmento delta a cada ``add_many``;
+- remoções são tombstones (IDs de chunks por segmento) gravados no
+  ``MANIFEST.json``, sem reescrever segmentos;
+- um merge em segundo plano reescreve em um só segmento os menores (quando
+  há mais de ``merge_factor``) ou os com muitos tombstones.
+
+O manifesto é trocado de forma atômica (``os.replace``); leitores chamam
+``refresh`` (feito a cada busca, comparando inode e mtime) e passam a ver os
+segmentos publicados. Vários processos podem escrever no mesmo diretório
+(workers da API): toda alteração do manifesto é feita sob ``flock`` exclusivo
+em ``LOCK``, depois de recarregar o manifesto publicado pelos demais, e só um
+processo por vez mescla segmentos (``MERGE.lock``). Diretórios de segmentos
+substituídos só são apagados no merge seguinte, para que leitores ainda não
+atualizados os abram.
+
+As estatísticas do BM25 (número de chunks, tamanho médio, frequência de
+documento) incluem chunks com tombstone até o merge que os descarta, como em
+índices segmentados usuais.
+"""
+
+import fcntl
+import heapq
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.db.chunk_records import ChunkRecordStore
+from app.rag.keyword_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "MANIFEST.json"
+# flock dos escritores (manifesto) e do merge, entre processos
+WRITE_LOCK = "LOCK"
+MERGE_LOCK = "MERGE.lock"
+# flock de quem preenche o índice vazio a partir do banco (partida da API)
+BOOTSTRAP_LOCK = "BOOTSTRAP.lock"
+
+# Fração de chunks com tombstone que faz um segmento ser reescrito no merge
+TOMBSTONE_MERGE_RATIO = 0.3
+
+
+class KeywordSegment:
+    """Segmento imutável aberto via mmap."""
+
+    def __init__(self, directory: str):
+        """
+        Abre um segmento gravado com ``write``.
+
+        Args:
+            directory: Diretório do segmento
+        """
+        self.directory = directory
+        self.name = os.path.basename(directory)
+
+        def array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self.vocabulary = array("vocabulary.npy")
+        self.offsets = array("offsets.npy")
+        self.docs = array("docs.npy")
+        self.tfs = array("tfs.npy")
+        self.lengths = array("lengths.npy")
+
+        self.records = ChunkRecordStore.load(os.path.join(directory, "records"))
+        self.chunk_ids = np.load(os.path.join(directory, "records", "ids.npy"), mmap_mode="r")
+        self.document_ids = np.load(
+            os.path.join(directory, "records", "document_ids.npy"), mmap_mode="r"
+        )
+
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.total_length = meta["total_length"]
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Chunks locais e frequências do termo, ou None."""
+        if not len(self.vocabulary):
+            return None
+        key = term.encode("utf-8")
+        row = int(np.searchsorted(self.vocabulary, key))
+        if row >= len(self.vocabulary) or self.vocabulary[row] != key:
+            return None
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    def rows_of(self, chunk_ids: np.ndarray) -> np.ndarray:
+        """Linhas locais dos chunks presentes no segmento."""
+        if not len(self.chunk_ids) or not len(chunk_ids):
+            return np.empty(0, dtype=np.int64)
+        rows = np.searchsorted(self.chunk_ids, chunk_ids)
+        rows = np.minimum(rows, len(self.chunk_ids) - 1)
+        return rows[self.chunk_ids[rows] == chunk_ids]
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Registro do chunk da linha ``row``."""
+        return self.records.get(int(self.chunk_ids[row]))
+
+    @staticmethod
+    def write(directory: str, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Grava um segmento com os chunks informados.
+
+        Args:
+            directory: Diretório de destino (vazio)
+            records: Registros com ``id``, ``document_id``, ``content`` e ``metadata``
+
+        Returns:
+            Número de chunks gravados
+        """
+        ordered = sorted(records, key=lambda record: record["id"])
+
+        store = ChunkRecordStore()
+        terms: Dict[str, int] = {}
+        term_rows: List[int] = []
+        docs: List[int] = []
+        tfs: List[int] = []
+        lengths = np.zeros(len(ordered), dtype=np.int32)
+        for row, record in enumerate(ordered):
+            store.add(
+                record["id"],
+                record.get("document_id"),
+                record.get("chunk_index", 0),
+                record.get("content", ""),
+                record.get("metadata"),
+            )
+            frequencies = Counter(tokenize(record.get("content", "")))
+            for term, tf in frequencies.items():
+                term_rows.append(terms.setdefault(term, len(terms)))
+                docs.append(row)
+                tfs.append(tf)
+            lengths[row] = sum(frequencies.values())
+
+        # Postings agrupadas por termo (vocabulário ordenado) e por chunk
+        vocabulary = sorted(terms)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[[terms[term] for term in vocabulary]] = np.arange(len(vocabulary))
+        term_array = rank[np.asarray(term_rows, dtype=np.int64)]
+        doc_array = np.asarray(docs, dtype=np.int32)
+        order = np.lexsort((doc_array, term_array))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_array, minlength=len(vocabulary)), out=offsets[1:])
+
+        encoded = np.array([term.encode("utf-8") for term in vocabulary], dtype=bytes)
+        np.save(os.path.join(directory, "vocabulary.npy"), encoded)
+        np.save(os.path.join(directory, "offsets.npy"), offsets)
+        np.save(os.path.join(directory, "docs.npy"), doc_array[order])
+        np.save(os.path.join(directory, "tfs.npy"), np.asarray(tfs, dtype=np.int32)[order])
+        np.save(os.path.join(directory, "lengths.npy"), lengths)
+        store.save(os.path.join(directory, "records"))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"count": len(ordered), "total_length": int(lengths.sum())}, f)
+        return len(ordered)
+
+
+class SegmentedKeywordIndex:
+    """Índice BM25 em segmentos mmap, com deltas, tombstones e merge em segundo plano."""
+
+    def __init__(
+        self,
+        root: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        merge_factor: int = 10,
+        background_merge: bool = True,
+    ):
+        """
+        Abre (ou cria) o índice em ``root``.
+
+        Args:
+            root: Diretório do índice
+            k1: Saturação da frequência do termo
+            b: Peso da normalização pelo tamanho do chunk
+            merge_factor: Segmentos tolerados antes de mesclar os menores
+            background_merge: Mesclar em uma thread (False: na própria chamada)
+        """
+        self.root = root
+        self.k1 = k1
+        self.b = b
+        self.merge_factor = max(merge_factor, 2)
+        self.background_merge = background_merge
+
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._merge_thread: Optional[threading.Thread] = None
+        # Um merge por vez (thread de fundo ou chamada direta)
+        self._merge_lock = threading.Lock()
+        self._manifest_version: Optional[Tuple[int, int]] = None
+
+        self._generation = 0
+        self._open: Dict[str, KeywordSegment] = {}
+        self._tombstones: Dict[str, Set[int]] = {}
+        self._obsolete: List[str] = []
+        # Fotografia lida pelas buscas: (segmento, linhas com tombstone)
+        self._state: Tuple[Tuple[KeywordSegment, np.ndarray], ...] = ()
+        self.refresh()
+
+    # ----- manifesto -----
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    def _stat_manifest(self) -> Tuple[int, int]:
+        """Identifica a versão do manifesto (``os.replace`` troca o inode)."""
+        stat = os.stat(self._manifest_path())
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self) -> bool:
+        """
+        Recarrega o manifesto se outro processo o publicou.
+
+        Returns:
+            True se a fotografia dos segmentos mudou
+        """
+        try:
+            version = self._stat_manifest()
+        except FileNotFoundError:
+            return False
+        if version == self._manifest_version:
+            return False
+
+        with self._lock:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+            self._generation = manifest["generation"]
+            self._obsolete = manifest.get("obsolete", [])
+            self._tombstones = {
+                entry["name"]: set(entry["tombstones"]) for entry in manifest["segments"]
+            }
+            self._open = {
+                name: self._open.get(name) or KeywordSegment(os.path.join(self.root, name))
+                for name in self._tombstones
+            }
+            self._manifest_version = version
+            self._rebuild_state()
+        return True
+
+    @contextmanager
+    def _writing(self):
+        """
+        Exclusão entre escritores de todos os processos.
+
+        Com o ``flock`` obtido, recarrega o manifesto: a alteração parte dos
+        segmentos e tombstones publicados pelos outros escritores.
+        """
+        with open(os.path.join(self.root, WRITE_LOCK), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def bootstrapping(self):
+        """
+        Só um processo preenche o índice vazio a partir do banco.
+
+        Produz True para o processo que obteve o ``flock`` de ``BOOTSTRAP.lock``
+        com o índice vazio; os demais recebem False sem esperar e passam a ver
+        os segmentos à medida que são publicados.
+        """
+        with open(os.path.join(self.root, BOOTSTRAP_LOCK), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                self.refresh()
+                yield len(self) == 0
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _publish(self) -> None:
+        """Grava o manifesto (chamado com ``_writing`` e o lock) e atualiza a fotografia."""
+        self._generation += 1
+        manifest = {
+            "generation": self._generation,
+            "segments": [
+                {"name": name, "tombstones": sorted(self._tombstones[name])}
+                for name in self._open
+            ],
+            "obsolete": self._obsolete,
+        }
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path())
+        self._manifest_version = self._stat_manifest()
+        self._rebuild_state()
+
+    def _rebuild_state(self) -> None:
+        """Recalcula as linhas com tombstone de cada segmento (chamado com o lock)."""
+        self._state = tuple(
+            (
+                segment,
+                segment.rows_of(np.fromiter(self._tombstones[name], dtype=np.int64)),
+            )
+            for name, segment in self._open.items()
+        )
+
+    # ----- escrita -----
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Indexa (ou re-indexa) um chunk."""
+        self.add_many([record])
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Grava os chunks em um novo segmento delta (versões anteriores viram tombstone).
+
+        Returns:
+            Número de chunks indexados
+        """
+        records = list(records)
+        if not records:
+            return 0
+
+        # O segmento é gravado fora do flock; só a publicação é serializada
+        directory = tempfile.mkdtemp(prefix=f"segment-{int(time.time() * 1000)}-", dir=self.root)
+        count = KeywordSegment.write(directory, records)
+        segment = KeywordSegment(directory)
+        with self._writing(), self._lock:
+            self._tombstone(np.unique([record["id"] for record in records]))
+            self._open[segment.name] = segment
+            self._tombstones[segment.name] = set()
+            self._publish()
+
+        self._maybe_merge()
+        return count
+
+    def remove(self, chunk_ids: Iterable[int], merge: bool = True) -> int:
+        """
+        Marca chunks como removidos (tombstone).
+
+        Returns:
+            Número de chunks removidos
+        """
+        ids = np.unique(np.fromiter(chunk_ids, dtype=np.int64))
+        with self._writing(), self._lock:
+            removed = self._tombstone(ids)
+            if removed:
+                self._publish()
+
+        if removed and merge:
+            self._maybe_merge()
+        return removed
+
+    def _tombstone(self, ids: np.ndarray) -> int:
+        """Marca os chunks presentes nos segmentos (chamado com ``_writing`` e o lock)."""
+        removed = 0
+        for name, segment in self._open.items():
+            rows = segment.rows_of(ids)
+            tombstones = self._tombstones[name]
+            for chunk_id in segment.chunk_ids[rows].tolist():
+                if chunk_id not in tombstones:
+                    tombstones.add(chunk_id)
+                    removed += 1
+        return removed
+
+    def remove_document(self, document_id: int) -> int:
+        """Remove todos os chunks de um documento."""
+        with self._writing(), self._lock:
+            ids = [
+                segment.chunk_ids[np.asarray(segment.document_ids) == document_id]
+                for segment in self._open.values()
+            ]
+            removed = self._tombstone(np.unique(np.concatenate(ids)) if ids else np.empty(0, np.int64))
+            if removed:
+                self._publish()
+
+        if removed:
+            self._maybe_merge()
+        return removed
+
+    def sync(self, records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Alinha o índice a uma lista completa de chunks.
+
+        Comparação só por ID: conteúdo alterado chega com novo ID
+        (``VectorStore.upsert_vectors`` apaga e reinsere chunks alterados).
+
+        Returns:
+            Tupla (indexados, removidos)
+        """
+        records = list(records)
+        live = self.live_ids()
+        wanted = {record["id"] for record in records}
+        added = self.add_many([record for record in records if record["id"] not in live])
+        return added, self.remove(live - wanted)
+
+    # ----- leitura -----
+
+    def _live_rows(self) -> Iterator[Tuple[KeywordSegment, np.ndarray]]:
+        """Linhas vivas de cada segmento."""
+        for segment, dead in self._state:
+            alive = np.ones(segment.count, dtype=bool)
+            alive[dead] = False
+            yield segment, np.flatnonzero(alive)
+
+    def live_ids(self) -> Set[int]:
+        """IDs de todos os chunks vivos."""
+        return {
+            chunk_id
+            for segment, rows in self._live_rows()
+            for chunk_id in segment.chunk_ids[rows].tolist()
+        }
+
+    @property
+    def generation(self) -> int:
+        """Geração do manifesto carregado (muda a cada alteração, de qualquer processo)."""
+        return self._generation
+
+    def __len__(self) -> int:
+        return sum(segment.count - len(dead) for segment, dead in self._state)
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return self.record(chunk_id) is not None
+
+    def record(self, chunk_id: int) -> Optional[Dict[str, Any]]:
+        """Registro indexado de um chunk, ou None."""
+        target = np.array([chunk_id], dtype=np.int64)
+        for segment, dead in self._state:
+            rows = segment.rows_of(target)
+            if len(rows) and not np.isin(rows[0], dead):
+                return segment.record(int(rows[0]))
+        return None
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Itera os registros vivos, segmento a segmento."""
+        for segment, rows in self._live_rows():
+            for row in rows.tolist():
+                yield segment.record(row)
+
+    def search(
+        self,
+        terms: List[str],
+        top_k: int,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Top-k BM25 sobre todos os segmentos.
+
+        Cada segmento acumula os scores dos termos em um vetor denso
+        (vetorizado com numpy) e devolve seu top-k; os resultados são
+        combinados por score.
+
+        Args:
+            terms: Termos da query (``tokenize``)
+            top_k: Número de resultados
+            accept: Predicado sobre o registro (filtros)
+
+        Returns:
+            Lista de (score, registro), do maior para o menor score
+        """
+        self.refresh()
+        state = self._state
+        query = list(dict.fromkeys(terms))
+        total = sum(segment.count for segment, _ in state)
+        if not query or not total or top_k <= 0:
+            return []
+
+        k1, b = self.k1, self.b
+        average = sum(segment.total_length for segment, _ in state) / total
+        postings = [[segment.postings(term) for term in query] for segment, _ in state]
+        df = [
+            sum(len(lists[i][0]) for lists in postings if lists[i] is not None)
+            for i in range(len(query))
+        ]
+        idf = [np.log1p((total - n + 0.5) / (n + 0.5)) for n in df]
+
+        hits: List[Tuple[float, int, Dict[str, Any]]] = []
+        for (segment, dead), lists in zip(state, postings):
+            scores = np.zeros(segment.count, dtype=np.float32)
+            for weight, entry in zip(idf, lists):
+                if entry is None:
+                    continue
+                docs, tfs = entry
+                tf = tfs.astype(np.float32)
+                norm = k1 * (1.0 - b + b * segment.lengths[docs] / average)
+                scores[docs] += weight * (k1 + 1.0) * tf / (tf + norm)
+            scores[dead] = 0.0
+
+            candidates = np.flatnonzero(scores)
+            if accept is None and len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            found = 0
+            for row in candidates.tolist():
+                record = segment.record(row)
+                if accept is not None and not accept(record):
+                    continue
+                hits.append((float(scores[row]), record["id"], record))
+                found += 1
+                if found == top_k:
+                    break
+
+        best = heapq.nlargest(top_k, hits, key=lambda hit: (hit[0], -hit[1]))
+        return [(score, record) for score, _, record in best]
+
+    # ----- merge -----
+
+    def _merge_candidates(self) -> List[str]:
+        """Segmentos a mesclar: os menores além de ``merge_factor`` e os com muitos tombstones."""
+        with self._lock:
+            selected = {
+                name
+                for name, segment in self._open.items()
+                if len(self._tombstones[name]) > TOMBSTONE_MERGE_RATIO * segment.count
+            }
+            if len(self._open) > self.merge_factor:
+                sizes = {
+                    name: segment.count - len(self._tombstones[name])
+                    for name, segment in self._open.items()
+                }
+                selected.update(sorted(sizes, key=sizes.get)[: len(sizes) - self.merge_factor + 1])
+        return sorted(selected)
+
+    def _maybe_merge(self) -> None:
+        """Agenda um merge se houver candidatos."""
+        if not self._merge_candidates():
+            return
+        if not self.background_merge:
+            self.merge()
+            return
+        if self._merge_thread is None or not self._merge_thread.is_alive():
+            self._merge_thread = threading.Thread(
+                target=self._merge_loop, name="keyword-segment-merge", daemon=True
+            )
+            self._merge_thread.start()
+
+    def _merge_loop(self) -> None:
+        """Mescla até não haver candidatos (deltas gravados durante um merge entram no próximo)."""
+        try:
+            while self._merge_candidates():
+                generation = self._generation
+                self.merge()
+                if self._generation == generation:
+                    # Outro processo está mesclando (MERGE.lock)
+                    break
+        except Exception:
+            # Já registrado em merge; o próximo add_many/remove agenda de novo
+            pass
+
+    def merge(self) -> Optional[str]:
+        """
+        Reescreve os segmentos candidatos em um só, sem os chunks com tombstone.
+
+        Tombstones gravados durante o merge em chunks dos segmentos mesclados
+        são transferidos para o novo segmento.
+
+        Só um processo mescla por vez (``MERGE.lock``); os demais retornam
+        None sem esperar.
+
+        Returns:
+            Nome do novo segmento, ou None se não havia o que mesclar (ou
+            nenhum chunk vivo)
+        """
+        with self._merge_lock, open(os.path.join(self.root, MERGE_LOCK), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                return self._merge()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _merge(self) -> Optional[str]:
+        self.refresh()
+        names = self._merge_candidates()
+        if not names:
+            return None
+
+        try:
+            start = time.perf_counter()
+            with self._lock:
+                sources = [(self._open[name], set(self._tombstones[name])) for name in names]
+
+            records = [
+                segment.record(row)
+                for segment, dead in sources
+                for row, chunk_id in enumerate(segment.chunk_ids.tolist())
+                if chunk_id not in dead
+            ]
+            merged = None
+            if records:
+                directory = tempfile.mkdtemp(
+                    prefix=f"segment-{int(time.time() * 1000)}-", dir=self.root
+                )
+                KeywordSegment.write(directory, records)
+                merged = KeywordSegment(directory)
+
+            with self._writing(), self._lock:
+                if any(name not in self._open for name in names):
+                    # Manifesto alterado sem os segmentos mesclados (não deve
+                    # ocorrer com MERGE.lock): descarta o resultado
+                    if merged is not None:
+                        shutil.rmtree(merged.directory, ignore_errors=True)
+                    return None
+
+                late = set()
+                for (segment, dead), name in zip(sources, names):
+                    late |= self._tombstones.pop(name) - dead
+                    del self._open[name]
+
+                # Segmentos substituídos no merge anterior já não são lidos
+                for name in self._obsolete:
+                    shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                self._obsolete = names
+
+                # Sem chunks vivos os segmentos apenas saem do manifesto
+                if merged is not None:
+                    self._open[merged.name] = merged
+                    self._tombstones[merged.name] = late
+                self._publish()
+
+            logger.info(
+                f"{len(names)} segmentos de palavras-chave mesclados "
+                f"({len(records)} chunks, {time.perf_counter() - start:.1f}s)"
+            )
+            return merged.name if merged is not None else None
+
+        except Exception as e:
+            logger.error(f"Erro ao mesclar segmentos de palavras-chave: {e}")
+            raise
+
+    def close(self) -> None:
+        """Aguarda o merge em andamento."""
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+            self._merge_thread = None
+
+    def get_stats(self) -> dict:
+        """Segmentos, chunks e tombstones."""
+        state = self._state
+        return {
+            "segments": len(state),
+            "chunks": len(self),
+            "tombstones": sum(len(dead) for _, dead in state),
+            "bytes": sum(
+                segment.docs.nbytes + segment.tfs.nbytes + segment.offsets.nbytes
+                for segment, _ in state
+            ),
+        }
@@ -0,0 +1,174 @@
+"""
+Registro de modelos compartilhado pelo processo.
+
+Cada modelo (embeddings, cross-encoder) é carregado uma única vez, sob demanda,
+e a mesma instância é entregue a todos os componentes (``VectorStore``,
+``AgentManager``, ``HybridSearch``). Isso evita pesos duplicados na memória
+de cada worker e torna a construção dos componentes praticamente gratuita.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Memória residente atual do processo (Linux), ou None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _model_size_bytes(model: Any) -> Optional[int]:
+    """Estima memória ocupada pelos pesos de um modelo."""
+    # CrossEncoder guarda o modelo PyTorch em ``.model``
+    torch_module = getattr(model, "model", model)
+    if hasattr(torch_module, "parameters"):
+        total = sum(p.numel() * p.element_size() for p in torch_module.parameters())
+        if hasattr(torch_module, "buffers"):
+            total += sum(b.numel() * b.element_size() for b in torch_module.buffers())
+        return total
+
+    # Backend ONNX: tamanho do arquivo carregado na sessão
+    session = getattr(model, "session", None)
+    if session is not None:
+        path = getattr(session, "_model_path", None)
+        if path and os.path.exists(path):
+            return os.path.getsize(path)
+
+    return None
+
+
+class ModelRegistry:
+    """Carrega modelos sob demanda e compartilha instâncias por nome."""
+
+    def __init__(self):
+        """Inicializa registro vazio."""
+        self._models: Dict[str, Any] = {}
+        self._info: Dict[str, dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        kind: str = "model",
+        measure: bool = True,
+    ) -> Any:
+        """
+        Retorna modelo registrado ou carrega com ``loader``.
+
+        Args:
+            key: Chave única do modelo
+            loader: Função que carrega o modelo
+            kind: Tipo do modelo (para relatórios)
+            measure: Estimar memória dos pesos (desligar para wrappers de
+                modelos já registrados, evitando contagem dupla)
+
+        Returns:
+            Instância compartilhada do modelo
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        # Lock por chave: cargas concorrentes do mesmo modelo aguardam a primeira
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            logger.info(f"Carregando modelo no registro: {key}")
+            rss_before = _current_rss_bytes()
+            start = time.perf_counter()
+
+            model = loader()
+
+            load_seconds = time.perf_counter() - start
+            rss_after = _current_rss_bytes()
+
+            self._info[key] = {
+                "key": key,
+                "kind": kind,
+                "load_seconds": load_seconds,
+                "weights_bytes": _model_size_bytes(model) if measure else None,
+                "rss_delta_bytes": (
+                    rss_after - rss_before
+                    if rss_before is not None and rss_after is not None
+                    else None
+                ),
+            }
+            self._models[key] = model
+
+            logger.info(f"Modelo {key} carregado em {load_seconds:.1f}s")
+            return model
+
+    def get_embedding_model(self, model_name: Optional[str] = None, backend: Optional[str] = None):
+        """Retorna modelo de embeddings compartilhado."""
+        from app.rag.embedding_backends import load_embedding_backend
+
+        model_name = model_name or settings.embedding_model
+        backend = backend or settings.embedding_backend
+
+        return self.get_or_load(
+            f"embedding:{backend}:{model_name}",
+            lambda: load_embedding_backend(model_name, backend),
+            kind="embedding",
+        )
+
+    def get_cross_encoder(self, model_name: Optional[str] = None):
+        """Retorna cross-encoder de re-ranking compartilhado."""
+        model_name = model_name or settings.rerank_model
+
+        def load():
+            from sentence_transformers import CrossEncoder
+
+            return CrossEncoder(model_name)
+
+        return self.get_or_load(f"cross-encoder:{model_name}", load, kind="cross-encoder")
+
+    def get_embeddings_generator(self, model_name: Optional[str] = None):
+        """Retorna ``EmbeddingsGenerator`` compartilhado (modelo, cache e batcher)."""
+        from app.rag.embeddings import EmbeddingsGenerator
+
+        model_name = model_name or settings.embedding_model
+
+        return self.get_or_load(
+            f"generator:{model_name}",
+            lambda: EmbeddingsGenerator(model_name),
+            kind="generator",
+            measure=False,
+        )
+
+    def is_loaded(self, key: str) -> bool:
+        """Indica se o modelo já foi carregado."""
+        return key in self._models
+
+    def list_models(self) -> list:
+        """Lista modelos carregados e seu consumo de memória."""
+        return [dict(info) for key, info in self._info.items() if key in self._models]
+
+    def get_stats(self) -> dict:
+        """Retorna resumo do registro."""
+        models = self.list_models()
+        return {
+            "loaded_models": len(models),
+            "weights_bytes": sum(m["weights_bytes"] or 0 for m in models),
+            "process_rss_bytes": _current_rss_bytes(),
+            "models": models,
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,154 @@
+"""
+Similaridade vetorizada entre embeddings.
+
+Funções para similaridade query-corpus e corpus-corpus sobre matrizes float32
+normalizadas (cosseno = produto interno). Os cálculos são feitos em blocos de
+linhas e colunas, limitando a memória temporária a ``block_size ** 2`` scores,
+e podem retornar apenas os top-k de cada linha. Usado em deduplicação,
+clustering, chunking semântico e MMR.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Normaliza linhas para norma L2 unitária.
+
+    Args:
+        vectors: Vetor (dim,) ou matriz (n, dim)
+
+    Returns:
+        Matriz float32 normalizada (vetores nulos permanecem nulos)
+    """
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.maximum(norms, 1e-12)
+    return matrix
+
+
+def _prepare(vectors: np.ndarray, normalized: bool) -> np.ndarray:
+    """Garante matriz float32 contígua (normalizando se necessário)."""
+    if not normalized:
+        return normalize_rows(vectors)
+    return np.ascontiguousarray(np.atleast_2d(vectors), dtype=np.float32)
+
+
+def similarity_matrix(
+    queries: np.ndarray,
+    corpus: Optional[np.ndarray] = None,
+    normalized: bool = True,
+    block_size: int = 4096,
+) -> np.ndarray:
+    """
+    Calcula matriz completa de similaridade cosseno.
+
+    Args:
+        queries: Matriz (n, dim)
+        corpus: Matriz (m, dim); se None, compara ``queries`` consigo mesma
+        normalized: Vetores já normalizados
+        block_size: Linhas de ``queries`` processadas por bloco
+
+    Returns:
+        Matriz float32 (n, m)
+    """
+    queries = _prepare(queries, normalized)
+    corpus = queries if corpus is None else _prepare(corpus, normalized)
+
+    result = np.empty((len(queries), len(corpus)), dtype=np.float32)
+    for start in range(0, len(queries), block_size):
+        end = start + block_size
+        np.matmul(queries[start:end], corpus.T, out=result[start:end])
+
+    return result
+
+
+def top_k_similarity(
+    queries: np.ndarray,
+    corpus: Optional[np.ndarray] = None,
+    k: int = 10,
+    normalized: bool = True,
+    block_size: int = 4096,
+    exclude_self: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Retorna os ``k`` vizinhos mais similares de cada linha.
+
+    O corpus é percorrido em blocos de colunas, mantendo apenas os melhores
+    ``k`` candidatos de cada linha; a memória não depende de ``len(corpus)``.
+
+    Args:
+        queries: Matriz (n, dim)
+        corpus: Matriz (m, dim); se None, compara ``queries`` consigo mesma
+        k: Número de vizinhos por linha
+        normalized: Vetores já normalizados
+        block_size: Tamanho dos blocos de linhas e de colunas
+        exclude_self: Ignorar a diagonal (somente quando ``corpus`` é None)
+
+    Returns:
+        Tupla (índices int64 (n, k), scores float32 (n, k)), em ordem
+        decrescente de similaridade; posições sem candidato têm índice -1
+    """
+    queries = _prepare(queries, normalized)
+    self_join = corpus is None
+    corpus = queries if self_join else _prepare(corpus, normalized)
+    exclude_self = exclude_self and self_join
+
+    k = max(0, min(k, len(corpus) - (1 if exclude_self else 0)))
+    indices = np.full((len(queries), k), -1, dtype=np.int64)
+    scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    if k == 0:
+        return indices, scores
+
+    for row_start in range(0, len(queries), block_size):
+        row_end = min(row_start + block_size, len(queries))
+        best_idx = indices[row_start:row_end]
+        best_scores = scores[row_start:row_end]
+
+        for col_start in range(0, len(corpus), block_size):
+            col_end = min(col_start + block_size, len(corpus))
+            block = queries[row_start:row_end] @ corpus[col_start:col_end].T
+
+            if exclude_self:
+                rows = np.arange(row_start, row_end)
+                inside = (rows >= col_start) & (rows < col_end)
+                block[inside.nonzero()[0], rows[inside] - col_start] = -np.inf
+
+            cand_scores = np.concatenate([best_scores, block], axis=1)
+            cand_idx = np.concatenate(
+                [
+                    best_idx,
+                    np.broadcast_to(
+                        np.arange(col_start, col_end, dtype=np.int64), block.shape
+                    ),
+                ],
+                axis=1,
+            )
+
+            top = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(cand_scores, top, axis=1)
+            best_idx = np.take_along_axis(cand_idx, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        scores[row_start:row_end] = np.take_along_axis(best_scores, order, axis=1)
+        indices[row_start:row_end] = np.take_along_axis(best_idx, order, axis=1)
+
+    indices[~np.isfinite(scores)] = -1
+    return indices, scores
+
+
+def query_similarity(query: np.ndarray, corpus: np.ndarray, normalized: bool = True) -> np.ndarray:
+    """
+    Similaridade de uma query contra todas as linhas do corpus.
+
+    Args:
+        query: Vetor (dim,)
+        corpus: Matriz (m, dim)
+        normalized: Vetores já normalizados
+
+    Returns:
+        Vetor float32 (m,)
+    """
+    return similarity_matrix(query, corpus, normalized=normalized)[0]
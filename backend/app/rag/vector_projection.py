@@ -0,0 +1,192 @@
+"""
+Redução de dimensão dos embeddings armazenados.
+
+O ``VectorStore`` aplica a mesma projeção aos embeddings dos chunks e aos
+embeddings das queries, reduzindo o tamanho do índice HNSW:
+
+- ``none``: vetores inalterados;
+- ``truncate``: mantém as primeiras ``k`` dimensões;
+- ``pca``: projeta nos ``k`` componentes principais ajustados em uma amostra
+  do corpus; a projeção ajustada é persistida em arquivo ``.npz``.
+
+Após a projeção os vetores são renormalizados, preservando a equivalência
+entre produto interno e cosseno.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDUCTION_METHODS = ("none", "truncate", "pca")
+
+
+class VectorProjection:
+    """Projeção linear de embeddings para a dimensão de armazenamento."""
+
+    def __init__(
+        self,
+        method: str = "none",
+        input_dim: int = 384,
+        output_dim: Optional[int] = None,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+        normalize: bool = True,
+    ):
+        """
+        Inicializa projeção.
+
+        Args:
+            method: ``none``, ``truncate`` ou ``pca``
+            input_dim: Dimensão dos embeddings do modelo
+            output_dim: Dimensão armazenada (padrão: ``input_dim``)
+            mean: Média da amostra (somente PCA)
+            components: Matriz (input_dim, output_dim) de componentes (somente PCA)
+            normalize: Renormalizar vetores após a projeção
+        """
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Método de redução desconhecido: {method}")
+
+        output_dim = output_dim or input_dim
+        if output_dim > input_dim:
+            raise ValueError(
+                f"Dimensão de armazenamento ({output_dim}) maior que a do modelo ({input_dim})"
+            )
+        if method == "pca" and components is None:
+            raise ValueError("Projeção PCA requer componentes ajustados (use fit_pca)")
+
+        self.method = method
+        self.input_dim = input_dim
+        self.output_dim = input_dim if method == "none" else output_dim
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.components = (
+            None if components is None else np.ascontiguousarray(components, dtype=np.float32)
+        )
+        self.normalize = normalize
+
+    @classmethod
+    def fit_pca(
+        cls, samples: np.ndarray, output_dim: int, normalize: bool = True
+    ) -> "VectorProjection":
+        """
+        Ajusta projeção PCA em uma amostra de embeddings.
+
+        Args:
+            samples: Matriz (n, input_dim) de embeddings do corpus
+            output_dim: Número de componentes mantidos
+
+        Returns:
+            Projeção ajustada
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.shape[0] < output_dim:
+            raise ValueError(
+                f"Amostra com {samples.shape[0]} vetores é pequena para {output_dim} componentes"
+            )
+
+        mean = samples.mean(axis=0)
+        # Componentes principais = vetores singulares à direita da amostra centrada
+        _, _, vt = np.linalg.svd(samples - mean, full_matrices=False)
+        components = vt[:output_dim].T
+
+        logger.info(f"PCA ajustada: {samples.shape[1]} -> {output_dim} dimensões")
+
+        return cls(
+            method="pca",
+            input_dim=samples.shape[1],
+            output_dim=output_dim,
+            mean=mean,
+            components=components,
+            normalize=normalize,
+        )
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Projeta vetores para a dimensão de armazenamento.
+
+        Args:
+            vectors: Vetor (dim,) ou matriz (n, dim)
+
+        Returns:
+            Vetores float32 projetados, com o mesmo número de eixos da entrada
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.method == "none":
+            return vectors
+
+        single = vectors.ndim == 1
+        matrix = vectors.reshape(1, -1) if single else vectors
+
+        if self.method == "truncate":
+            projected = np.array(matrix[:, : self.output_dim], dtype=np.float32)
+        else:
+            projected = (matrix - self.mean) @ self.components
+
+        if self.normalize:
+            norms = np.linalg.norm(projected, axis=1, keepdims=True)
+            projected /= np.maximum(norms, 1e-12)
+
+        return projected[0] if single else projected
+
+    def save(self, path: str) -> None:
+        """Persiste projeção em arquivo ``.npz``."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        arrays = {
+            "method": np.array(self.method),
+            "input_dim": np.array(self.input_dim),
+            "output_dim": np.array(self.output_dim),
+            "normalize": np.array(self.normalize),
+        }
+        if self.method == "pca":
+            arrays["mean"] = self.mean
+            arrays["components"] = self.components
+
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+        logger.info(f"Projeção salva em {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "VectorProjection":
+        """Carrega projeção salva com ``save``."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                method=str(data["method"]),
+                input_dim=int(data["input_dim"]),
+                output_dim=int(data["output_dim"]),
+                mean=data["mean"] if "mean" in data else None,
+                components=data["components"] if "components" in data else None,
+                normalize=bool(data["normalize"]),
+            )
+
+    @classmethod
+    def from_settings(cls) -> "VectorProjection":
+        """Cria projeção a partir da configuração."""
+        method = settings.vector_reduction
+
+        if method == "pca":
+            if not os.path.exists(settings.vector_projection_path):
+                raise FileNotFoundError(
+                    f"Projeção PCA não encontrada: {settings.vector_projection_path}"
+                )
+            projection = cls.load(settings.vector_projection_path)
+            if projection.output_dim != settings.vector_storage_dimension:
+                raise ValueError(
+                    f"Projeção salva tem {projection.output_dim} dimensões, "
+                    f"configuração pede {settings.vector_storage_dimension}"
+                )
+            return projection
+
+        return cls(
+            method=method,
+            input_dim=settings.vector_dimension,
+            output_dim=settings.vector_storage_dimension,
+            normalize=settings.normalize_embeddings,
+        )
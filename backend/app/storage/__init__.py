@@ -2,6 +2,6 @@
 Módulo de armazenamento: MinIO e Google Drive.
 """
 
-from app.storage.minio_client import MinIOClient
+from app.storage.minio_client import MinIOClient, get_minio_client
 
-__all__ = ["MinIOClient"]
+__all__ = ["MinIOClient", "get_minio_client"]
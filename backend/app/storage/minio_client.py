@@ -1,9 +1,20 @@
 """
 Cliente MinIO para armazenamento de documentos.
+
+Objetos e bytes por prefixo (primeiro segmento do nome) são contados em
+memória a cada upload/remoção feitos por este cliente; ``get_stats`` lê os
+contadores sem listar o bucket. Escritas de outros processos só aparecem na
+reconciliação (listagem completa), feita pelo ``StatsReconciler`` na partida
+e a cada ``STATS_RECONCILE_INTERVAL`` segundos, fora das requisições.
 """
 
+import asyncio
 import logging
-from typing import Optional, BinaryIO
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, BinaryIO
 from minio import Minio
 from minio.error import S3Error
 
@@ -28,6 +39,11 @@ class MinIOClient:
 
         self.bucket_name = settings.minio_bucket_name
 
+        # Contadores por prefixo: {"objects": n, "bytes": n}
+        self._prefix_stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        self._reconciled_at: Optional[float] = None
+
         # Criar bucket se não existir
         self._ensure_bucket_exists()
 
@@ -43,6 +59,36 @@ class MinIOClient:
             logger.error(f"Erro ao criar bucket: {e}")
             raise
 
+    @staticmethod
+    def _prefix(object_name: str) -> str:
+        """Prefixo de contagem: primeiro segmento do nome (vazio na raiz)."""
+        return object_name.split("/", 1)[0] if "/" in object_name else ""
+
+    def _count(self, object_name: str, objects: int, size: int) -> None:
+        """Aplica uma variação aos contadores do prefixo do objeto."""
+        with self._stats_lock:
+            counters = self._prefix_stats.setdefault(
+                self._prefix(object_name), {"objects": 0, "bytes": 0}
+            )
+            counters["objects"] += objects
+            counters["bytes"] += size
+
+    def _existing_size(self, object_name: str) -> Optional[int]:
+        """Tamanho do objeto já armazenado, ou ``None`` se não existe."""
+        try:
+            return self.client.stat_object(self.bucket_name, object_name).size
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject", "ResourceNotFound"):
+                return None
+            raise
+
+    def _count_upload(self, object_name: str, previous: Optional[int], size: int) -> None:
+        """Conta um upload (sobrescrita só altera os bytes)."""
+        if previous is None:
+            self._count(object_name, 1, size)
+        else:
+            self._count(object_name, 0, size - previous)
+
     async def upload_file(
         self, file_path: str, object_name: str, content_type: str = "application/octet-stream"
     ) -> str:
@@ -60,9 +106,11 @@ class MinIOClient:
         try:
             logger.info(f"Fazendo upload: {file_path} -> {object_name}")
 
+            previous = self._existing_size(object_name)
             self.client.fput_object(
                 self.bucket_name, object_name, file_path, content_type=content_type
             )
+            self._count_upload(object_name, previous, os.path.getsize(file_path))
 
             # Construir URL
             url = f"minio://{self.bucket_name}/{object_name}"
@@ -91,6 +139,7 @@ class MinIOClient:
         try:
             logger.info(f"Fazendo upload de bytes: {object_name}")
 
+            previous = self._existing_size(object_name)
             self.client.put_object(
                 self.bucket_name,
                 object_name,
@@ -98,6 +147,7 @@ class MinIOClient:
                 length=len(data),
                 content_type=content_type,
             )
+            self._count_upload(object_name, previous, len(data))
 
             url = f"minio://{self.bucket_name}/{object_name}"
 
@@ -144,7 +194,10 @@ class MinIOClient:
         try:
             logger.info(f"Deletando arquivo: {object_name}")
 
+            previous = self._existing_size(object_name)
             self.client.remove_object(self.bucket_name, object_name)
+            if previous is not None:
+                self._count(object_name, -1, -previous)
 
             logger.info(f"Arquivo deletado com sucesso")
             return True
@@ -210,20 +263,79 @@ class MinIOClient:
             logger.error(f"Erro ao gerar URL: {e}")
             raise
 
+    def _list_prefix_stats(self) -> Dict[str, Dict[str, int]]:
+        """Contadores por prefixo a partir da listagem completa do bucket."""
+        prefix_stats: Dict[str, Dict[str, int]] = {}
+        for obj in self.client.list_objects(self.bucket_name, recursive=True):
+            counters = prefix_stats.setdefault(
+                self._prefix(obj.object_name), {"objects": 0, "bytes": 0}
+            )
+            counters["objects"] += 1
+            counters["bytes"] += obj.size or 0
+        return prefix_stats
+
+    async def reconcile_stats(self) -> dict:
+        """
+        Recalcula os contadores listando o bucket inteiro (job periódico).
+
+        Returns:
+            Desvio corrigido em objetos e bytes
+        """
+        try:
+            actual = await asyncio.to_thread(self._list_prefix_stats)
+            with self._stats_lock:
+                objects_before = sum(c["objects"] for c in self._prefix_stats.values())
+                bytes_before = sum(c["bytes"] for c in self._prefix_stats.values())
+                self._prefix_stats = actual
+                self._reconciled_at = time.time()
+
+            return {
+                "objects_drift": sum(c["objects"] for c in actual.values()) - objects_before,
+                "bytes_drift": sum(c["bytes"] for c in actual.values()) - bytes_before,
+            }
+
+        except S3Error as e:
+            logger.error(f"Erro ao reconciliar estatísticas do bucket: {e}")
+            raise
+
     async def get_stats(self) -> dict:
-        """Retorna estatísticas do bucket."""
+        """
+        Retorna estatísticas do bucket a partir dos contadores em memória (O(1)).
+
+        Antes da primeira reconciliação só contam as escritas deste processo
+        (``reconciled_at`` nulo).
+        """
         try:
-            objects = await self.list_objects()
+            with self._stats_lock:
+                prefixes = {prefix: dict(c) for prefix, c in self._prefix_stats.items()}
 
-            total_size = sum(obj["size"] for obj in objects)
+            total_size = sum(c["bytes"] for c in prefixes.values())
 
             return {
                 "bucket": self.bucket_name,
-                "object_count": len(objects),
+                "object_count": sum(c["objects"] for c in prefixes.values()),
                 "total_size": total_size,
                 "total_size_mb": total_size / (1024 * 1024),
+                "prefixes": prefixes,
+                "reconciled_at": (
+                    datetime.fromtimestamp(self._reconciled_at).isoformat()
+                    if self._reconciled_at is not None
+                    else None
+                ),
             }
 
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {e}")
             return {}
+
+
+_minio_client: Optional[MinIOClient] = None
+
+
+def get_minio_client() -> MinIOClient:
+    """Retorna cliente MinIO compartilhado pelo processo (contadores únicos)."""
+    global _minio_client
+
+    if _minio_client is None:
+        _minio_client = MinIOClient()
+    return _minio_client
@@ -0,0 +1,7 @@
+"""
+Benchmarks de desempenho do pipeline RAG.
+
+Executar a partir do diretório ``backend``, por exemplo:
+
+    python -m benchmarks.bench_micro_batching
+"""
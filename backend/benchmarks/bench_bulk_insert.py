@@ -0,0 +1,80 @@
+"""
+Benchmark: ingestão de chunks com INSERT por linha vs COPY binário.
+
+Requer PostgreSQL com PgVector acessível em ``DATABASE_URL`` e o schema de
+``docker/postgres/init-db.sql``. Cria um usuário e um documento temporários,
+que são removidos (em cascata) ao final.
+
+Uso:
+    python -m benchmarks.bench_bulk_insert --chunks 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import asyncpg
+import numpy as np
+
+from app.config import settings
+from app.db.pg_copy import copy_chunks
+
+
+async def insert_per_row(conn, document_id: int, chunks: list, embeddings: np.ndarray) -> None:
+    """Caminho antigo: um INSERT (e um round trip) por chunk."""
+    for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        await conn.execute(
+            "INSERT INTO document_chunks (document_id, chunk_index, content, embedding, metadata) "
+            "VALUES ($1, $2, $3, $4::text::vector, $5::jsonb)",
+            document_id,
+            idx,
+            chunk["content"],
+            "[" + ",".join(map(str, embedding.tolist())) + "]",
+            json.dumps(chunk["metadata"]),
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.chunks, settings.vector_dimension)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    chunks = [
+        {"content": f"Linha {i} do relatório de vendas; " * 20, "metadata": {"row": i}}
+        for i in range(args.chunks)
+    ]
+
+    conn = await asyncpg.connect(settings.database_url)
+    try:
+        user_id = await conn.fetchval(
+            "INSERT INTO users (username, email, password_hash) "
+            "VALUES ('bench_bulk', 'bench_bulk@example.com', '-') RETURNING id"
+        )
+        results = {}
+        for name in ("insert por linha", "copy binário"):
+            document_id = await conn.fetchval(
+                "INSERT INTO documents (user_id, filename, file_path, file_type, file_size) "
+                "VALUES ($1, 'bench', 'bench', 'txt', 0) RETURNING id",
+                user_id,
+            )
+            start = time.perf_counter()
+            if name == "copy binário":
+                await copy_chunks(conn, document_id, chunks, embeddings)
+            else:
+                await insert_per_row(conn, document_id, chunks, embeddings)
+            results[name] = args.chunks / (time.perf_counter() - start)
+
+        print(f"{'modo':<18} {'linhas/s':>10}")
+        for name, rows_per_sec in results.items():
+            print(f"{name:<18} {rows_per_sec:>10.0f}")
+    finally:
+        await conn.execute("DELETE FROM users WHERE username = 'bench_bulk'")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark: backends de inferência do modelo de embeddings.
+
+Para cada backend (``torch``, ``onnx``, ``onnx-int8``) mede throughput
+(textos/s) e memória residente (RSS) em um subprocesso isolado, e verifica a
+paridade dos embeddings com o backend ``torch`` pelo cosseno.
+
+Uso:
+    python -m benchmarks.bench_embedding_backends --texts 1000 --tolerance 0.99
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.rag.embedding_backends import BACKENDS
+
+
+def sample_texts(count: int) -> list:
+    """Gera textos de tamanhos variados, semelhantes a chunks reais."""
+    base = (
+        "O relatório trimestral indica crescimento de receita e redução de custos "
+        "operacionais, com destaque para a área de logística e atendimento. "
+    )
+    return [f"{i}: " + base * (1 + i % 6) for i in range(count)]
+
+
+def run_backend(backend: str, count: int, batch_size: int, output: str) -> None:
+    """Executa o backend no processo atual e imprime métricas em JSON."""
+    from app.config import settings
+    from app.rag.embedding_backends import load_embedding_backend
+
+    texts = sample_texts(count)
+    model = load_embedding_backend(settings.embedding_model, backend)
+    model.encode(texts[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    embeddings = model.encode(
+        texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+    )
+    elapsed = time.perf_counter() - start
+
+    np.save(output, np.asarray(embeddings, dtype=np.float32))
+    print(
+        json.dumps(
+            {
+                "texts_per_sec": count / elapsed,
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--tolerance", type=float, default=0.99)
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_backend(args.child, args.texts, args.batch_size, args.output)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            output = os.path.join(tmp, f"{backend}.npy")
+            completed = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_embedding_backends",
+                    "--child", backend,
+                    "--texts", str(args.texts),
+                    "--batch-size", str(args.batch_size),
+                    "--output", output,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+            metrics["embeddings"] = np.load(output)
+            results[backend] = metrics
+
+    reference = results["torch"]["embeddings"]
+    print(f"{'backend':<10} {'textos/s':>10} {'RSS pico (MB)':>14} {'cos mín':>9} {'paridade':>9}")
+    for backend, metrics in results.items():
+        cosines = np.sum(reference * metrics["embeddings"], axis=1)
+        passed = "ok" if cosines.min() >= args.tolerance else "FALHOU"
+        print(
+            f"{backend:<10} {metrics['texts_per_sec']:>10.1f} "
+            f"{metrics['peak_rss_mb']:>14.1f} {cosines.min():>9.4f} {passed:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark: busca vetorial com filtros seletivos em corpus grande.
+
+Compara, para filtros de seletividade decrescente (um documento, uma tag de
+metadados em ~1% dos chunks, um usuário), o filtro aplicado dentro da busca
+(``SearchFilters``) com o pós-filtro do top-k (buscar ``k * oversample`` e
+filtrar). Reporta recall@k contra o top-k exato filtrado e latência p50/p99.
+
+Backends em processo (``exact`` e ``hnsw``) sempre; PgVector com
+``--pgvector`` (schema de ``docker/postgres/init-db.sql`` em ``DATABASE_URL``,
+dados temporários removidos ao final).
+
+Uso:
+    python -m benchmarks.bench_filtered_search --chunks 200000 --documents 2000
+    python -m benchmarks.bench_filtered_search --pgvector
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.config import settings
+from app.db.exact_store import ExactVectorDatabase
+from app.db.hnsw_store import HNSWVectorDatabase
+from app.db.search_filters import SearchFilters
+
+
+def build_corpus(args) -> tuple:
+    """Vetores normalizados + documento, usuário e tag de cada chunk."""
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((args.chunks, settings.vector_storage_dimension))
+    corpus = (corpus / np.linalg.norm(corpus, axis=1, keepdims=True)).astype(np.float32)
+
+    documents = np.sort(rng.integers(0, args.documents, size=args.chunks))
+    users = documents % args.users
+    tags = np.where(rng.random(args.chunks) < 0.01, "raro", "comum")
+
+    picked = rng.choice(args.chunks, size=args.queries, replace=False)
+    queries = corpus[picked] + 0.05 * rng.standard_normal(corpus[picked].shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return corpus, documents, users, tags, queries
+
+
+async def ingest(db, corpus, documents, users, tags, document_ids: Dict[int, int]) -> None:
+    """Insere os chunks agrupados por documento."""
+    for document in np.unique(documents):
+        rows = np.flatnonzero(documents == document)
+        chunks = [
+            {
+                "content": str(row),
+                "metadata": {"tag": str(tags[row]), "user_id": int(users[row])},
+            }
+            for row in rows
+        ]
+        await db.add_chunks_bulk(document_ids[int(document)], chunks, corpus[rows])
+
+
+async def run(db, queries, k: int, filters: SearchFilters, oversample: int) -> tuple:
+    """Filtro na busca vs pós-filtro; retorna (posições, latências) de cada modo."""
+    pushed, post = ([], []), ([], [])
+    for query in queries:
+        start = time.perf_counter()
+        results = await db.search_similar_vectors(
+            embedding=query, top_k=k, threshold=-1.0, filters=filters
+        )
+        pushed[1].append((time.perf_counter() - start) * 1000)
+        pushed[0].append([int(r["content"]) for r in results])
+
+        start = time.perf_counter()
+        results = await db.search_similar_vectors(
+            embedding=query, top_k=k * oversample, threshold=-1.0
+        )
+        results = [r for r in results if filters.matches(r)][:k]
+        post[1].append((time.perf_counter() - start) * 1000)
+        post[0].append([int(r["content"]) for r in results])
+
+    return pushed, post
+
+
+def report(label: str, found: List[List[int]], latencies: List[float], truth, k: int) -> None:
+    """Imprime uma linha de resultado."""
+    recall = np.mean([len(set(f) & set(t)) / max(min(k, len(t)), 1) for f, t in zip(found, truth)])
+    print(
+        f"{label:<44} {recall:>9.3f} "
+        f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, default=10)
+    parser.add_argument("--pgvector", action="store_true", help="Incluir PgVector")
+    args = parser.parse_args()
+
+    corpus, documents, users, tags, queries = build_corpus(args)
+
+    # Filtros em IDs "lógicos" de documento/usuário; PgVector remapeia abaixo
+    scenarios = {
+        "1 documento": lambda doc_ids, user_ids: SearchFilters(document_ids=[doc_ids[0]]),
+        "tag em ~1% (metadata)": lambda doc_ids, user_ids: SearchFilters(metadata={"tag": "raro"}),
+        "1 usuário": lambda doc_ids, user_ids: SearchFilters(user_id=user_ids[0]),
+    }
+    masks = {
+        "1 documento": documents == 0,
+        "tag em ~1% (metadata)": tags == "raro",
+        "1 usuário": users == 0,
+    }
+
+    truth = {}
+    for name, mask in masks.items():
+        rows = np.flatnonzero(mask)
+        scores = queries @ corpus[rows].T
+        top = np.argsort(-scores, axis=1)[:, : args.k]
+        truth[name] = rows[top].tolist()
+
+    backends = {
+        "exact": lambda path: ExactVectorDatabase(index_path=path),
+        "hnsw": lambda path: HNSWVectorDatabase(index_path=path, max_elements=args.chunks),
+    }
+
+    print(f"{'backend / filtro / modo':<44} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for backend, factory in backends.items():
+        with tempfile.TemporaryDirectory() as path:
+            db = factory(path)
+            document_ids = {int(d): int(d) for d in np.unique(documents)}
+            await ingest(db, corpus, documents, users, tags, document_ids)
+            for name, make_filters in scenarios.items():
+                # Sem tabela documents, user_id vem dos metadados do chunk
+                pushed, post = await run(db, queries, args.k, make_filters([0], [0]), args.oversample)
+                report(f"{backend} / {name} / na busca", *pushed, truth[name], args.k)
+                report(f"{backend} / {name} / pós-filtro", *post, truth[name], args.k)
+
+    if args.pgvector:
+        await run_pgvector(args, corpus, documents, users, tags, queries, scenarios, truth)
+
+
+async def run_pgvector(args, corpus, documents, users, tags, queries, scenarios, truth) -> None:
+    """Mesmos cenários no PgVector (usuários e documentos temporários)."""
+    import asyncpg
+
+    from app.db.database import PgVectorDatabase
+
+    conn = await asyncpg.connect(settings.database_url)
+    db = PgVectorDatabase()
+    try:
+        user_ids = []
+        for user in range(args.users):
+            user_ids.append(
+                await conn.fetchval(
+                    "INSERT INTO users (username, email, password_hash) "
+                    "VALUES ($1, $2, '-') RETURNING id",
+                    f"bench_filter_{user}",
+                    f"bench_filter_{user}@example.com",
+                )
+            )
+        document_ids = {}
+        for document in np.unique(documents):
+            document_ids[int(document)] = await conn.fetchval(
+                "INSERT INTO documents (user_id, filename, file_path, file_type, file_size) "
+                "VALUES ($1, 'bench', 'bench', 'txt', 0) RETURNING id",
+                user_ids[int(document) % args.users],
+            )
+        await ingest(db, corpus, documents, users, tags, document_ids)
+        await conn.execute("ANALYZE document_chunks")
+        await conn.execute("ANALYZE documents")
+
+        for name, make_filters in scenarios.items():
+            filters = make_filters([document_ids[0]], user_ids)
+            pushed, post = await run(db, queries, args.k, filters, args.oversample)
+            report(f"pgvector / {name} / na busca", *pushed, truth[name], args.k)
+            # O pós-filtro por usuário exige a tabela documents: avaliado só via SQL
+            if filters.user_id is None:
+                report(f"pgvector / {name} / pós-filtro", *post, truth[name], args.k)
+    finally:
+        await conn.execute("DELETE FROM users WHERE username LIKE 'bench_filter_%'")
+        await conn.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,217 @@
+"""
+Benchmark: busca por palavra-chave com varredura linear, índice invertido,
+matriz esparsa em lote e full-text no PostgreSQL.
+
+A varredura linear reproduz o ``KeywordSearch`` anterior (``str.count`` de
+cada termo em todos os chunks); o índice invertido é o
+``app.rag.keyword_index.InvertedIndex`` (BM25 com poda MaxScore); a matriz
+esparsa (``app.rag.keyword_matrix``) pontua lotes de ``--batch`` queries
+com um produto esparso (latência amortizada por query); os segmentos
+(``app.rag.keyword_segments``) são gravados em um diretório temporário e
+reabertos via mmap (o build inclui a gravação); com
+``--postgres``, o corpus é carregado em ``bench_keyword_chunks`` (coluna
+``content_tsv`` gerada e índice GIN, como em ``document_chunks``) e
+consultado com o SQL de ``PgVectorDatabase.keyword_search``. Para cada
+tamanho de corpus sintético (vocabulário com distribuição de Zipf), reporta
+o tempo de construção do índice e a latência p50/p99 por query.
+
+``--postgres`` requer o schema de ``docker/postgres/init-db.sql`` em
+``DATABASE_URL``; a tabela é removida ao final.
+
+Uso:
+    python -m benchmarks.bench_keyword_search --chunks 10000 100000 1000000 --postgres
+    python -m benchmarks.bench_keyword_search --chunks 1000000 --scan-limit 100000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from app.rag.keyword_index import InvertedIndex, tokenize
+from app.rag.keyword_matrix import KeywordMatrix
+from app.rag.keyword_segments import SegmentedKeywordIndex
+
+BENCH_TABLE = "bench_keyword_chunks"
+
+
+def synthetic_corpus(count: int, vocabulary: int, rng) -> List[dict]:
+    """Chunks com palavras sorteadas por frequência de Zipf."""
+    words = np.array([f"palavra{i}" for i in range(vocabulary)])
+    weights = 1.0 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    lengths = rng.integers(40, 200, size=count)
+    tokens = rng.choice(vocabulary, size=int(lengths.sum()), p=weights)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    return [
+        {
+            "id": i,
+            "document_id": i // 50,
+            "content": " ".join(words[tokens[offsets[i] : offsets[i + 1]]]),
+            "metadata": {},
+        }
+        for i in range(count)
+    ]
+
+
+def linear_scan(query_terms: List[str], documents: List[dict], top_k: int) -> List[dict]:
+    """Busca anterior: contagem de substrings em todos os chunks."""
+    results = []
+    for doc in documents:
+        content = doc["content"].lower()
+        score = 0.0
+        for term in query_terms:
+            count = content.count(term)
+            if count > 0:
+                score += count / (1 + count * 0.1)
+        if score > 0:
+            results.append((score, doc))
+    results.sort(key=lambda item: item[0], reverse=True)
+    return results[:top_k]
+
+
+def report(label: str, build: float, latencies: List[float]) -> None:
+    """Imprime uma linha de resultado."""
+    print(
+        f"{label:<32} {build:>9.1f} "
+        f"{np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 99):>9.2f}"
+    )
+
+
+async def run_postgres(db, documents: List[dict], queries, k: int) -> None:
+    """Carrega o corpus em uma tabela com ``content_tsv`` e mede a busca full-text."""
+    pool = await db.connect()
+    async with pool.acquire() as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        await conn.execute(
+            f"""
+            CREATE TABLE {BENCH_TABLE} (
+                id INTEGER PRIMARY KEY,
+                document_id INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                metadata JSONB,
+                content_tsv tsvector
+                    GENERATED ALWAYS AS (to_tsvector('portuguese', content)) STORED
+            )
+            """
+        )
+        start = time.perf_counter()
+        await conn.copy_records_to_table(
+            BENCH_TABLE,
+            records=((d["id"], d["document_id"], 0, d["content"]) for d in documents),
+            columns=["id", "document_id", "chunk_index", "content"],
+            timeout=None,
+        )
+        await conn.execute(
+            f"CREATE INDEX ON {BENCH_TABLE} USING gin (content_tsv)", timeout=None
+        )
+        await conn.execute(f"ANALYZE {BENCH_TABLE}")
+        build = time.perf_counter() - start
+
+    sql = db._build_keyword_sql(table=BENCH_TABLE)
+    latencies = []
+    for terms in queries:
+        start = time.perf_counter()
+        await pool.fetch(sql, " | ".join(terms), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    report(f"{len(documents)} / postgres full-text", build, latencies)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--terms", type=int, default=3, help="Termos por query")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=25, help="Queries por lote na matriz")
+    parser.add_argument(
+        "--scan-limit",
+        type=int,
+        default=1000000,
+        help="Maior corpus medido com a varredura linear",
+    )
+    parser.add_argument("--postgres", action="store_true", help="Incluir full-text no PostgreSQL")
+    args = parser.parse_args()
+
+    db = None
+    if args.postgres:
+        from app.db.database import PgVectorDatabase
+
+        db = PgVectorDatabase()
+
+    rng = np.random.default_rng(0)
+    print(f"{'corpus / busca':<32} {'build s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+    try:
+        for count in args.chunks:
+            documents = synthetic_corpus(count, args.vocabulary, rng)
+            # Termos das queries sorteados de chunks do corpus (comuns e raros)
+            queries = []
+            for row in rng.choice(count, size=args.queries):
+                terms = tokenize(documents[row]["content"])
+                queries.append([terms[i] for i in rng.choice(len(terms), size=args.terms)])
+
+            if count <= args.scan_limit:
+                latencies = []
+                for terms in queries:
+                    start = time.perf_counter()
+                    linear_scan(terms, documents, args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                report(f"{count} / varredura linear", 0.0, latencies)
+
+            start = time.perf_counter()
+            index = InvertedIndex()
+            index.add_many(documents)
+            build = time.perf_counter() - start
+
+            latencies = []
+            for terms in queries:
+                start = time.perf_counter()
+                index.search(terms, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            report(f"{count} / índice invertido", build, latencies)
+
+            # Lotes de queries contra a matriz esparsa (latência amortizada por query)
+            start = time.perf_counter()
+            matrix = KeywordMatrix.build(index.records())
+            build = time.perf_counter() - start
+            latencies = []
+            for offset in range(0, len(queries), args.batch):
+                batch = queries[offset : offset + args.batch]
+                start = time.perf_counter()
+                matrix.score_batch(batch, args.k)
+                latencies.append((time.perf_counter() - start) * 1000 / len(batch))
+            report(f"{count} / matriz esparsa (lote)", build, latencies)
+            del index, matrix
+
+            with tempfile.TemporaryDirectory() as root:
+                start = time.perf_counter()
+                writer = SegmentedKeywordIndex(root, background_merge=False)
+                writer.add_many(documents)
+                writer.close()
+                segmented = SegmentedKeywordIndex(root, background_merge=False)
+                build = time.perf_counter() - start
+                latencies = []
+                for terms in queries:
+                    start = time.perf_counter()
+                    segmented.search(terms, args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                report(f"{count} / segmentos mmap", build, latencies)
+                del writer, segmented
+
+            if db is not None:
+                await run_postgres(db, documents, queries, args.k)
+    finally:
+        if db is not None:
+            pool = await db.connect()
+            await pool.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+            await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark: micro-batching de embeddings de queries.
+
+Compara o caminho atual (um ``encode`` por chamada) com o ``EmbeddingBatcher``
+sob carga concorrente, reportando embeddings/s e latências p50/p99.
+
+Uso:
+    python -m benchmarks.bench_micro_batching --requests 512 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+import numpy as np
+
+from app.rag.embeddings import EmbeddingBatcher, EmbeddingsGenerator
+
+
+async def run_load(generator: EmbeddingsGenerator, texts: List[str], concurrency: int) -> dict:
+    """Dispara ``texts`` com no máximo ``concurrency`` chamadas simultâneas."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(text: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await generator.generate_embedding(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(text) for text in texts))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "embeddings_per_sec": len(texts) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    generator = EmbeddingsGenerator()
+    # O cache esconderia o custo do modelo; medir apenas a inferência
+    generator.cache = None
+
+    texts = [f"Qual é o prazo de entrega do pedido número {i}?" for i in range(args.requests)]
+
+    # Aquecimento
+    await generator._encode(texts[:8])
+
+    generator.batcher = None
+    per_call = await run_load(generator, texts, args.concurrency)
+
+    generator.batcher = EmbeddingBatcher(
+        encode_fn=generator._encode,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+    batched = await run_load(generator, texts, args.concurrency)
+
+    print(f"{'modo':<12} {'emb/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name, result in (("por chamada", per_call), ("micro-batch", batched)):
+        print(
+            f"{name:<12} {result['embeddings_per_sec']:>10.1f} "
+            f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}"
+        )
+    print(f"batcher: {generator.batcher.get_stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""
+Benchmark: document_chunks única vs particionada por hash.
+
+Carrega o mesmo corpus sintético em uma tabela sem partições (um índice HNSW)
+e em tabelas ``PARTITION BY HASH (document_id)`` com N partições (um índice
+HNSW por partição, construídos em paralelo, como em ``app.db.partitioning``).
+Reporta o tempo de construção dos índices e, por query, recall@k contra o
+top-k exato e latência p50/p99 (busca única vs busca paralela nas partições
+com junção dos top-k).
+
+A construção de um índice único também pode usar workers paralelos do
+servidor (``max_parallel_maintenance_workers``); o tempo reportado depende
+dessa configuração e de ``maintenance_work_mem``.
+
+Requer o schema de ``docker/postgres/init-db.sql`` em ``DATABASE_URL``; as
+tabelas ``bench_chunks_*`` e o usuário temporário são removidos ao final.
+
+Uso:
+    python -m benchmarks.bench_partitioning --chunks 200000 --partitions 4 8 16
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List
+
+import asyncpg
+import numpy as np
+
+from app.config import settings
+from app.db.database import PgVectorDatabase
+from app.db.partitioning import (
+    build_partition_indexes,
+    partition_names,
+    partitioned_table_sql,
+)
+from app.db.pg_copy import copy_chunks
+from app.db.pgvector_codec import vector_ops_sql
+
+FLAT_TABLE = "bench_chunks_flat"
+PARTITIONED_TABLE = "bench_chunks_part"
+
+
+async def load_flat(conn, corpus, documents, document_ids, embedding_type: str) -> None:
+    """Cria e carrega a tabela sem partições (sem índice HNSW)."""
+    await conn.execute(
+        f"""
+        CREATE TABLE {FLAT_TABLE} (
+            id SERIAL PRIMARY KEY,
+            document_id INTEGER NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            embedding {embedding_type},
+            metadata JSONB,
+            content_hash CHAR(64),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    for document in np.unique(documents):
+        rows = np.flatnonzero(documents == document)
+        chunks = [{"content": str(row), "metadata": {}} for row in rows]
+        await copy_chunks(
+            conn, document_ids[int(document)], chunks, corpus[rows], table=FLAT_TABLE
+        )
+    await conn.execute(f"ANALYZE {FLAT_TABLE}")
+
+
+async def search(db: PgVectorDatabase, tables: List[str], queries, k: int, ef_search: int):
+    """Busca em paralelo nas tabelas e junta os top-k; retorna (linhas, latências)."""
+    found, latencies = [], []
+    sqls = [db._build_search_sql(table=table) for table in tables]
+    for query in queries:
+        start = time.perf_counter()
+        batches = await asyncio.gather(
+            *(db._fetch_search(sql, query, k, -1.0, ef_search, None, []) for sql in sqls)
+        )
+        rows = heapq.nlargest(
+            k, itertools.chain.from_iterable(batches), key=lambda row: row["similarity"]
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([int(row["content"]) for row in rows])
+    return found, latencies
+
+
+def report(label: str, build: float, found, latencies, truth, k: int) -> None:
+    """Imprime uma linha de resultado."""
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    print(
+        f"{label:<24} {build:>10.1f} {recall:>9.3f} "
+        f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=settings.hnsw_m)
+    parser.add_argument("--ef-construction", type=int, default=settings.hnsw_ef_construction)
+    parser.add_argument("--ef-search", type=int, default=settings.hnsw_ef_search)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((args.chunks, settings.vector_storage_dimension))
+    corpus = (corpus / np.linalg.norm(corpus, axis=1, keepdims=True)).astype(np.float32)
+    documents = np.sort(rng.integers(0, args.documents, size=args.chunks))
+
+    picked = rng.choice(args.chunks, size=args.queries, replace=False)
+    queries = corpus[picked] + 0.05 * rng.standard_normal(corpus[picked].shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, : args.k].tolist()
+
+    ops = vector_ops_sql(settings.vector_storage_precision)
+    conn = await asyncpg.connect(settings.database_url)
+    db = PgVectorDatabase(max_size=max(args.partitions) + 1)
+    pool = await db.connect()
+    try:
+        embedding_type = await conn.fetchval(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'document_chunks'::regclass AND attname = 'embedding'"
+        )
+        user_id = await conn.fetchval(
+            "INSERT INTO users (username, email, password_hash) "
+            "VALUES ('bench_partitioning', 'bench_partitioning@example.com', '-') RETURNING id"
+        )
+        document_ids = {}
+        for document in np.unique(documents):
+            document_ids[int(document)] = await conn.fetchval(
+                "INSERT INTO documents (user_id, filename, file_path, file_type, file_size) "
+                "VALUES ($1, 'bench', 'bench', 'txt', 0) RETURNING id",
+                user_id,
+            )
+        await load_flat(conn, corpus, documents, document_ids, embedding_type)
+
+        print(f"{'layout':<24} {'build s':>10} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+        start = time.perf_counter()
+        await conn.execute(
+            f"CREATE INDEX ON {FLAT_TABLE} USING hnsw (embedding {ops}) "
+            f"WITH (m = {args.m}, ef_construction = {args.ef_construction})",
+            timeout=None,
+        )
+        build = time.perf_counter() - start
+        found, latencies = await search(db, [FLAT_TABLE], queries, args.k, args.ef_search)
+        report("sem partições", build, found, latencies, truth, args.k)
+
+        for partitions in args.partitions:
+            for statement in partitioned_table_sql(
+                PARTITIONED_TABLE, partitions, "document_id", embedding_type
+            ):
+                await conn.execute(statement)
+            await conn.execute(
+                f"INSERT INTO {PARTITIONED_TABLE} "
+                "(id, document_id, chunk_index, content, embedding, metadata, content_hash) "
+                "SELECT id, document_id, chunk_index, content, embedding, metadata, content_hash "
+                f"FROM {FLAT_TABLE}",
+                timeout=None,
+            )
+            await conn.execute(f"ANALYZE {PARTITIONED_TABLE}")
+
+            build = await build_partition_indexes(
+                pool, PARTITIONED_TABLE, partitions, args.m, args.ef_construction
+            )
+            tables = partition_names(PARTITIONED_TABLE, partitions)
+            found, latencies = await search(db, tables, queries, args.k, args.ef_search)
+            report(f"{partitions} partições", build, found, latencies, truth, args.k)
+
+            await conn.execute(f"DROP TABLE {PARTITIONED_TABLE}")
+    finally:
+        await conn.execute(f"DROP TABLE IF EXISTS {PARTITIONED_TABLE}")
+        await conn.execute(f"DROP TABLE IF EXISTS {FLAT_TABLE}")
+        await conn.execute("DELETE FROM users WHERE username = 'bench_partitioning'")
+        await conn.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Benchmark: busca em dois estágios quantizada vs busca só HNSW.
+
+Para cada modo de quantização (``binary``, ``int8``) e fator de
+oversampling, mede recall@k contra o top-k exato em float32 e latência
+p50/p99, ao lado da busca atual (grafo HNSW, sem quantização).
+
+Backends em processo (``exact`` e ``hnsw``) sempre; PgVector com
+``--pgvector`` (schema de ``docker/postgres/init-db.sql`` em
+``DATABASE_URL``; os índices das cópias quantizadas são criados com
+``build_quantized_index`` e os dados temporários removidos ao final).
+
+Uso:
+    python -m benchmarks.bench_quantized_search --chunks 200000 --oversample 2 4 8
+    python -m benchmarks.bench_quantized_search --pgvector
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.db.exact_store import ExactVectorDatabase
+from app.db.hnsw_store import HNSWVectorDatabase
+from app.db.quantization import QUANTIZATION_MODES
+
+
+async def ingest(db, corpus: np.ndarray, document_id: int) -> None:
+    """Insere o corpus em lotes (``content`` é a linha no corpus)."""
+    for offset in range(0, len(corpus), 10000):
+        batch = corpus[offset : offset + 10000]
+        chunks = [{"content": str(offset + i), "metadata": {}} for i in range(len(batch))]
+        await db.add_chunks_bulk(document_id, chunks, batch, start_index=offset)
+
+
+async def measure(db, queries: np.ndarray, k: int, **options) -> tuple:
+    """Executa as queries; retorna (linhas do corpus encontradas, latências em ms)."""
+    found: List[List[int]] = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        results = await db.search_similar_vectors(
+            embedding=query, top_k=k, threshold=-1.0, **options
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([int(r["content"]) for r in results])
+    return found, latencies
+
+
+def report(label: str, found, latencies, truth, k: int) -> None:
+    """Imprime uma linha de resultado."""
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    print(
+        f"{label:<36} {recall:>9.3f} "
+        f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+    )
+
+
+async def run_backend(name: str, db, args, queries, truth) -> None:
+    """Linha de base do backend e cada combinação modo/oversampling."""
+    found, latencies = await measure(db, queries, args.k)
+    report(f"{name} / sem quantização", found, latencies, truth, args.k)
+
+    for mode in args.modes:
+        for oversample in args.oversample:
+            found, latencies = await measure(
+                db, queries, args.k, quantization=mode, oversample=oversample
+            )
+            report(f"{name} / {mode} x{oversample}", found, latencies, truth, args.k)
+
+
+async def run_pgvector(args, corpus, queries, truth) -> None:
+    """Mesmas combinações no PgVector (usuário e documento temporários)."""
+    import asyncpg
+
+    from app.db.database import PgVectorDatabase
+
+    conn = await asyncpg.connect(settings.database_url)
+    db = PgVectorDatabase()
+    try:
+        user_id = await conn.fetchval(
+            "INSERT INTO users (username, email, password_hash) "
+            "VALUES ('bench_quantized', 'bench_quantized@example.com', '-') RETURNING id"
+        )
+        document_id = await conn.fetchval(
+            "INSERT INTO documents (user_id, filename, file_path, file_type, file_size) "
+            "VALUES ($1, 'bench', 'bench', 'txt', 0) RETURNING id",
+            user_id,
+        )
+        await ingest(db, corpus, document_id)
+        await conn.execute("ANALYZE document_chunks")
+        for mode in args.modes:
+            start = time.perf_counter()
+            await db.build_quantized_index(mode)
+            print(f"-- índice {mode}: {time.perf_counter() - start:.1f}s")
+
+        await run_backend("pgvector", db, args, queries, truth)
+    finally:
+        await conn.execute("DELETE FROM users WHERE username = 'bench_quantized'")
+        await conn.close()
+        await db.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", help="Arquivo .npy com embeddings normalizados")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--modes", nargs="+", choices=QUANTIZATION_MODES, default=list(QUANTIZATION_MODES)
+    )
+    parser.add_argument("--oversample", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--pgvector", action="store_true", help="Incluir PgVector")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+    else:
+        corpus = rng.standard_normal((args.chunks, settings.vector_storage_dimension))
+        corpus = corpus.astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+
+    picked = rng.choice(len(corpus), size=args.queries, replace=False)
+    queries = corpus[picked] + 0.05 * rng.standard_normal(corpus[picked].shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, : args.k].tolist()
+
+    print(f"{'backend / modo':<36} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    backends = {
+        "exact": lambda path: ExactVectorDatabase(index_path=path, dimension=corpus.shape[1]),
+        "hnsw": lambda path: HNSWVectorDatabase(
+            index_path=path, dimension=corpus.shape[1], max_elements=len(corpus)
+        ),
+    }
+    for name, factory in backends.items():
+        with tempfile.TemporaryDirectory() as path:
+            db = factory(path)
+            await ingest(db, corpus, document_id=1)
+            await run_backend(name, db, args, queries, truth)
+            stats = await db.get_vector_stats()
+            print(f"-- {name}: bytes das cópias quantizadas {stats['quantized_bytes']}")
+            await db.close()
+
+    if args.pgvector:
+        await run_pgvector(args, corpus, queries, truth)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
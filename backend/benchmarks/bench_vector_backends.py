@@ -0,0 +1,135 @@
+"""
+Benchmark: recall e latência dos backends vetoriais contra a busca exata.
+
+Insere o mesmo corpus em cada backend pelo protocolo de banco do
+``VectorStore`` (``add_chunks_bulk``/``search_similar_vectors``) e reporta
+tempo de ingestão, recall@k em relação ao backend ``exact`` (ground truth)
+e latência p50/p99 por query. O PgVector é opcional (``--pgvector``) e
+requer o schema de ``docker/postgres/init-db.sql`` em ``DATABASE_URL``; o
+usuário e o documento temporários são removidos ao final.
+
+Uso:
+    python -m benchmarks.bench_vector_backends --chunks 100000 --queries 200
+    python -m benchmarks.bench_vector_backends --embeddings corpus.npy --pgvector
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.db.exact_store import ExactVectorDatabase
+from app.db.hnsw_store import HNSWVectorDatabase
+
+
+async def run_backend(db, corpus: np.ndarray, queries: np.ndarray, k: int, document_id: int) -> dict:
+    """Ingestão + buscas em um backend; retorna tempos e posições encontradas."""
+    chunks = [{"content": str(i), "metadata": {}} for i in range(len(corpus))]
+
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 10000):
+        await db.add_chunks_bulk(
+            document_id,
+            chunks[offset : offset + 10000],
+            corpus[offset : offset + 10000],
+            start_index=offset,
+        )
+    ingest = time.perf_counter() - start
+
+    found, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results = await db.search_similar_vectors(embedding=query, top_k=k, threshold=-1.0)
+        latencies.append(time.perf_counter() - start)
+        found.append([int(r["content"]) for r in results])
+
+    return {"ingest": ingest, "found": found, "latencies": np.array(latencies)}
+
+
+async def create_pg_document(conn) -> int:
+    """Cria usuário e documento temporários para o PgVector."""
+    user_id = await conn.fetchval(
+        "INSERT INTO users (username, email, password_hash) "
+        "VALUES ('bench_backends', 'bench_backends@example.com', '-') RETURNING id"
+    )
+    return await conn.fetchval(
+        "INSERT INTO documents (user_id, filename, file_path, file_type, file_size) "
+        "VALUES ($1, 'bench', 'bench', 'txt', 0) RETURNING id",
+        user_id,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", help="Arquivo .npy com embeddings normalizados")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pgvector", action="store_true", help="Incluir PgVector")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+    else:
+        corpus = rng.standard_normal((args.chunks, settings.vector_storage_dimension))
+        corpus = corpus.astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+
+    picked = rng.choice(len(corpus), size=args.queries, replace=False)
+    queries = corpus[picked] + 0.05 * rng.standard_normal(corpus[picked].shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as index_path:
+        db = ExactVectorDatabase(index_path=index_path, dimension=corpus.shape[1])
+        results["exact"] = await run_backend(db, corpus, queries, args.k, document_id=1)
+        await db.close()
+    truth = results["exact"]["found"]
+
+    with tempfile.TemporaryDirectory() as index_path:
+        db = HNSWVectorDatabase(index_path=index_path, dimension=corpus.shape[1])
+        results["hnsw"] = await run_backend(db, corpus, queries, args.k, document_id=1)
+
+        start = time.perf_counter()
+        await db.snapshot()
+        snapshot_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        await HNSWVectorDatabase(index_path=index_path, dimension=corpus.shape[1]).get_vector_stats()
+        print(
+            f"hnsw snapshot: {snapshot_seconds:.2f}s, "
+            f"cold start: {time.perf_counter() - start:.2f}s"
+        )
+
+    if args.pgvector:
+        import asyncpg
+
+        from app.db.database import PgVectorDatabase
+
+        conn = await asyncpg.connect(settings.database_url)
+        db = PgVectorDatabase()
+        try:
+            document_id = await create_pg_document(conn)
+            results["pgvector"] = await run_backend(db, corpus, queries, args.k, document_id)
+        finally:
+            await conn.execute("DELETE FROM users WHERE username = 'bench_backends'")
+            await conn.close()
+            await db.close()
+
+    print(f"{'backend':<10} {'ingestão s':>10} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, result in results.items():
+        recall = np.mean(
+            [len(set(found) & set(expected)) / args.k for found, expected in zip(result["found"], truth)]
+        )
+        latencies = result["latencies"] * 1000
+        print(
+            f"{name:<10} {result['ingest']:>10.2f} {recall:>9.3f} "
+            f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
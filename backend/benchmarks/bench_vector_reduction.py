@@ -0,0 +1,111 @@
+"""
+Benchmark: redução de dimensão e meia precisão dos embeddings armazenados.
+
+Para cada configuração (método x dimensão x precisão) reporta recall@k em
+relação à busca exata com os vetores originais, latência média de busca
+exata por query e bytes por vetor armazenado.
+
+Uso:
+    python -m benchmarks.bench_vector_reduction --embeddings corpus.npy
+    python -m benchmarks.bench_vector_reduction --dims 384 256 128 --save-projection 256
+
+Sem ``--embeddings``, usa vetores sintéticos com estrutura de baixo posto
+(apenas para validar o script; os números reais exigem o corpus).
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.rag.vector_projection import VectorProjection
+
+
+def synthetic_embeddings(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Gera embeddings normalizados com espectro decrescente."""
+    rng = np.random.default_rng(seed)
+    scales = 1.0 / np.sqrt(np.arange(1, dim + 1))
+    vectors = rng.standard_normal((count, dim)).astype(np.float32) * scales
+    vectors = vectors @ np.linalg.qr(rng.standard_normal((dim, dim)))[0].astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Top-k exato por produto interno."""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Fração média dos vizinhos verdadeiros recuperados."""
+    hits = [len(set(t) & set(f)) for t, f in zip(truth, found)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", help="Arquivo .npy (n, dim) com embeddings do corpus")
+    parser.add_argument("--corpus-size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dims", type=int, nargs="+", default=[384, 256, 192, 128, 64])
+    parser.add_argument(
+        "--save-projection",
+        type=int,
+        metavar="DIM",
+        help="Ajusta PCA com DIM componentes e salva em VECTOR_PROJECTION_PATH",
+    )
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.load(args.embeddings).astype(np.float32)
+    else:
+        vectors = synthetic_embeddings(args.corpus_size + args.queries, settings.vector_dimension)
+
+    corpus, queries = vectors[: -args.queries], vectors[-args.queries :]
+    input_dim = corpus.shape[1]
+    truth = exact_top_k(corpus, queries, args.k)
+
+    # PCA ajustada em amostra do corpus (como em produção)
+    sample = corpus[np.random.default_rng(1).permutation(len(corpus))[:10000]]
+
+    print(
+        f"{'método':<9} {'dim':>5} {'precisão':>9} {'bytes/vetor':>12} "
+        f"{'recall@' + str(args.k):>10} {'ms/query':>9}"
+    )
+    for method in ("truncate", "pca"):
+        for dim in args.dims:
+            if dim > input_dim:
+                continue
+            if method == "pca":
+                projection = VectorProjection.fit_pca(sample, dim)
+            else:
+                projection = VectorProjection("truncate", input_dim, dim)
+
+            for precision, dtype in (("float32", np.float32), ("float16", np.float16)):
+                stored = projection.transform(corpus).astype(dtype).astype(np.float32)
+                projected_queries = (
+                    projection.transform(queries).astype(dtype).astype(np.float32)
+                )
+
+                start = time.perf_counter()
+                found = exact_top_k(stored, projected_queries, args.k)
+                elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                print(
+                    f"{method:<9} {dim:>5} {precision:>9} "
+                    f"{dim * np.dtype(dtype).itemsize + 4:>12} "
+                    f"{recall_at_k(truth, found):>10.3f} {elapsed_ms:>9.3f}"
+                )
+
+    if args.save_projection:
+        projection = VectorProjection.fit_pca(sample, args.save_projection)
+        projection.save(settings.vector_projection_path)
+        print(f"Projeção PCA ({args.save_projection} dims) salva em {settings.vector_projection_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Sweep de parâmetros HNSW: recall@k contra busca exata e latência p50/p99.
+
+Para cada combinação de ``m``/``ef_construction`` (tempo de construção) e
+``ef_search`` (por query), imprime recall@k em relação à busca exata e a
+latência p50/p99 por query.
+
+- ``--backend hnsw``: índice em processo (hnswlib) construído para cada
+  combinação; ground truth do backend ``exact``.
+- ``--backend pgvector``: usa ``idx_embedding_hnsw`` em ``DATABASE_URL``; com
+  ``--rebuild`` o índice é reconstruído para cada combinação
+  (``build_hnsw_index``). O ground truth vem do próprio PostgreSQL com
+  ``enable_indexscan = off`` (varredura sequencial exata). Os chunks
+  sintéticos são inseridos em um usuário temporário, removido ao final.
+
+Uso:
+    python -m benchmarks.sweep_hnsw --chunks 100000 --m 8 16 32 --ef-search 16 40 100 200
+    python -m benchmarks.sweep_hnsw --backend pgvector --rebuild --ef-construction 64 200
+    python -m benchmarks.sweep_hnsw --backend pgvector --iterative-scan relaxed_order
+"""
+
+import argparse
+import asyncio
+import itertools
+import tempfile
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.db.exact_store import ExactVectorDatabase
+from app.db.hnsw_store import HNSWVectorDatabase
+
+
+async def ingest(db, corpus: np.ndarray, document_id: int) -> float:
+    """Insere o corpus em lotes; retorna segundos gastos."""
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 10000):
+        batch = corpus[offset : offset + 10000]
+        chunks = [{"content": str(offset + i), "metadata": {}} for i in range(len(batch))]
+        await db.add_chunks_bulk(document_id, chunks, batch, start_index=offset)
+    return time.perf_counter() - start
+
+
+async def measure(db, queries: np.ndarray, k: int, **options) -> tuple:
+    """Executa as queries; retorna (IDs encontrados, latências em ms)."""
+    found: List[List[int]] = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        results = await db.search_similar_vectors(embedding=query, top_k=k, threshold=-1.0, **options)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append([r["id"] for r in results])
+    return found, np.array(latencies)
+
+
+async def pgvector_exact(db, queries: np.ndarray, k: int) -> List[List[int]]:
+    """Top-k exato no PostgreSQL (sem índice)."""
+    pool = await db.connect()
+    truth = []
+    async with pool.acquire() as conn:
+        for query in queries:
+            async with conn.transaction():
+                await conn.execute("SELECT set_config('enable_indexscan', 'off', true)")
+                rows = await conn.fetch(db.search_sql, query, k, -1.0)
+            truth.append([row["id"] for row in rows])
+    return truth
+
+
+def report(label: str, found, truth, latencies: np.ndarray, k: int) -> None:
+    """Imprime uma linha do sweep."""
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    print(
+        f"{label:<32} {recall:>9.3f} "
+        f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+    )
+
+
+async def sweep_in_process(args, corpus: np.ndarray, queries: np.ndarray) -> None:
+    """Sweep com o HNSW em processo."""
+    with tempfile.TemporaryDirectory() as index_path:
+        exact = ExactVectorDatabase(index_path=index_path, dimension=corpus.shape[1])
+        await ingest(exact, corpus, document_id=1)
+        # IDs são atribuídos na ordem de inserção: iguais entre backends
+        truth, _ = await measure(exact, queries, args.k)
+        await exact.close()
+
+    for m, ef_construction in itertools.product(args.m, args.ef_construction):
+        with tempfile.TemporaryDirectory() as index_path:
+            db = HNSWVectorDatabase(
+                index_path=index_path,
+                dimension=corpus.shape[1],
+                max_elements=len(corpus),
+                m=m,
+                ef_construction=ef_construction,
+            )
+            build = await ingest(db, corpus, document_id=1)
+            print(f"-- m={m} ef_construction={ef_construction}: construção {build:.1f}s")
+            for ef_search in args.ef_search:
+                found, latencies = await measure(db, queries, args.k, ef_search=ef_search)
+                report(f"ef_search={ef_search}", found, truth, latencies, args.k)
+
+
+async def sweep_pgvector(args, corpus: np.ndarray, queries: np.ndarray) -> None:
+    """Sweep com o PgVector."""
+    import asyncpg
+
+    from app.db.database import PgVectorDatabase
+
+    conn = await asyncpg.connect(settings.database_url)
+    db = PgVectorDatabase()
+    try:
+        user_id = await conn.fetchval(
+            "INSERT INTO users (username, email, password_hash) "
+            "VALUES ('bench_sweep', 'bench_sweep@example.com', '-') RETURNING id"
+        )
+        document_id = await conn.fetchval(
+            "INSERT INTO documents (user_id, filename, file_path, file_type, file_size) "
+            "VALUES ($1, 'bench', 'bench', 'txt', 0) RETURNING id",
+            user_id,
+        )
+        await ingest(db, corpus, document_id)
+        await conn.execute("ANALYZE document_chunks")
+        truth = await pgvector_exact(db, queries, args.k)
+
+        builds: List[Optional[tuple]] = (
+            list(itertools.product(args.m, args.ef_construction)) if args.rebuild else [None]
+        )
+        for build in builds:
+            if build is not None:
+                start = time.perf_counter()
+                await db.build_hnsw_index(*build)
+                print(
+                    f"-- m={build[0]} ef_construction={build[1]}: "
+                    f"construção {time.perf_counter() - start:.1f}s"
+                )
+            for ef_search in args.ef_search:
+                found, latencies = await measure(
+                    db, queries, args.k, ef_search=ef_search, iterative_scan=args.iterative_scan
+                )
+                report(f"ef_search={ef_search}", found, truth, latencies, args.k)
+    finally:
+        await conn.execute("DELETE FROM users WHERE username = 'bench_sweep'")
+        await conn.close()
+        await db.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["hnsw", "pgvector"], default="hnsw")
+    parser.add_argument("--embeddings", help="Arquivo .npy com embeddings normalizados")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[settings.hnsw_m])
+    parser.add_argument(
+        "--ef-construction", type=int, nargs="+", default=[settings.hnsw_ef_construction]
+    )
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 40, 64, 100, 200])
+    parser.add_argument("--iterative-scan", help="Modo de iterative scan (pgvector)")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Reconstruir idx_embedding_hnsw (pgvector)"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+    else:
+        corpus = rng.standard_normal((args.chunks, settings.vector_storage_dimension))
+        corpus = corpus.astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+
+    picked = rng.choice(len(corpus), size=args.queries, replace=False)
+    queries = corpus[picked] + 0.05 * rng.standard_normal(corpus[picked].shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"{'configuração':<32} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    if args.backend == "hnsw":
+        await sweep_in_process(args, corpus, queries)
+    else:
+        await sweep_pgvector(args, corpus, queries)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
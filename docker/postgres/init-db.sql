@@ -34,6 +34,10 @@ CREATE TABLE IF NOT EXISTS documents (
 );
 
 -- Criar tabela de chunks
+-- Para particionar por hash (CHUNK_PARTITIONS), migre depois de criada:
+-- python -m app.db.partitioning migrate --partitions N --key document_id|user_id
+-- A coluna embedding deve refletir VECTOR_STORAGE_DIMENSION e
+-- VECTOR_STORAGE_PRECISION (ex.: halfvec(256) com halfvec_ip_ops no índice)
 CREATE TABLE IF NOT EXISTS document_chunks (
     id SERIAL PRIMARY KEY,
     document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
@@ -41,17 +45,163 @@ CREATE TABLE IF NOT EXISTS document_chunks (
     content TEXT NOT NULL,
     embedding vector(384),
     metadata JSONB,
+    -- SHA-256 do conteúdo: re-indexação incremental (VectorStore.upsert_vectors).
+    -- Bancos existentes: ALTER TABLE document_chunks ADD COLUMN content_hash CHAR(64);
+    content_hash CHAR(64),
+    -- Termos para a busca por palavra-chave no banco (KEYWORD_SEARCH_BACKEND=postgres).
+    -- Bancos existentes: ALTER TABLE document_chunks ADD COLUMN content_tsv tsvector
+    -- GENERATED ALWAYS AS (to_tsvector('portuguese', content)) STORED;
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('portuguese', content)) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Criar índice HNSW para busca vetorial rápida
+-- (embeddings são normalizados: produto interno <#> equivale ao cosseno).
+-- Com NORMALIZE_EMBEDDINGS=false a busca usa <=> e o índice precisa de
+-- vector_cosine_ops; a API confere a classe na partida e recusa iniciar
+-- m/ef_construction espelham HNSW_M/HNSW_EF_CONSTRUCTION; para reconstruir
+-- com outros valores use PgVectorDatabase.build_hnsw_index
 CREATE INDEX IF NOT EXISTS idx_embedding_hnsw 
-ON document_chunks USING hnsw (embedding vector_cosine_ops);
+ON document_chunks USING hnsw (embedding vector_ip_ops)
+WITH (m = 16, ef_construction = 200);
+
+-- Busca em dois estágios (QUANTIZED_SEARCH=binary): índice sobre a cópia
+-- binária; crie com PgVectorDatabase.build_quantized_index("binary") ou:
+-- CREATE INDEX document_chunks_binary_hnsw ON document_chunks
+-- USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops);
 
 -- Criar índice para busca por documento
 CREATE INDEX IF NOT EXISTS idx_document_chunks_document_id 
 ON document_chunks(document_id);
 
+-- Índices dos filtros da busca vetorial (SearchFilters): metadados via @>
+-- e semi-join com documents por usuário/tipo de arquivo
+CREATE INDEX IF NOT EXISTS idx_document_chunks_metadata
+ON document_chunks USING gin (metadata jsonb_path_ops);
+
+CREATE INDEX IF NOT EXISTS idx_documents_user_file_type
+ON documents(user_id, file_type);
+
+-- Busca por palavra-chave (PgVectorDatabase.keyword_search): @@ sobre content_tsv
+CREATE INDEX IF NOT EXISTS idx_document_chunks_content_tsv
+ON document_chunks USING gin (content_tsv);
+
+-- Contadores incrementais de chunks: get_vector_stats soma poucas linhas em vez
+-- de varrer document_chunks. Mantidos por triggers de statement (um UPDATE por
+-- INSERT/COPY/DELETE, não por linha); PgVectorDatabase.reconcile_stats corrige
+-- desvios periodicamente (STATS_RECONCILE_INTERVAL)
+CREATE TABLE IF NOT EXISTS document_chunk_stats (
+    document_id INTEGER PRIMARY KEY,
+    chunk_count BIGINT NOT NULL DEFAULT 0,
+    content_bytes BIGINT NOT NULL DEFAULT 0,
+    vector_bytes BIGINT NOT NULL DEFAULT 0
+);
+
+-- Totais distribuídos em 16 linhas (slot = pg_backend_pid() % 16), somadas na
+-- leitura: ingestões concorrentes atualizam linhas diferentes em vez de
+-- serializar em uma só. reconciled_at só é mantido no slot 0 (reconciliação).
+-- Bancos com a versão de uma linha: DROP TABLE vector_store_stats, rode este
+-- trecho e a próxima reconciliação recompõe os totais
+CREATE TABLE IF NOT EXISTS vector_store_stats (
+    slot SMALLINT PRIMARY KEY CHECK (slot >= 0 AND slot < 16),
+    total_chunks BIGINT NOT NULL DEFAULT 0,
+    total_documents BIGINT NOT NULL DEFAULT 0,
+    content_bytes BIGINT NOT NULL DEFAULT 0,
+    vector_bytes BIGINT NOT NULL DEFAULT 0,
+    reconciled_at TIMESTAMP
+);
+
+INSERT INTO vector_store_stats (slot)
+SELECT generate_series(0, 15) ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION document_chunks_stats_insert() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    new_documents BIGINT;
+BEGIN
+    WITH upserted AS (
+        INSERT INTO document_chunk_stats AS s
+            (document_id, chunk_count, content_bytes, vector_bytes)
+        SELECT document_id, count(*), sum(octet_length(content)),
+               sum(coalesce(pg_column_size(embedding), 0))
+        FROM new_chunks
+        GROUP BY document_id
+        ON CONFLICT (document_id) DO UPDATE
+        SET chunk_count = s.chunk_count + EXCLUDED.chunk_count,
+            content_bytes = s.content_bytes + EXCLUDED.content_bytes,
+            vector_bytes = s.vector_bytes + EXCLUDED.vector_bytes
+        RETURNING (xmax = 0) AS created
+    )
+    SELECT count(*) FILTER (WHERE created) INTO new_documents FROM upserted;
+
+    UPDATE vector_store_stats AS t
+    SET total_chunks = t.total_chunks + d.chunks,
+        total_documents = t.total_documents + new_documents,
+        content_bytes = t.content_bytes + d.content_bytes,
+        vector_bytes = t.vector_bytes + d.vector_bytes
+    FROM (
+        SELECT count(*) AS chunks,
+               coalesce(sum(octet_length(content)), 0) AS content_bytes,
+               coalesce(sum(pg_column_size(embedding)), 0) AS vector_bytes
+        FROM new_chunks
+    ) AS d
+    WHERE t.slot = pg_backend_pid() % 16;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION document_chunks_stats_delete() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    removed_documents BIGINT;
+BEGIN
+    UPDATE document_chunk_stats AS s
+    SET chunk_count = s.chunk_count - d.chunks,
+        content_bytes = s.content_bytes - d.content_bytes,
+        vector_bytes = s.vector_bytes - d.vector_bytes
+    FROM (
+        SELECT document_id, count(*) AS chunks,
+               sum(octet_length(content)) AS content_bytes,
+               sum(coalesce(pg_column_size(embedding), 0)) AS vector_bytes
+        FROM old_chunks
+        GROUP BY document_id
+    ) AS d
+    WHERE s.document_id = d.document_id;
+
+    DELETE FROM document_chunk_stats
+    WHERE document_id IN (SELECT document_id FROM old_chunks) AND chunk_count <= 0;
+    GET DIAGNOSTICS removed_documents = ROW_COUNT;
+
+    UPDATE vector_store_stats AS t
+    SET total_chunks = t.total_chunks - d.chunks,
+        total_documents = t.total_documents - removed_documents,
+        content_bytes = t.content_bytes - d.content_bytes,
+        vector_bytes = t.vector_bytes - d.vector_bytes
+    FROM (
+        SELECT count(*) AS chunks,
+               coalesce(sum(octet_length(content)), 0) AS content_bytes,
+               coalesce(sum(pg_column_size(embedding)), 0) AS vector_bytes
+        FROM old_chunks
+    ) AS d
+    WHERE t.slot = pg_backend_pid() % 16;
+    RETURN NULL;
+END;
+$$;
+
+-- UPDATEs de chunks (só chunk_index/metadata na re-indexação) não alteram os
+-- contadores; os triggers são recriados por app.db.partitioning na migração
+DROP TRIGGER IF EXISTS document_chunks_stats_insert ON document_chunks;
+CREATE TRIGGER document_chunks_stats_insert
+AFTER INSERT ON document_chunks
+REFERENCING NEW TABLE AS new_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION document_chunks_stats_insert();
+
+DROP TRIGGER IF EXISTS document_chunks_stats_delete ON document_chunks;
+CREATE TRIGGER document_chunks_stats_delete
+AFTER DELETE ON document_chunks
+REFERENCING OLD TABLE AS old_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION document_chunks_stats_delete();
+
 -- Criar tabela de sessões de chat
 CREATE TABLE IF NOT EXISTS chat_sessions (
     id SERIAL PRIMARY KEY,